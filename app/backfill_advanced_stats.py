@@ -13,6 +13,9 @@ Usage examples:
 
   # Reprocess even leagues that already have advanced stats
   python -m app.backfill_advanced_stats --force
+
+  # Only games whose stats rows changed since a timestamp
+  python -m app.backfill_advanced_stats --since 2026-10-01T00:00:00Z
 """
 
 import argparse
@@ -110,7 +113,7 @@ def league_has_advanced_stats(db, league_id: str) -> bool:
         return False
 
 
-def run_backfill(league_id: str = None, force: bool = False):
+def run_backfill(league_id: str = None, force: bool = False, since: str = None):
     """
     Main entry point for the backfill.
 
@@ -118,6 +121,8 @@ def run_backfill(league_id: str = None, force: bool = False):
     ----------
     league_id : str   Restrict to a single league UUID.
     force     : bool  Re-run leagues that already have advanced stats.
+    since     : str   Only recompute games updated at or after this ISO
+                      timestamp (implies force).
     """
     from app.utils.compute_advanced_stats import compute_advanced_stats
 
@@ -136,7 +141,7 @@ def run_backfill(league_id: str = None, force: bool = False):
     errors = []
 
     for lid in league_ids:
-        if not force and league_has_advanced_stats(db, lid):
+        if not force and not since and league_has_advanced_stats(db, lid):
             log.info(
                 "league=%s already has advanced stats, skipping (use --force to reprocess)",
                 lid,
@@ -146,7 +151,7 @@ def run_backfill(league_id: str = None, force: bool = False):
 
         log.info("Processing league=%s", lid)
         try:
-            result = compute_advanced_stats(lid)
+            result = compute_advanced_stats(lid, since=since)
             status = result.get("status", "unknown")
             if status == "success":
                 leagues_processed += 1
@@ -201,6 +206,11 @@ def main():
         default=False,
         help="Reprocess leagues even if advanced stats already exist",
     )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Only recompute games whose stats rows were updated at or after this ISO timestamp",
+    )
     args = parser.parse_args()
 
     if not SUPABASE_URL or not SUPABASE_KEY:
@@ -210,6 +220,7 @@ def main():
     run_backfill(
         league_id=args.league_id,
         force=args.force,
+        since=args.since,
     )
 
 
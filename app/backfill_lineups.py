@@ -19,12 +19,19 @@ Usage examples:
 
   # Reprocess even already-processed games
   python -m app.backfill_lineups --force
+
+  # Parallel: 8 worker processes, rosters/events prefetched 25 games at a time
+  python -m app.backfill_lineups --force --workers 8 --batch-size 25
 """
 
 import argparse
 import logging
+import queue
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,6 +43,10 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
 
+# Computed games waiting for the writer thread; bounds memory when the
+# workers outpace the DB writes.
+WRITE_QUEUE_SIZE = int(os.getenv("BACKFILL_WRITE_QUEUE_SIZE", "16"))
+
 
 def get_db():
     from supabase import create_client
@@ -52,16 +63,19 @@ def fetch_games(db, league_id: str = None, game_key: str = None) -> list:
     Return games from game_schedule that have a LiveStats URL.
     Optionally filter by league_id or a single game_key.
     """
-    q = db.table("game_schedule").select(
-        'game_key, league_id, "LiveStats URL"'
-    )
-    if game_key:
-        q = q.eq("game_key", game_key)
-    elif league_id:
-        q = q.eq("league_id", league_id)
+    from app.utils.helpers import select_all_pages
+
+    def query():
+        q = db.table("game_schedule").select(
+            'game_key, league_id, "LiveStats URL"'
+        )
+        if game_key:
+            q = q.eq("game_key", game_key)
+        elif league_id:
+            q = q.eq("league_id", league_id)
+        return q.order("game_key")
 
-    res = q.execute()
-    return [g for g in res.data if g.get("LiveStats URL")]
+    return [g for g in select_all_pages(query) if g.get("LiveStats URL")]
 
 
 def game_already_processed(db, game_key: str) -> bool:
@@ -83,11 +97,30 @@ def game_already_processed(db, game_key: str) -> bool:
         return False
 
 
+def processed_game_keys(db, game_keys: list) -> set:
+    """Bulk version of game_already_processed: the subset of game_keys with stints."""
+    from app.utils.lineup_builder import games_with_stints
+
+    try:
+        return games_with_stints(game_keys)
+    except Exception as exc:
+        log.warning("Could not check lineup_stints for %d games: %s", len(game_keys), exc)
+        return set()
+
+
+def _compute_game(game_key: str, league_id: str, rosters_by_team: dict, events: list) -> list:
+    """Process-pool task: reconstruct one game's stints from prefetched rows."""
+    from app.utils.lineup_builder import compute_stints
+    return compute_stints(game_key, league_id, rosters_by_team, events)
+
+
 def run_backfill(
     game_key: str = None,
     league_id: str = None,
     dry_run: bool = False,
     force: bool = False,
+    workers: int = 1,
+    batch_size: int = 25,
 ):
     """
     Main entry point for the backfill.
@@ -98,13 +131,27 @@ def run_backfill(
     league_id  : str   Filter to this league UUID.
     dry_run    : bool  Compute stints but skip all DB writes.
     force      : bool  Reprocess games even if stints already exist.
+    workers    : int   > 1 runs the parallel mode with this many processes.
+    batch_size : int   Games whose rosters/events are prefetched together
+                       (parallel mode only).
     """
+    if workers > 1:
+        return run_parallel_backfill(
+            game_key=game_key,
+            league_id=league_id,
+            dry_run=dry_run,
+            force=force,
+            workers=workers,
+            batch_size=batch_size,
+        )
+
     from app.utils.lineup_builder import build_lineups_for_game
 
     db = get_db()
 
     games = fetch_games(db, league_id=league_id, game_key=game_key)
     log.info("Found %d games to process", len(games))
+    started = time.monotonic()
 
     processed = 0
     skipped = 0
@@ -139,12 +186,167 @@ def run_backfill(
             log.error("Failed to build lineups for game=%s: %s", gk, exc, exc_info=True)
             errors += 1
 
+    elapsed = time.monotonic() - started
     print("\n" + "=" * 60)
     print("Lineup backfill complete")
     print(f"  Processed : {processed}")
     print(f"  Skipped   : {skipped}")
     print(f"  Errors    : {errors}")
     print(f"  Dry-run   : {dry_run}")
+    print(f"  Elapsed   : {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} games/sec)")
+    print("=" * 60)
+
+
+def run_parallel_backfill(
+    game_key: str = None,
+    league_id: str = None,
+    dry_run: bool = False,
+    force: bool = False,
+    workers: int = 4,
+    batch_size: int = 25,
+):
+    """
+    Parallel backfill.
+
+    The main thread prefetches rosters and events for *batch_size* games at a
+    time with two bulk queries and hands each game to a process pool (the
+    event walk is pure Python, so threads would serialize on the GIL).  While
+    the pool works on one batch the next one is being fetched.  Finished games
+    go through a bounded queue to a single writer thread, which replaces each
+    game's stints in one request; with --dry-run nothing is written.
+    """
+    from app.utils.lineup_builder import load_rosters_for_games, load_events_for_games, write_stints
+
+    db = get_db()
+
+    games = fetch_games(db, league_id=league_id, game_key=game_key)
+    log.info("Found %d games to process (workers=%d, batch_size=%d)", len(games), workers, batch_size)
+
+    counts = {"processed": 0, "skipped": 0, "errors": 0, "events": 0, "stints": 0}
+    counts_lock = threading.Lock()
+
+    def bump(key, n=1):
+        with counts_lock:
+            counts[key] += n
+
+    # --- Writer thread ---
+    write_q: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+
+    def writer():
+        while True:
+            item = write_q.get()
+            if item is None:
+                return
+            gk, lid, stints, rosters_by_team = item
+            try:
+                written, _ = write_stints(gk, lid, stints, rosters_by_team)
+                if len(written) == len(stints):
+                    bump("processed")
+                else:
+                    log.error("game=%s: wrote %d of %d stints", gk, len(written), len(stints))
+                    bump("errors")
+            except Exception as exc:
+                log.error("Failed to write lineups for game=%s: %s", gk, exc, exc_info=True)
+                bump("errors")
+
+    writer_thread = None
+    if not dry_run:
+        writer_thread = threading.Thread(target=writer, name="lineup-writer", daemon=True)
+        writer_thread.start()
+
+    def report():
+        elapsed = time.monotonic() - started
+        done = counts["processed"] + counts["skipped"] + counts["errors"]
+        print(
+            f"⏱️  {done}/{len(games)} games | {counts['processed'] / elapsed:.2f} games/sec | "
+            f"{counts['events'] / elapsed:.0f} events/sec"
+        )
+
+    def drain(pending):
+        """Collect a batch's results and queue them for writing (blocks when the queue is full)."""
+        for gk, lid, rosters_by_team, n_events, future in pending:
+            try:
+                stints = future.result()
+            except Exception as exc:
+                log.error("Failed to build lineups for game=%s: %s", gk, exc, exc_info=True)
+                bump("errors")
+                continue
+            bump("events", n_events)
+            if not stints:
+                log.warning("game=%s: no stints generated", gk)
+                bump("skipped")
+                continue
+            bump("stints", len(stints))
+            if dry_run:
+                bump("processed")
+            else:
+                write_q.put((gk, lid, stints, rosters_by_team))
+        if pending:
+            report()
+
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for i in range(0, len(games), batch_size):
+            batch = []
+            for game in games[i:i + batch_size]:
+                if not game.get("league_id"):
+                    log.warning("game=%s has no league_id, skipping", game["game_key"])
+                    bump("skipped")
+                    continue
+                batch.append(game)
+
+            keys = [g["game_key"] for g in batch]
+            if not force and not dry_run:
+                done_keys = processed_game_keys(db, keys) & set(keys)
+                if done_keys:
+                    log.info("Skipping %d already-processed games (use --force to reprocess)", len(done_keys))
+                    bump("skipped", len(done_keys))
+                    batch = [g for g in batch if g["game_key"] not in done_keys]
+                    keys = [g["game_key"] for g in batch]
+
+            try:
+                rosters = load_rosters_for_games(keys)
+                events = load_events_for_games(keys)
+            except Exception as exc:
+                log.error("Failed to prefetch batch at offset %d: %s", i, exc, exc_info=True)
+                bump("errors", len(batch))
+                continue
+
+            submitted = []
+            for game in batch:
+                gk, lid = game["game_key"], game["league_id"]
+                game_rosters = rosters.get(gk)
+                game_events = events.get(gk)
+                if not game_rosters or not game_events:
+                    log.warning("game=%s: missing rosters or live_events, skipping", gk)
+                    bump("skipped")
+                    continue
+                future = pool.submit(_compute_game, gk, lid, game_rosters, game_events)
+                submitted.append((gk, lid, game_rosters, len(game_events), future))
+
+            # The pool works on this batch while the previous one is written
+            # and the next one is fetched.
+            drain(pending)
+            pending = submitted
+        drain(pending)
+
+    if writer_thread is not None:
+        write_q.put(None)
+        writer_thread.join()
+
+    elapsed = time.monotonic() - started
+    print("\n" + "=" * 60)
+    print("Lineup backfill complete (parallel)")
+    print(f"  Processed : {counts['processed']}")
+    print(f"  Skipped   : {counts['skipped']}")
+    print(f"  Errors    : {counts['errors']}")
+    print(f"  Stints    : {counts['stints']}")
+    print(f"  Dry-run   : {dry_run}")
+    print(f"  Workers   : {workers}")
+    print(f"  Elapsed   : {elapsed:.1f}s")
+    print(f"  Throughput: {counts['processed'] / elapsed if elapsed else 0:.2f} games/sec, "
+          f"{counts['events'] / elapsed if elapsed else 0:.0f} events/sec")
     print("=" * 60)
 
 
@@ -177,6 +379,19 @@ def main():
         default=False,
         help="Reprocess games even if lineup_stints rows already exist",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the parallel mode (default 1 = serial)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        default=25,
+        help="Games whose rosters/events are prefetched per bulk query (parallel mode)",
+    )
     args = parser.parse_args()
 
     if not SUPABASE_URL or not SUPABASE_KEY:
@@ -188,6 +403,8 @@ def main():
         league_id=args.league_id,
         dry_run=args.dry_run,
         force=args.force,
+        workers=args.workers,
+        batch_size=args.batch_size,
     )
 
 
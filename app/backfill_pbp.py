@@ -3,7 +3,7 @@
 Backfill script to populate play-by-play data for all existing games.
 """
 
-import requests
+from app.utils import livestats_http
 from app.utils.json_parser import (
     supabase,
     get_or_create_team,
@@ -53,10 +53,10 @@ def backfill_all_games():
             # Extract numeric ID from URL and build data.json URL
             # URL format: https://fibalivestats.dcd.shared.geniussports.com/u/HBBC/2716679/
             numeric_id = livestats_url.rstrip("/").split("/")[-1]
-            data_json_url = f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
+            data_json_url = livestats_http.data_url(numeric_id)
             
             # Fetch the JSON data
-            response = requests.get(data_json_url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            response, _ = livestats_http.get(data_json_url, timeout=10)
             
             if response.status_code != 200:
                 print(f"   ⏭️  Skipped (HTTP {response.status_code})")
@@ -5,7 +5,7 @@ Populates live_events with core play-by-play data quickly.
 Team/Player IDs can be populated later if needed.
 """
 
-import requests
+from app.utils import livestats_http
 from app.utils.json_parser import supabase
 
 
@@ -37,10 +37,10 @@ def backfill_fast():
         try:
             # Extract numeric ID from URL
             numeric_id = livestats_url.rstrip("/").split("/")[-1]
-            data_json_url = f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
+            data_json_url = livestats_http.data_url(numeric_id)
             
             # Fetch the JSON data
-            response = requests.get(data_json_url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            response, _ = livestats_http.get(data_json_url, timeout=10)
             
             if response.status_code != 200:
                 print(f"   ⏭️  Skipped (HTTP {response.status_code})")
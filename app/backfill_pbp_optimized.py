@@ -4,13 +4,13 @@ Optimized backfill script with team/player ID linking.
 Uses in-memory caching and proven fuzzy matching from json_parser.
 """
 
-import requests
-from app.utils.json_parser import supabase, find_similar_player, normalize_player_name
+from app.utils import livestats_http
+from app.utils import entity_cache
+from app.utils.json_parser import supabase, find_similar_player, find_team_id
 
 
 # Global caches
-TEAMS_CACHE = {}  # league_id -> {name: team_id}
-PLAYERS_CACHE = {}  # "team_id:normalized_name" -> player_id
+TEAMS_CACHE = {}  # (league_id, lowercased team name) -> team_id
 
 
 def load_all_teams():
@@ -20,19 +20,18 @@ def load_all_teams():
     
     for team in result.data:
         league_id = team["league_id"]
-        if league_id not in TEAMS_CACHE:
-            TEAMS_CACHE[league_id] = {}
-        TEAMS_CACHE[league_id][team["name"].lower()] = team["team_id"]
+        TEAMS_CACHE[(league_id, team["name"].lower())] = team["team_id"]
     
     print(f"   ✅ Cached {len(result.data)} teams")
 
 
 def get_team_id(league_id, team_name):
-    """Get team_id from cache with exact matching."""
-    if not team_name or league_id not in TEAMS_CACHE:
+    """Get team_id from cache with exact matching, else from the shared entity cache/DB."""
+    if not team_name:
         return None
     
-    return TEAMS_CACHE[league_id].get(team_name.lower())
+    team_id = TEAMS_CACHE.get((league_id, team_name.lower()))
+    return team_id if team_id is not None else find_team_id(league_id, team_name)
 
 
 def get_player_id_with_fallback(team_id, player_name):
@@ -46,11 +45,7 @@ def get_player_id_with_fallback(team_id, player_name):
     if not player_name or not team_id:
         return None
     
-    # Check cache first
-    cache_key = f"{team_id}:{normalize_player_name(player_name).lower()}"
-    if cache_key in PLAYERS_CACHE:
-        return PLAYERS_CACHE[cache_key]
-    
+    # Rosters and their name indexes come from the shared entity cache
     # Pass 1: Try strict threshold (0.85)
     player = find_similar_player(player_name, team_id, similarity_threshold=0.85)
     
@@ -58,13 +53,7 @@ def get_player_id_with_fallback(team_id, player_name):
     if not player:
         player = find_similar_player(player_name, team_id, similarity_threshold=0.75)
     
-    if player:
-        player_id = player["id"]
-        # Cache the result
-        PLAYERS_CACHE[cache_key] = player_id
-        return player_id
-    
-    return None
+    return player["id"] if player else None
 
 
 def backfill_optimized():
@@ -101,10 +90,10 @@ def backfill_optimized():
         try:
             # Extract numeric ID and build URL
             numeric_id = livestats_url.rstrip("/").split("/")[-1]
-            data_json_url = f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
+            data_json_url = livestats_http.data_url(numeric_id)
             
             # Fetch JSON
-            response = requests.get(data_json_url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            response, _ = livestats_http.get(data_json_url, timeout=10)
             
             if response.status_code != 200:
                 print(f"   ⏭️  Skipped (HTTP {response.status_code})")
@@ -195,6 +184,7 @@ def backfill_optimized():
     print(f"   Processed: {processed} games")
     print(f"   Skipped: {skipped} games")
     print(f"   Errors: {errors} games")
+    print(f"   Entity cache: {entity_cache.stats()}")
     print(f"{'='*70}\n")
 
 
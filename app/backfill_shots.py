@@ -17,7 +17,6 @@ Optional env vars:
 import os
 import sys
 import logging
-import requests
 
 logging.basicConfig(
     level=logging.INFO,
@@ -28,8 +27,9 @@ logging.basicConfig(
 log = logging.getLogger("backfill_shots")
 
 from app.utils.json_parser import game_db, ref_db
+from app.utils import livestats_http
 
-LIVESTATS_BASE = "https://fibalivestats.dcd.shared.geniussports.com/data"
+LIVESTATS_BASE = livestats_http.LIVESTATS_BASE
 DRY_RUN = os.environ.get("DRY_RUN", "false").lower() == "true"
 FILTER_LEAGUE_ID = os.environ.get("LEAGUE_ID")
 LIMIT = int(os.environ.get("LIMIT", "9999"))
@@ -106,7 +106,7 @@ def extract_numeric_id(url: str) -> str | None:
 def fetch_json(numeric_id: str) -> dict | None:
     url = f"{LIVESTATS_BASE}/{numeric_id}/data.json"
     try:
-        r = requests.get(url, headers=REQUEST_HEADERS, timeout=15)
+        r, _ = livestats_http.get(url, headers=REQUEST_HEADERS, timeout=15)
         if r.status_code == 200:
             return r.json()
         log.warning("HTTP %d for %s", r.status_code, url)
@@ -5,12 +5,12 @@ Only targets records with player_name NOT NULL but missing IDs.
 """
 
 import time
-from app.utils.json_parser import supabase, find_similar_player, normalize_player_name
+from app.utils import entity_cache
+from app.utils.json_parser import supabase, find_similar_player, find_team_id
 
 
 # Global caches
-TEAMS_CACHE = {}  # league_id -> {name: team_id}
-PLAYERS_CACHE = {}  # "team_id:normalized_name" -> player_id
+TEAMS_CACHE = {}  # (league_id, lowercased team name) -> team_id
 GAME_JSON_CACHE = {}  # game_key -> json data
 
 
@@ -21,19 +21,18 @@ def load_all_teams():
     
     for team in result.data:
         league_id = team["league_id"]
-        if league_id not in TEAMS_CACHE:
-            TEAMS_CACHE[league_id] = {}
-        TEAMS_CACHE[league_id][team["name"].lower()] = team["team_id"]
+        TEAMS_CACHE[(league_id, team["name"].lower())] = team["team_id"]
     
     print(f"   ✅ Cached {len(result.data)} teams\n")
 
 
 def get_team_id(league_id, team_name):
-    """Get team_id from cache with exact matching."""
-    if not team_name or league_id not in TEAMS_CACHE:
+    """Get team_id from cache with exact matching, else from the shared entity cache/DB."""
+    if not team_name:
         return None
     
-    return TEAMS_CACHE[league_id].get(team_name.lower())
+    team_id = TEAMS_CACHE.get((league_id, team_name.lower()))
+    return team_id if team_id is not None else find_team_id(league_id, team_name)
 
 
 def get_player_id_with_fallback(team_id, player_name):
@@ -44,11 +43,7 @@ def get_player_id_with_fallback(team_id, player_name):
     if not player_name or not team_id:
         return None
     
-    # Check cache first
-    cache_key = f"{team_id}:{normalize_player_name(player_name).lower()}"
-    if cache_key in PLAYERS_CACHE:
-        return PLAYERS_CACHE[cache_key]
-    
+    # Rosters and their name indexes come from the shared entity cache
     # Pass 1: Try strict threshold (0.85)
     player = find_similar_player(player_name, team_id, similarity_threshold=0.85)
     
@@ -56,13 +51,7 @@ def get_player_id_with_fallback(team_id, player_name):
     if not player:
         player = find_similar_player(player_name, team_id, similarity_threshold=0.75)
     
-    if player:
-        player_id = player["id"]
-        # Cache the result
-        PLAYERS_CACHE[cache_key] = player_id
-        return player_id
-    
-    return None
+    return player["id"] if player else None
 
 
 def get_game_json(game_key):
@@ -83,11 +72,11 @@ def get_game_json(game_key):
             return None
         
         # Fetch JSON
-        import requests
+        from app.utils import livestats_http
         numeric_id = livestats_url.rstrip("/").split("/")[-1]
-        data_url = f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
+        data_url = livestats_http.data_url(numeric_id)
         
-        resp = requests.get(data_url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+        resp, _ = livestats_http.get(data_url, timeout=10)
         if resp.status_code != 200:
             GAME_JSON_CACHE[game_key] = None
             return None
@@ -267,6 +256,7 @@ def fix_missing_ids():
     print(f"   Total records processed: {total_processed:,}")
     print(f"   Player IDs added: {total_player_ids_added:,}")
     print(f"   Team IDs added: {total_team_ids_added:,}")
+    print(f"   Entity cache: {entity_cache.stats()}")
     print(f"{'='*70}\n")
 
 
@@ -5,13 +5,12 @@ Targets only records with player_name NOT NULL but missing IDs.
 """
 
 import time
-from app.utils.json_parser import supabase, find_similar_player, normalize_player_name, normalize_team_name
+from app.utils import entity_cache
+from app.utils.json_parser import supabase, find_similar_player, find_team_id, normalize_team_name
 
 
 # Caches
-TEAMS_CACHE = {}
-PLAYERS_CACHE = {}
-ALL_PLAYERS_BY_TEAM = {}  # team_id -> list of player dicts
+TEAMS_CACHE = {}  # (league_id, lowercased normalized team name) -> team_id
 
 
 def load_teams():
@@ -20,86 +19,28 @@ def load_teams():
     result = supabase.table("teams").select("team_id, name, league_id").execute()
     for team in result.data:
         league_id = team["league_id"]
-        if league_id not in TEAMS_CACHE:
-            TEAMS_CACHE[league_id] = {}
         # Normalize team name when storing to match normalized lookups
         normalized_name = normalize_team_name(team["name"]).lower()
-        TEAMS_CACHE[league_id][normalized_name] = team["team_id"]
+        TEAMS_CACHE[(league_id, normalized_name)] = team["team_id"]
     print(f"   ✅ Cached {len(result.data)} teams\n")
 
 
-def load_all_players():
-    """Load ALL players into memory for fast fuzzy matching."""
-    print("📥 Loading all players...")
-    offset = 0
-    batch_size = 1000
-    total_players = 0
-    
-    while True:
-        result = supabase.table("players").select("id, full_name, team_id").range(offset, offset + batch_size - 1).execute()
-        if not result.data:
-            break
-        
-        for player in result.data:
-            team_id = player["team_id"]
-            if team_id not in ALL_PLAYERS_BY_TEAM:
-                ALL_PLAYERS_BY_TEAM[team_id] = []
-            ALL_PLAYERS_BY_TEAM[team_id].append(player)
-        
-        total_players += len(result.data)
-        
-        if len(result.data) < batch_size:
-            break
-        
-        offset += batch_size
-    
-    print(f"   ✅ Loaded {total_players:,} players across {len(ALL_PLAYERS_BY_TEAM)} teams\n")
-
-
 def get_team_id(league_id, team_name):
-    """Get team_id from cache with normalization."""
-    if not team_name or league_id not in TEAMS_CACHE:
+    """Get team_id from cache with normalization, else from the shared entity cache/DB."""
+    if not team_name:
         return None
-    normalized = normalize_team_name(team_name).lower()
-    return TEAMS_CACHE[league_id].get(normalized)
+    team_id = TEAMS_CACHE.get((league_id, normalize_team_name(team_name).lower()))
+    return team_id if team_id is not None else find_team_id(league_id, team_name)
 
 
 def get_player_id(team_id, player_name):
-    """Get player_id with in-memory fuzzy matching."""
+    """Get player_id by fuzzy matching against the team's roster (shared entity cache)."""
     if not player_name or not team_id:
         return None
     
-    cache_key = f"{team_id}:{normalize_player_name(player_name).lower()}"
-    if cache_key in PLAYERS_CACHE:
-        return PLAYERS_CACHE[cache_key]
-    
-    # Get players for this team from memory
-    team_players = ALL_PLAYERS_BY_TEAM.get(team_id, [])
-    if not team_players:
-        return None
-    
-    # Do fuzzy matching in-memory
-    from difflib import SequenceMatcher
-    normalized_search = normalize_player_name(player_name).lower()
-    
-    best_match = None
-    best_score = 0.0
-    
-    for player in team_players:
-        existing_name = normalize_player_name(player["full_name"]).lower()
-        similarity = SequenceMatcher(None, normalized_search, existing_name).ratio()
-        
-        if similarity > best_score:
-            best_score = similarity
-            best_match = player
-    
     # Use threshold of 0.75
-    if best_match and best_score >= 0.75:
-        player_id = best_match["id"]
-        PLAYERS_CACHE[cache_key] = player_id
-        return player_id
-    
-    return None
+    player = find_similar_player(player_name, team_id, similarity_threshold=0.75)
+    return player["id"] if player else None
 
 
 def fix_ids():
@@ -108,7 +49,6 @@ def fix_ids():
     print("="*70)
     
     load_teams()
-    load_all_players()
     
     # Get ALL records with player_name but missing player_id (in batches)
     print("📊 Fetching records to fix...")
@@ -152,10 +92,10 @@ def fix_ids():
             url = schedule.data[0].get("LiveStats URL")
             if url:
                 try:
-                    import requests
+                    from app.utils import livestats_http
                     numeric_id = url.rstrip("/").split("/")[-1]
-                    data_url = f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
-                    resp = requests.get(data_url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+                    data_url = livestats_http.data_url(numeric_id)
+                    resp, _ = livestats_http.get(data_url, timeout=10)
                     if resp.status_code == 200:
                         data = resp.json()
                         teams = data.get("tm", {})
@@ -240,6 +180,7 @@ def fix_ids():
     print(f"\n{'='*70}")
     print(f"✅ COMPLETE!")
     print(f"   Total fixed: {total_fixed:,}")
+    print(f"   Entity cache: {entity_cache.stats()}")
     print(f"{'='*70}\n")
 
 
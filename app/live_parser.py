@@ -1,6 +1,5 @@
 
 import time
-import requests
 from app.utils.json_parser import (
     supabase,
     normalize_team_name,
@@ -11,6 +10,7 @@ from app.utils.json_parser import (
     TEAM_FIELD_MAP,
     PLAYER_FIELD_MAP
 )
+from app.utils import livestats_http
 
 POLL_INTERVAL = 10
 
@@ -93,7 +93,8 @@ def process_game(game):
     livestats_url = game["LiveStats URL"]
     
     try:
-        data = requests.get(livestats_url, timeout=10).json()
+        response, _ = livestats_http.get(livestats_url, timeout=10)
+        data = response.json()
     except Exception as e:
         print(f"❌ Error fetching {game_key}: {e}")
         return
@@ -3,6 +3,7 @@ import logging
 
 from flask import Blueprint, jsonify, request
 from app.utils.chat_data import supabase
+from app.utils.helpers import select_all_pages
 
 admin_bp = Blueprint("admin", __name__)
 log = logging.getLogger("admin")
@@ -15,34 +16,18 @@ def _check_auth() -> bool:
     return bool(ADMIN_SECRET) and provided == ADMIN_SECRET
 
 
-def _game_already_processed(game_key: str) -> bool:
-    try:
-        res = (
-            supabase.table("lineup_stints")
-            .select("id")
-            .eq("game_key", game_key)
-            .limit(1)
-            .execute()
-        )
-        return bool(res.data)
-    except Exception as exc:
-        log.warning("Could not check lineup_stints for %s: %s", game_key, exc)
-        return False
+_BACKFILL_BATCH_SIZE = 50
 
 
-def _count_stints(game_key: str) -> int:
-    """Return the current row count in lineup_stints for this game."""
-    try:
-        res = (
-            supabase.table("lineup_stints")
-            .select("id", count="exact")
-            .eq("game_key", game_key)
-            .execute()
-        )
-        return res.count or 0
-    except Exception as exc:
-        log.warning("Could not count stints for game=%s: %s", game_key, exc)
-        return 0
+def _fetch_schedule_games(league_id_filter: str = None) -> list:
+    """game_key / league_id for every scheduled game (paginated), optionally one league."""
+    def query():
+        q = supabase.table("game_schedule").select("game_key, league_id")
+        if league_id_filter:
+            q = q.eq("league_id", league_id_filter)
+        return q.order("game_key")
+
+    return select_all_pages(query)
 
 
 @admin_bp.route("/api/admin/backfill-lineups", methods=["POST"])
@@ -51,6 +36,11 @@ def backfill_lineups():
     Trigger lineup backfill for all games in the database that have
     play-by-play events.
 
+    Candidate games come from game_schedule (parse_and_store_game always
+    writes the schedule row before any events); each one ends up counted in
+    exactly one of games_processed, games_skipped or games_failed, so the
+    three add up to games_total.
+
     Auth:
       X-Admin-Key header must match the ADMIN_SECRET environment variable.
 
@@ -59,8 +49,11 @@ def backfill_lineups():
       force      (bool) — if 'true', reprocess games that already have lineup stints
 
     Response JSON:
-      games_processed  int   — games for which build_lineups_for_game succeeded
-      games_skipped    int   — games skipped (already processed, or no data returned)
+      games_total      int   — candidate games found in game_schedule
+      games_processed  int   — games whose lineup stints were rebuilt
+      games_skipped    int   — games skipped (already processed, no league_id,
+                               no play-by-play events, or no stints generated)
+      games_failed     int   — games whose prefetch or build raised
       stints_written   int   — total lineup_stints rows written across processed games
       errors           list  — per-game error dicts for both hard exceptions and soft failures
     """
@@ -70,77 +63,95 @@ def backfill_lineups():
     league_id_filter = request.args.get("league_id", "").strip() or None
     force = request.args.get("force", "").lower() == "true"
 
-    from app.utils.lineup_builder import build_lineups_for_game
+    from app.utils.lineup_builder import (
+        compute_stints,
+        games_with_stints,
+        load_events_for_games,
+        load_rosters_for_games,
+        write_stints,
+    )
 
     try:
-        events_query = supabase.table("live_events").select("game_key, league_id")
-        if league_id_filter:
-            events_query = events_query.eq("league_id", league_id_filter)
-        events_res = events_query.execute()
+        schedule = _fetch_schedule_games(league_id_filter)
     except Exception as exc:
-        log.error("Failed to query live_events: %s", exc, exc_info=True)
-        return jsonify({"message": f"Failed to query live_events: {exc}"}), 500
+        log.error("Failed to query game_schedule: %s", exc, exc_info=True)
+        return jsonify({"message": f"Failed to query game_schedule: {exc}"}), 500
+
+    games_processed = 0
+    games_skipped = 0
+    games_failed = 0
+    stints_written = 0
+    error_list: list = []
 
     seen: set = set()
     games: list = []
-    for row in (events_res.data or []):
+    for row in schedule:
         gk = row.get("game_key")
         if not gk or gk in seen:
             continue
         seen.add(gk)
-        lid = row.get("league_id")
-        if not lid:
-            try:
-                sched = (
-                    supabase.table("game_schedule")
-                    .select("league_id")
-                    .eq("game_key", gk)
-                    .limit(1)
-                    .execute()
-                )
-                lid = (sched.data[0].get("league_id") if sched.data else None)
-            except Exception as exc:
-                log.warning("Could not fetch league_id for game=%s: %s", gk, exc)
-        if lid:
-            games.append({"game_key": gk, "league_id": lid})
+        if row.get("league_id"):
+            games.append({"game_key": gk, "league_id": row["league_id"]})
         else:
             log.warning("game=%s: no league_id found, skipping", gk)
+            games_skipped += 1
 
-    log.info("Backfill triggered: %d qualifying games (force=%s)", len(games), force)
+    log.info("Backfill triggered: %d candidate games (force=%s)", len(seen), force)
 
-    games_processed = 0
-    games_skipped = 0
-    stints_written = 0
-    error_list: list = []
+    # Rosters and events are prefetched a batch of games at a time, so the
+    # whole backfill costs a few paginated queries per batch rather than
+    # several per game.
+    for i in range(0, len(games), _BACKFILL_BATCH_SIZE):
+        batch = games[i:i + _BACKFILL_BATCH_SIZE]
+        keys = [g["game_key"] for g in batch]
+        try:
+            done_keys = set() if force else games_with_stints(keys)
+            events_by_game = load_events_for_games([gk for gk in keys if gk not in done_keys])
+            rosters_by_game = load_rosters_for_games(list(events_by_game))
+        except Exception as exc:
+            log.error("Failed to prefetch lineup data for batch at offset %d: %s", i, exc, exc_info=True)
+            error_list.extend({"game_key": gk, "error": f"prefetch failed: {exc}"} for gk in keys)
+            games_failed += len(keys)
+            continue
 
-    for game in games:
-        gk = game["game_key"]
-        lid = game["league_id"]
+        for game in batch:
+            gk = game["game_key"]
+            lid = game["league_id"]
 
-        if not force and _game_already_processed(gk):
-            log.info("game=%s already processed, skipping (pass force=true to reprocess)", gk)
-            games_skipped += 1
-            continue
+            if gk in done_keys:
+                log.info("game=%s already processed, skipping (pass force=true to reprocess)", gk)
+                games_skipped += 1
+                continue
 
-        log.info("Processing game=%s league=%s", gk, lid)
-        try:
-            ok = build_lineups_for_game(game_key=gk, league_id=lid)
-            if ok:
-                games_processed += 1
-                stints_written += _count_stints(gk)
-            else:
+            # Only games with play-by-play events qualify
+            if gk not in events_by_game:
                 games_skipped += 1
-                error_list.append({
-                    "game_key": gk,
-                    "error": "build_lineups_for_game returned False (no stints generated or missing data)",
-                })
-        except Exception as exc:
-            log.error("Failed to build lineups for game=%s: %s", gk, exc, exc_info=True)
-            error_list.append({"game_key": gk, "error": str(exc)})
+                continue
+
+            log.info("Processing game=%s league=%s", gk, lid)
+            try:
+                rosters = rosters_by_game.get(gk)
+                stints = compute_stints(gk, lid, rosters, events_by_game[gk]) if rosters else []
+                if stints:
+                    written, _ = write_stints(gk, lid, stints, rosters)
+                    games_processed += 1
+                    stints_written += len(written)
+                else:
+                    games_skipped += 1
+                    error_list.append({
+                        "game_key": gk,
+                        "error": "no stints generated or missing roster data",
+                    })
+            except Exception as exc:
+                log.error("Failed to build lineups for game=%s: %s", gk, exc, exc_info=True)
+                error_list.append({"game_key": gk, "error": str(exc)})
+                games_failed += 1
 
     return jsonify({
+        "games_total": len(seen),
         "games_processed": games_processed,
         "games_skipped": games_skipped,
+        "games_failed": games_failed,
         "stints_written": stints_written,
         "errors": error_list,
     }), 200
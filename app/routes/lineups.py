@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from app.utils.chat_data import supabase
+from app.utils.helpers import is_missing_table_error, select_all_pages
+import heapq
 import logging
 
 lineups_bp = Blueprint("lineups", __name__)
@@ -20,38 +22,66 @@ def get_top_lineups():
     Aggregate lineup_stints across games, grouped by (lineup_key, team_id).
 
     Returns ranked 5-man units with cumulative totals and efficiency ratings.
+    Served from lineup_aggregates (per-league totals kept up to date by
+    triggers on lineup_stints); falls back to summing the raw stints when
+    that table has not been migrated yet.
+
+    Only the requested page is ranked and returned: the top offset+limit
+    lineups are picked with a heap rather than sorting the whole league.
+    The X-Total-Count header carries the number of lineups that matched.
 
     Query params:
       league_id   (str)  — scope results to a specific season/league
+      team_id     (str)  — only lineups of this team
       min_seconds (int)  — exclude lineups with less total seconds (default 0)
       valid_only  (bool) — if 'true', exclude is_valid_lineup=False stints
+      sort_by     (str)  — net_rating (default), off_rating, minutes or plus_minus
+      limit       (int)  — page size (default: all lineups)
+      offset      (int)  — lineups to skip before the page (default 0)
     """
     try:
-        query = (
-            supabase.table("lineup_stints")
-            .select(
-                "lineup_key,lineup_player_ids,lineup_names,team_id,league_id,"
-                "seconds_played,points_for,points_against,"
-                "possessions_for,possessions_against,is_valid_lineup"
-            )
-        )
-
         league_id = request.args.get("league_id", "").strip()
-        if league_id:
-            query = query.eq("league_id", league_id)
-
-        if _valid_only_flag():
-            query = query.eq("is_valid_lineup", True)
+        team_id = request.args.get("team_id", "").strip()
+        valid_only = _valid_only_flag()
 
-        rows = query.execute().data or []
+        sort_by = request.args.get("sort_by", "net_rating").strip() or "net_rating"
+        if sort_by not in _LINEUP_SORT_KEYS:
+            return jsonify({
+                "message": f"sort_by must be one of: {', '.join(_LINEUP_SORT_KEYS)}"
+            }), 400
 
         try:
             min_seconds = int(request.args.get("min_seconds", 0))
         except (ValueError, TypeError):
             min_seconds = 0
+        try:
+            limit = int(request.args["limit"]) if request.args.get("limit") else None
+            offset = int(request.args.get("offset", 0) or 0)
+        except (ValueError, TypeError):
+            return jsonify({"message": "limit and offset must be integers"}), 400
+        if (limit is not None and limit < 0) or offset < 0:
+            return jsonify({"message": "limit and offset must not be negative"}), 400
 
-        aggregated = _aggregate_lineup_rows(rows, min_seconds, league_id or None)
-        return jsonify(aggregated), 200
+        try:
+            # With both filters each (lineup_key, team_id) is a single
+            # aggregate row, so min_seconds can be applied by the database.
+            unique_rows = bool(league_id) and valid_only
+            rows = _fetch_lineup_rows(
+                "lineup_aggregates", "stint_count", league_id, valid_only,
+                order=("lineup_key", "team_id", "league_id", "is_valid_lineup"),
+                team_id=team_id, min_seconds=min_seconds if unique_rows else 0,
+            )
+        except Exception as exc:
+            if not is_missing_table_error(exc):
+                raise
+            log.warning("lineup_aggregates not available, aggregating lineup_stints: %s", exc)
+            rows = _fetch_lineup_rows(
+                "lineup_stints", "id", league_id, valid_only, order=("id",), team_id=team_id,
+            )
+
+        aggregated = _aggregate_lineup_rows(rows, min_seconds, league_id or None, sort_by=None)
+        page = _rank_lineups(aggregated, sort_by, offset, limit)
+        return jsonify(page), 200, {"X-Total-Count": str(len(aggregated))}
 
     except Exception as exc:
         log.error("GET /api/lineups/top error: %s", exc, exc_info=True)
@@ -197,213 +227,366 @@ def get_on_off_player(player_id: str):
         return jsonify({"message": "player_id is required"}), 400
     try:
         # ------------------------------------------------------------------
-        # 1. Fetch player_on_court_stints for this player
+        # 1. Fetch the player's per-game on-court totals (team box stats
+        #    recorded during the player's ON-court time)
         # ------------------------------------------------------------------
-        poc_rows = (
-            supabase.table("player_on_court_stints")
-            .select(
-                "game_key,player_id,player_name,team_id,shirt_number,"
-                "seconds_played,points_for,points_against,"
-                "possessions_for,possessions_against,stint_id"
-            )
-            .eq("player_id", player_id)
-            .execute()
-            .data or []
-        )
-
-        if _valid_only_flag() and poc_rows:
-            game_keys_set = {r["game_key"] for r in poc_rows}
-            valid_ids: set = set()
-            for gk in game_keys_set:
-                valid_ids |= _fetch_valid_stint_ids(gk)
-            poc_rows = [r for r in poc_rows if r.get("stint_id") in valid_ids]
+        on_rows = _fetch_on_court_rows("player_id", player_id, "", _valid_only_flag())
 
-        if not poc_rows:
+        if not on_rows:
             return jsonify({"player_id": player_id, "on": None, "off": None, "diff": None}), 200
 
-        player_name = poc_rows[0].get("player_name")
-        # Determine team_id — None if player changed teams
-        team_ids_seen = {r["team_id"] for r in poc_rows}
-        team_id = team_ids_seen.pop() if len(team_ids_seen) == 1 else None
-
-        # ------------------------------------------------------------------
-        # 2. Fetch lineup_stints for those stint_ids to get team box stats
-        #    recorded during the player's ON-court time
         # ------------------------------------------------------------------
-        stint_ids = [r["stint_id"] for r in poc_rows if r.get("stint_id")]
-        ls_map: dict = {}
-        if stint_ids:
-            # Supabase .in_() is limited; batch if needed
-            BATCH = 500
-            for i in range(0, len(stint_ids), BATCH):
-                batch = stint_ids[i: i + BATCH]
-                ls_rows = (
-                    supabase.table("lineup_stints")
-                    .select(
-                        "id,oreb,dreb,assists,turnovers,steals,blocks,"
-                        "fg2_made,fg2_attempted,fg3_made,fg3_attempted,"
-                        "ft_made,ft_attempted,"
-                        "possessions_for,possessions_against,points_for,points_against"
-                    )
-                    .in_("id", batch)
-                    .execute()
-                    .data or []
-                )
-                for ls in ls_rows:
-                    ls_map[ls["id"]] = ls
-
-        # ------------------------------------------------------------------
-        # 3. Fetch team_stats for every game the player appeared in
+        # 2. Fetch team_stats for every game the player appeared in
         #    (both player's team and opponent team rows)
         # ------------------------------------------------------------------
-        game_keys = list({r["game_key"] for r in poc_rows})
-        ts_rows: list = []
-        BATCH = 200
-        for i in range(0, len(game_keys), BATCH):
-            batch = game_keys[i: i + BATCH]
-            ts_rows += (
-                supabase.table("team_stats")
-                .select(
-                    "game_key,team_id,"
-                    "tot_spoints,opp_points,possessions,opp_possessions,"
-                    "tot_sreboundsoffensive,tot_sreboundstotal,"
-                    "tot_sassists,tot_sfieldgoalsmade,"
-                    "tot_sfieldgoalsattempted,tot_sthreepointersattempted,"
-                    "tot_sfreethrowsattempted,tot_sfreethrowsmade,"
-                    "tot_sturnovers,tot_ssteals,tot_sblocks"
-                )
-                .in_("game_key", batch)
-                .execute()
-                .data or []
-            )
+        ts_lookup, ts_by_game = _fetch_on_off_team_stats({r["game_key"] for r in on_rows})
 
-        # Build lookup: (game_key, team_id) -> team_stats row
-        ts_lookup: dict = {}
-        for ts in ts_rows:
-            ts_lookup[(ts["game_key"], ts["team_id"])] = ts
+        return jsonify(_player_on_off(on_rows, ts_lookup, ts_by_game, player_id=player_id)), 200
 
-        # Build per-game: game_key -> player's team_id in that game
-        game_team_map: dict = {}
-        for r in poc_rows:
-            game_team_map.setdefault(r["game_key"], r["team_id"])
+    except Exception as exc:
+        log.error("GET /api/on-off/player/%s error: %s", player_id, exc, exc_info=True)
+        return jsonify({"message": str(exc)}), 500
 
-        # ------------------------------------------------------------------
-        # 4. Aggregate ON-court team stats from lineup_stints per game,
-        #    and accumulate team totals + opponent totals across all games
-        # ------------------------------------------------------------------
-        on_raw = _empty_raw_counts()
-        team_raw = _empty_raw_counts()
-        opp_raw = _empty_raw_counts()
-
-        # Also track ON possessions against for opponent scaling per-game
-        # (we accumulate from poc_rows which have per-stint possessions_against)
-        # Group poc_rows by game so we can compute per-game totals
-        poc_by_game: dict = {}
-        for r in poc_rows:
-            poc_by_game.setdefault(r["game_key"], []).append(r)
-
-        for gk, game_poc in poc_by_game.items():
-            player_tid = game_team_map[gk]
-
-            # --- ON-court: sum lineup_stints data for the player's stints ---
-            on_game = _empty_raw_counts()
-            for poc in game_poc:
-                sid = poc.get("stint_id")
-                ls = ls_map.get(sid) if sid else None
-                if ls:
-                    on_game["oreb"]         += ls.get("oreb") or 0
-                    on_game["dreb"]         += ls.get("dreb") or 0
-                    on_game["ast"]          += ls.get("assists") or 0
-                    on_game["tov"]          += ls.get("turnovers") or 0
-                    on_game["stl"]          += ls.get("steals") or 0
-                    on_game["blk"]          += ls.get("blocks") or 0
-                    on_game["fgm"]          += (ls.get("fg2_made") or 0) + (ls.get("fg3_made") or 0)
-                    on_game["fga"]          += (ls.get("fg2_attempted") or 0) + (ls.get("fg3_attempted") or 0)
-                    on_game["fga2"]         += ls.get("fg2_attempted") or 0
-                    on_game["fta"]          += ls.get("ft_attempted") or 0
-                    on_game["ftm"]          += ls.get("ft_made") or 0
-                # Always accumulate points/possessions from poc (more reliable)
-                on_game["pts"]              += poc.get("points_for") or 0
-                on_game["pts_against"]      += poc.get("points_against") or 0
-                on_game["poss_for"]         += poc.get("possessions_for") or 0
-                on_game["poss_against"]     += poc.get("possessions_against") or 0
-                on_game["seconds"]          += poc.get("seconds_played") or 0
-
-            _add_raw(on_raw, on_game)
-
-            # --- Team game totals from team_stats ---
-            ts = ts_lookup.get((gk, player_tid)) or {}
-            team_game = _team_stats_to_raw(ts)
-            _add_raw(team_raw, team_game)
-
-            # --- Opponent game totals (other team in same game) ---
-            opp_ts = None
-            for (gk2, tid2), row in ts_lookup.items():
-                if gk2 == gk and tid2 != player_tid:
-                    opp_ts = row
-                    break
-            opp_game = _team_stats_to_raw(opp_ts or {})
-
-            # Scale opponent full-game totals to ON-court time using
-            # possession fraction: opp_poss_on / opp_poss_total
-            opp_poss_total = opp_game["poss_for"] or opp_game["poss_against"] or 0
-            opp_poss_on = on_game["poss_against"]  # opp possessions while player is on
-            if opp_poss_total > 0 and opp_poss_on > 0:
-                scale = opp_poss_on / opp_poss_total
-                on_game["opp_oreb"]     = (opp_game["oreb"] or 0) * scale
-                on_game["opp_dreb"]     = (opp_game["dreb"] or 0) * scale
-                on_game["opp_fga2"]     = (opp_game["fga2"] or 0) * scale
-                on_game["opp_poss"]     = opp_poss_on
-            else:
-                on_game["opp_oreb"]     = 0.0
-                on_game["opp_dreb"]     = 0.0
-                on_game["opp_fga2"]     = 0.0
-                on_game["opp_poss"]     = 0.0
-
-            # Re-add on_game opp fields to on_raw (already added above without opp)
-            on_raw["opp_oreb"]  += on_game["opp_oreb"]
-            on_raw["opp_dreb"]  += on_game["opp_dreb"]
-            on_raw["opp_fga2"]  += on_game["opp_fga2"]
-            on_raw["opp_poss"]  += on_game["opp_poss"]
-
-            _add_raw(opp_raw, opp_game)
 
-        # ------------------------------------------------------------------
-        # 5. Compute OFF-court raw counts: team_total - ON
-        # ------------------------------------------------------------------
-        off_raw = _subtract_raw(team_raw, on_raw)
+# ---------------------------------------------------------------------------
+# GET /api/on-off/team/<team_id>
+# ---------------------------------------------------------------------------
 
-        # OFF opponent: opp_total - ON_opp (scaled portion already in on_raw)
-        off_raw["opp_oreb"]     = max(0.0, opp_raw["oreb"] - on_raw["opp_oreb"])
-        off_raw["opp_dreb"]     = max(0.0, opp_raw["dreb"] - on_raw["opp_dreb"])
-        off_raw["opp_fga2"]     = max(0.0, opp_raw["fga2"] - on_raw["opp_fga2"])
-        off_raw["opp_poss"]     = max(0.0, opp_raw["poss_for"] - on_raw["opp_poss"])
+@lineups_bp.route("/api/on-off/team/<team_id>", methods=["GET"])
+def get_on_off_team(team_id: str):
+    """
+    Cross-game on/off stats for every player of a team, in one request.
 
-        # ------------------------------------------------------------------
-        # 6. Compute advanced metrics for ON and OFF blocks
-        # ------------------------------------------------------------------
-        on_block  = _compute_advanced_block(on_raw)
-        off_block = _compute_advanced_block(off_raw)
-        diff_block = _compute_diff_block(on_block, off_block)
-
-        return jsonify({
-            "player_id":   player_id,
-            "player_name": player_name,
-            "team_id":     team_id,
-            "on":          on_block,
-            "off":         off_block,
-            "diff":        diff_block,
-        }), 200
+    Same on/off/diff blocks as /api/on-off/player/<player_id> (and the same
+    caveats), but the per-game on-court totals and team_stats are each
+    loaded once for the whole roster instead of once per player.  Only
+    stints played for this team count, so a traded player's blocks cover
+    only the time spent with this team.
+
+    Response: list of { player_id, player_name, team_id, on, off, diff },
+    sorted by on.seconds_played desc.
+
+    Query params:
+      league_id   (str)  — scope to a specific season/league
+      valid_only  (bool) — if 'true', exclude invalid-lineup stints
+    """
+    if not team_id or not team_id.strip():
+        return jsonify({"message": "team_id is required"}), 400
+    try:
+        league_id = request.args.get("league_id", "").strip()
+
+        on_rows = _fetch_on_court_rows("team_id", team_id, league_id, _valid_only_flag())
+        # Unresolved players (no player_id) have no on/off of their own
+        on_rows = [r for r in on_rows if r.get("player_id")]
+        if not on_rows:
+            return jsonify([]), 200
+
+        ts_lookup, ts_by_game = _fetch_on_off_team_stats({r["game_key"] for r in on_rows})
+
+        by_player: dict = {}
+        for r in on_rows:
+            by_player.setdefault(r["player_id"], []).append(r)
+
+        result = [
+            _player_on_off(rows, ts_lookup, ts_by_game, player_id=pid)
+            for pid, rows in by_player.items()
+        ]
+        result.sort(key=lambda p: p["on"]["seconds_played"] or 0, reverse=True)
+        return jsonify(result), 200
 
     except Exception as exc:
-        log.error("GET /api/on-off/player/%s error: %s", player_id, exc, exc_info=True)
+        log.error("GET /api/on-off/team/%s error: %s", team_id, exc, exc_info=True)
         return jsonify({"message": str(exc)}), 500
 
 
+# ---------------------------------------------------------------------------
+# On/off helpers shared by the player and team endpoints
+# ---------------------------------------------------------------------------
+
+# Box-score columns of a stint, summed per game into the on-court totals
+_ON_OFF_BOX_COLUMNS = (
+    "oreb", "dreb", "assists", "turnovers", "steals", "blocks",
+    "fg2_made", "fg2_attempted", "fg3_made", "fg3_attempted",
+    "ft_made", "ft_attempted",
+)
+_ON_OFF_AGG_COLUMNS = (
+    "game_key,player_id,player_name,team_id,"
+    "seconds_played,points_for,points_against,"
+    "possessions_for,possessions_against," + ",".join(_ON_OFF_BOX_COLUMNS)
+)
+# Unique per player_on_off_aggregates row, so pages never overlap
+_ON_OFF_AGG_ORDER = ("game_key", "team_id", "player_id", "is_valid_lineup", "league_id")
+_ON_OFF_POC_COLUMNS = (
+    "id,game_key,player_id,player_name,team_id,shirt_number,"
+    "seconds_played,points_for,points_against,"
+    "possessions_for,possessions_against,stint_id"
+)
+_ON_OFF_STINT_COLUMNS = "id,is_valid_lineup," + ",".join(_ON_OFF_BOX_COLUMNS)
+_ON_OFF_TEAM_STATS_COLUMNS = (
+    "game_key,team_id,"
+    "tot_spoints,opp_points,possessions,opp_possessions,"
+    "tot_sreboundsoffensive,tot_sreboundstotal,"
+    "tot_sassists,tot_sfieldgoalsmade,"
+    "tot_sfieldgoalsattempted,tot_sthreepointersattempted,"
+    "tot_sfreethrowsattempted,tot_sfreethrowsmade,"
+    "tot_sturnovers,tot_ssteals,tot_sblocks"
+)
+
+
+def _fetch_on_court_rows(column: str, value: str, league_id: str, valid_only: bool) -> list:
+    """
+    On-court totals where *column* (player_id or team_id) is *value*: one
+    row per player and game (per lineup validity too, so a game can have
+    two), with the _ON_OFF_AGG_COLUMNS fields.
+
+    Served from player_on_off_aggregates, kept up to date by triggers on
+    player_on_court_stints; falls back to one row per on-court stint, with
+    its lineup_stints box score, when that table has not been migrated yet.
+    """
+    def query():
+        q = supabase.table("player_on_off_aggregates").select(_ON_OFF_AGG_COLUMNS).eq(column, value)
+        if league_id:
+            q = q.eq("league_id", league_id)
+        if valid_only:
+            q = q.eq("is_valid_lineup", True)
+        for col in _ON_OFF_AGG_ORDER:
+            q = q.order(col)
+        return q
+
+    try:
+        return select_all_pages(query)
+    except Exception as exc:
+        if not is_missing_table_error(exc):
+            raise
+        log.warning("player_on_off_aggregates not available, reading player_on_court_stints: %s", exc)
+
+    def stint_query():
+        q = supabase.table("player_on_court_stints").select(_ON_OFF_POC_COLUMNS).eq(column, value)
+        if league_id:
+            q = q.eq("league_id", league_id)
+        return q.order("id")
+
+    poc_rows = select_all_pages(stint_query)
+    ls_map = _fetch_on_off_lineup_stints(
+        [r["stint_id"] for r in poc_rows if r.get("stint_id")]
+    )
+    rows = []
+    for r in poc_rows:
+        ls = ls_map.get(r.get("stint_id")) or {}
+        if valid_only and not ls.get("is_valid_lineup"):
+            continue
+        row = dict(r)
+        for col in _ON_OFF_BOX_COLUMNS:
+            row[col] = ls.get(col) or 0
+        rows.append(row)
+    return rows
+
+
+def _fetch_on_off_lineup_stints(stint_ids: list) -> dict:
+    """lineup_stints rows by id, fetched in .in_() batches."""
+    ls_map: dict = {}
+    BATCH = 500  # Supabase .in_() is limited
+    for i in range(0, len(stint_ids), BATCH):
+        rows = (
+            supabase.table("lineup_stints")
+            .select(_ON_OFF_STINT_COLUMNS)
+            .in_("id", stint_ids[i: i + BATCH])
+            .execute()
+            .data or []
+        )
+        for ls in rows:
+            ls_map[ls["id"]] = ls
+    return ls_map
+
+
+def _fetch_on_off_team_stats(game_keys) -> tuple:
+    """
+    team_stats rows for *game_keys*, as
+    ((game_key, team_id) -> row, game_key -> [rows]).
+    The per-game lists let callers find the opponent row directly.
+    """
+    game_keys = list(game_keys)
+    ts_lookup: dict = {}
+    ts_by_game: dict = {}
+    BATCH = 200
+    for i in range(0, len(game_keys), BATCH):
+        rows = (
+            supabase.table("team_stats")
+            .select(_ON_OFF_TEAM_STATS_COLUMNS)
+            .in_("game_key", game_keys[i: i + BATCH])
+            .execute()
+            .data or []
+        )
+        for ts in rows:
+            ts_lookup[(ts["game_key"], ts["team_id"])] = ts
+            ts_by_game.setdefault(ts["game_key"], []).append(ts)
+    return ts_lookup, ts_by_game
+
+
+def _opponent_team_stats(ts_by_game: dict, game_key: str, team_id: str) -> dict | None:
+    for row in ts_by_game.get(game_key, ()):
+        if row["team_id"] != team_id:
+            return row
+    return None
+
+
+def _player_on_off(on_rows: list, ts_lookup: dict, ts_by_game: dict, player_id: str | None = None) -> dict:
+    """Response body of /api/on-off/player for one player's on-court rows."""
+    # team_id is None if the player changed teams
+    team_ids_seen = {r["team_id"] for r in on_rows}
+    on_block, off_block, diff_block = _on_off_blocks(on_rows, ts_lookup, ts_by_game)
+    return {
+        "player_id":   player_id or on_rows[0].get("player_id"),
+        "player_name": on_rows[0].get("player_name"),
+        "team_id":     team_ids_seen.pop() if len(team_ids_seen) == 1 else None,
+        "on":          on_block,
+        "off":         off_block,
+        "diff":        diff_block,
+    }
+
+
+def _on_off_blocks(on_rows: list, ts_lookup: dict, ts_by_game: dict) -> tuple:
+    """
+    (on, off, diff) advanced blocks for one player's on-court rows (see
+    _fetch_on_court_rows) and the games' team_stats rows.
+    """
+    # Build per-game: game_key -> player's team_id in that game
+    game_team_map: dict = {}
+    for r in on_rows:
+        game_team_map.setdefault(r["game_key"], r["team_id"])
+
+    # ------------------------------------------------------------------
+    # 4. Aggregate ON-court team stats per game,
+    #    and accumulate team totals + opponent totals across all games
+    # ------------------------------------------------------------------
+    on_raw = _empty_raw_counts()
+    team_raw = _empty_raw_counts()
+    opp_raw = _empty_raw_counts()
+
+    # Group the rows by game so opponent stats can be scaled per game
+    # by the possessions against while the player was on
+    rows_by_game: dict = {}
+    for r in on_rows:
+        rows_by_game.setdefault(r["game_key"], []).append(r)
+
+    for gk, game_rows in rows_by_game.items():
+        player_tid = game_team_map[gk]
+
+        # --- ON-court: sum the team's box stats while the player was on ---
+        on_game = _empty_raw_counts()
+        for r in game_rows:
+            on_game["oreb"]         += r.get("oreb") or 0
+            on_game["dreb"]         += r.get("dreb") or 0
+            on_game["ast"]          += r.get("assists") or 0
+            on_game["tov"]          += r.get("turnovers") or 0
+            on_game["stl"]          += r.get("steals") or 0
+            on_game["blk"]          += r.get("blocks") or 0
+            on_game["fgm"]          += (r.get("fg2_made") or 0) + (r.get("fg3_made") or 0)
+            on_game["fga"]          += (r.get("fg2_attempted") or 0) + (r.get("fg3_attempted") or 0)
+            on_game["fga2"]         += r.get("fg2_attempted") or 0
+            on_game["fta"]          += r.get("ft_attempted") or 0
+            on_game["ftm"]          += r.get("ft_made") or 0
+            on_game["pts"]          += r.get("points_for") or 0
+            on_game["pts_against"]  += r.get("points_against") or 0
+            on_game["poss_for"]     += r.get("possessions_for") or 0
+            on_game["poss_against"] += r.get("possessions_against") or 0
+            on_game["seconds"]      += r.get("seconds_played") or 0
+
+        _add_raw(on_raw, on_game)
+
+        # --- Team game totals from team_stats ---
+        ts = ts_lookup.get((gk, player_tid)) or {}
+        team_game = _team_stats_to_raw(ts)
+        _add_raw(team_raw, team_game)
+
+        # --- Opponent game totals (other team in same game) ---
+        opp_ts = _opponent_team_stats(ts_by_game, gk, player_tid)
+        opp_game = _team_stats_to_raw(opp_ts or {})
+
+        # Scale opponent full-game totals to ON-court time using
+        # possession fraction: opp_poss_on / opp_poss_total
+        opp_poss_total = opp_game["poss_for"] or opp_game["poss_against"] or 0
+        opp_poss_on = on_game["poss_against"]  # opp possessions while player is on
+        if opp_poss_total > 0 and opp_poss_on > 0:
+            scale = opp_poss_on / opp_poss_total
+            on_game["opp_oreb"]     = (opp_game["oreb"] or 0) * scale
+            on_game["opp_dreb"]     = (opp_game["dreb"] or 0) * scale
+            on_game["opp_fga2"]     = (opp_game["fga2"] or 0) * scale
+            on_game["opp_poss"]     = opp_poss_on
+        else:
+            on_game["opp_oreb"]     = 0.0
+            on_game["opp_dreb"]     = 0.0
+            on_game["opp_fga2"]     = 0.0
+            on_game["opp_poss"]     = 0.0
+
+        # Re-add on_game opp fields to on_raw (already added above without opp)
+        on_raw["opp_oreb"]  += on_game["opp_oreb"]
+        on_raw["opp_dreb"]  += on_game["opp_dreb"]
+        on_raw["opp_fga2"]  += on_game["opp_fga2"]
+        on_raw["opp_poss"]  += on_game["opp_poss"]
+
+        _add_raw(opp_raw, opp_game)
+
+    # ------------------------------------------------------------------
+    # 5. Compute OFF-court raw counts: team_total - ON
+    # ------------------------------------------------------------------
+    off_raw = _subtract_raw(team_raw, on_raw)
+
+    # OFF opponent: opp_total - ON_opp (scaled portion already in on_raw)
+    off_raw["opp_oreb"]     = max(0.0, opp_raw["oreb"] - on_raw["opp_oreb"])
+    off_raw["opp_dreb"]     = max(0.0, opp_raw["dreb"] - on_raw["opp_dreb"])
+    off_raw["opp_fga2"]     = max(0.0, opp_raw["fga2"] - on_raw["opp_fga2"])
+    off_raw["opp_poss"]     = max(0.0, opp_raw["poss_for"] - on_raw["opp_poss"])
+
+    # ------------------------------------------------------------------
+    # 6. Compute advanced metrics for ON and OFF blocks
+    # ------------------------------------------------------------------
+    on_block  = _compute_advanced_block(on_raw)
+    off_block = _compute_advanced_block(off_raw)
+    return on_block, off_block, _compute_diff_block(on_block, off_block)
+
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _fetch_lineup_rows(
+    table: str,
+    extra_column: str,
+    league_id: str,
+    valid_only: bool,
+    order: tuple,
+    team_id: str = "",
+    min_seconds: int = 0,
+) -> list:
+    """
+    All rows _aggregate_lineup_rows needs from lineup_aggregates or
+    lineup_stints, paginated in *order* (which must be unique per row).
+    *extra_column* is stint_count or id.  min_seconds is only safe to push
+    down when every (lineup_key, team_id) maps to a single row.
+    """
+    def query():
+        q = supabase.table(table).select(
+            "lineup_key,lineup_player_ids,lineup_names,team_id,league_id,"
+            "seconds_played,points_for,points_against,"
+            f"possessions_for,possessions_against,is_valid_lineup,{extra_column}"
+        )
+        if league_id:
+            q = q.eq("league_id", league_id)
+        if team_id:
+            q = q.eq("team_id", team_id)
+        if valid_only:
+            q = q.eq("is_valid_lineup", True)
+        if min_seconds > 0:
+            q = q.gte("seconds_played", min_seconds)
+        for col in order:
+            q = q.order(col)
+        return q
+
+    return select_all_pages(query)
+
+
 def _fetch_valid_stint_ids(game_key: str) -> set:
     """Return the set of lineup_stints IDs that have is_valid_lineup=True."""
     try:
@@ -452,13 +635,16 @@ def _aggregate_lineup_rows(
     rows: list,
     min_seconds: int = 0,
     league_id: str | None = None,
+    sort_by: str | None = "net_rating",
 ) -> list:
     """
     Group lineup_stints rows by (lineup_key, team_id) and sum numeric stats.
+    Also accepts lineup_aggregates rows, which carry a stint_count each.
 
     Computes efficiency ratings (per-100-possessions) where possession data
-    is available.  Returns results sorted by net_rating desc, then
-    seconds_played desc.
+    is available.  Returns results sorted by *sort_by* (see
+    _LINEUP_SORT_KEYS; net_rating desc, then seconds_played desc by
+    default), or unsorted when sort_by is None.
 
     Args:
         rows:        Raw lineup_stints rows from Supabase.
@@ -487,7 +673,7 @@ def _aggregate_lineup_rows(
                 "possessions_against": 0,
             }
         b = buckets[key]
-        b["stint_count"] += 1
+        b["stint_count"] += r.get("stint_count") or 1
         b["seconds_played"] += r.get("seconds_played") or 0
         b["points_for"] += r.get("points_for") or 0
         b["points_against"] += r.get("points_against") or 0
@@ -512,16 +698,36 @@ def _aggregate_lineup_rows(
 
         result.append(b)
 
-    result.sort(
-        key=lambda x: (
-            x["net_rating"] if x["net_rating"] is not None else float("-inf"),
-            x["seconds_played"],
-        ),
-        reverse=True,
-    )
+    if sort_by:
+        result.sort(key=_LINEUP_SORT_KEYS[sort_by], reverse=True)
     return result
 
 
+def _rating_or_floor(value) -> float:
+    return value if value is not None else float("-inf")
+
+
+# Ranking keys for /api/lineups/top, all descending.
+_LINEUP_SORT_KEYS = {
+    "net_rating": lambda x: (_rating_or_floor(x["net_rating"]), x["seconds_played"]),
+    "off_rating": lambda x: (_rating_or_floor(x["off_rating"]), x["seconds_played"]),
+    "minutes": lambda x: (x["seconds_played"], _rating_or_floor(x["net_rating"])),
+    "plus_minus": lambda x: (x["net_points"], x["seconds_played"]),
+}
+
+
+def _rank_lineups(lineups: list, sort_by: str, offset: int = 0, limit: int | None = None) -> list:
+    """
+    One page of *lineups* ranked by *sort_by*.  With a limit only the top
+    offset+limit entries are kept (heapq.nlargest, O(n log k)); ties keep
+    input order just as a full sort would.
+    """
+    key = _LINEUP_SORT_KEYS[sort_by]
+    if limit is None:
+        return sorted(lineups, key=key, reverse=True)[offset:]
+    return heapq.nlargest(offset + limit, lineups, key=key)[offset:]
+
+
 def _aggregate_player_rows(rows: list) -> list:
     """
     Group rows by (player_id, team_id) and sum numeric stats.
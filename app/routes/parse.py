@@ -2,7 +2,6 @@ from flask import Blueprint, request, jsonify
 from app.utils.chat_data import supabase
 from app.utils.json_parser import run_from_excel
 from app.utils.pdf_parser import parse_pdf
-from app.utils.advanced_team_stats import compute_team_advanced, fetch_team_stats_for_league
 import traceback
 import logging
 import io
@@ -108,20 +107,10 @@ def handle_parse():
             league_id = run_from_excel(file_path, user_id)
             log.info("Excel parse complete: %s", file_path)
             
-            if league_id:
-                log.info("Computing advanced team stats for league_id=%s", league_id)
-                try:
-                    team_rows = fetch_team_stats_for_league(league_id)
-                    if team_rows:
-                        log.info("Found %d team stat records for league %s", len(team_rows), league_id)
-                        processed = compute_team_advanced(team_rows)
-                        log.info("Computed advanced stats for %d teams", processed)
-                    else:
-                        log.warning("No team stats found for league_id %s", league_id)
-                except Exception as adv_err:
-                    log.error("Advanced stats calculation error: %s", adv_err, exc_info=True)
-            else:
-                log.warning("No league_id returned from Excel parser — advanced stats skipped")
+            # run_from_excel already ran compute_advanced_stats (team and
+            # player) for the games it stored, so nothing is recomputed here
+            if not league_id:
+                log.warning("No league_id returned from Excel parser")
             
             return jsonify({
                 "status": "success",
@@ -1,5 +1,21 @@
 import math
-from app.utils.supabase_queries import supabase
+import time
+from app.utils import advanced_stats_engine
+from app.utils.helpers import iter_pages, select_existing_columns
+from app.utils.stats_writer import bulk_update_by_id
+from app.utils.advanced_team_stats import ADVANCED_STATS_PAGE_SIZE, GAME_KEY_BATCH
+
+# Columns compute_player_advanced reads; names the table lacks are left out
+# of the select (and read as 0, as with select("*"))
+PLAYER_STATS_COLUMNS = ("id", "game_key", "team_id", "name", "sminutes") + advanced_stats_engine.PLAYER_COLUMNS
+
+
+def _db():
+    """The shared Supabase client, imported on first use so the metric
+    functions can be used (tests, benchmarks) without one."""
+    from app.utils.supabase_queries import supabase
+    return supabase
+
 
 def safe_div(n, d):
     return n / d if d not in (0, None) else 0
@@ -287,13 +303,35 @@ def calc_player_scoring_distribution(player):
     }
 
 
-def fetch_player_stats_for_league(league_id):
+def iter_player_stats_pages(league_id, game_keys=None, page_size=None):
+    """
+    Yield the league's player_stats rows (only those of *game_keys* when
+    given) a page at a time, selecting just PLAYER_STATS_COLUMNS
+    """
+    db = _db()
+    columns = select_existing_columns(db, "player_stats", PLAYER_STATS_COLUMNS)
+    if game_keys is None:
+        batches = [None]
+    else:
+        game_keys = list(game_keys)
+        batches = [game_keys[i:i + GAME_KEY_BATCH] for i in range(0, len(game_keys), GAME_KEY_BATCH)]
+
+    for batch in batches:
+        def query(batch=batch):
+            q = db.table("player_stats").select(columns).eq("league_id", league_id)
+            if batch is not None:
+                q = q.in_("game_key", batch)
+            return q.order("id")
+        yield from iter_pages(query, page_size or ADVANCED_STATS_PAGE_SIZE)
+
+
+def fetch_player_stats_for_league(league_id, game_keys=None):
     """
-    Fetch all player_stats rows for a given league
+    Fetch all player_stats rows for a given league, or only those of
+    *game_keys* when given
     """
     try:
-        result = supabase.table("player_stats").select("*").eq("league_id", league_id).execute()
-        return result.data if result.data else []
+        return [row for page in iter_player_stats_pages(league_id, game_keys) for row in page]
     except Exception as e:
         print(f"Error fetching player stats for league {league_id}: {e}")
         return []
@@ -305,7 +343,7 @@ def write_player_advanced_to_supabase(player_id, data):
     Returns True on success, False on failure
     """
     try:
-        result = supabase.table("player_stats").update(data).eq("id", player_id).execute()
+        result = _db().table("player_stats").update(data).eq("id", player_id).execute()
         if result and result.data:
             return True
         else:
@@ -318,6 +356,55 @@ def write_player_advanced_to_supabase(player_id, data):
         return False
 
 
+def player_advanced_fields(player, team_stats, opp_stats):
+    """
+    Calculate all advanced stats for a player given their team's and the
+    opponent's team_stats rows
+    """
+    team_poss = team_stats.get("possessions", 0) or 0
+
+    efg = calc_player_efg(player)
+    ts = calc_player_ts(player)
+    three_pt_rate = calc_player_three_point_rate(player)
+    usage = calc_player_usage(player, team_poss, team_stats)
+    player_poss = calc_player_possessions(player)
+    ast_pct = calc_player_ast_percent(player, team_stats)
+    reb_pcts = calc_player_rebound_percentages(player, team_stats, opp_stats)
+    tov_pct = calc_player_tov_percent(player)
+    pie = calc_player_pie(player, team_stats, opp_stats)
+    ratings = calc_player_ratings_estimated(player, team_stats, opp_stats)
+    scoring = calc_player_scoring_distribution(player)
+
+    # Combine all fields
+    updated_fields = {
+        "player_possessions": player_poss,
+        "efg_percent": efg,
+        "ts_percent": ts,
+        "three_point_rate": three_pt_rate,
+        "usage_percent": usage,
+        "ast_percent": ast_pct,
+        "ast_to_ratio": calc_player_ast_to_ratio(player),
+        "oreb_percent": reb_pcts["oreb_percent"],
+        "dreb_percent": reb_pcts["dreb_percent"],
+        "reb_percent": reb_pcts["reb_percent"],
+        "tov_percent": tov_pct,
+        "pie": pie,
+        "off_rating": ratings["off_rating"],
+        "def_rating": ratings["def_rating"],
+        "net_rating": ratings["net_rating"],
+        "pts_percent_2pt": scoring["pts_percent_2pt"],
+        "pts_percent_3pt": scoring["pts_percent_3pt"],
+        "pts_percent_ft": scoring["pts_percent_ft"],
+        "pts_percent_midrange": scoring["pts_percent_midrange"],
+        "pts_percent_pitp": scoring["pts_percent_pitp"],
+        "pts_percent_fastbreak": scoring["pts_percent_fastbreak"],
+        "pts_percent_second_chance": scoring["pts_percent_second_chance"],
+        "pts_percent_off_turnovers": scoring["pts_percent_off_turnovers"]
+    }
+    
+    return updated_fields
+
+
 def compute_player_advanced(player_rows, team_map):
     """
     Main function to compute all advanced player metrics
@@ -325,16 +412,17 @@ def compute_player_advanced(player_rows, team_map):
     For each player:
     1. Find their team totals via team_map[player["team_id"]]
     2. Find opponent totals via same game_key
-    3. Calculate all advanced metrics
-    4. Write back to Supabase
+    3. Calculate all advanced metrics (advanced_stats_engine, or
+       player_advanced_fields per row when ADVANCED_STATS_ENGINE=scalar)
+    4. Write back to Supabase in chunks (see stats_writer.bulk_update_by_id)
     
     Args:
         player_rows: List of player_stats rows from Supabase
         team_map: Dict mapping game_key -> {team_id -> team_stats_row}
     """
-    processed = 0
     skipped = 0
-    write_failures = 0
+    entries = []
+    started = time.perf_counter()
     
     for player in player_rows:
         game_key = player.get("game_key")
@@ -372,54 +460,23 @@ def compute_player_advanced(player_rows, team_map):
             print(f"   ⚠️  Skipping player {player.get('name', 'unknown')}: no opponent found")
             continue
         
-        # Calculate all advanced metrics
-        team_poss = team_stats.get("possessions", 0) or 0
-        
-        efg = calc_player_efg(player)
-        ts = calc_player_ts(player)
-        three_pt_rate = calc_player_three_point_rate(player)
-        usage = calc_player_usage(player, team_poss, team_stats)
-        player_poss = calc_player_possessions(player)
-        ast_pct = calc_player_ast_percent(player, team_stats)
-        reb_pcts = calc_player_rebound_percentages(player, team_stats, opp_stats)
-        tov_pct = calc_player_tov_percent(player)
-        pie = calc_player_pie(player, team_stats, opp_stats)
-        ratings = calc_player_ratings_estimated(player, team_stats, opp_stats)
-        scoring = calc_player_scoring_distribution(player)
-        
-        # Combine all fields
-        updated_fields = {
-            "player_possessions": player_poss,
-            "efg_percent": efg,
-            "ts_percent": ts,
-            "three_point_rate": three_pt_rate,
-            "usage_percent": usage,
-            "ast_percent": ast_pct,
-            "ast_to_ratio": calc_player_ast_to_ratio(player),
-            "oreb_percent": reb_pcts["oreb_percent"],
-            "dreb_percent": reb_pcts["dreb_percent"],
-            "reb_percent": reb_pcts["reb_percent"],
-            "tov_percent": tov_pct,
-            "pie": pie,
-            "off_rating": ratings["off_rating"],
-            "def_rating": ratings["def_rating"],
-            "net_rating": ratings["net_rating"],
-            "pts_percent_2pt": scoring["pts_percent_2pt"],
-            "pts_percent_3pt": scoring["pts_percent_3pt"],
-            "pts_percent_ft": scoring["pts_percent_ft"],
-            "pts_percent_midrange": scoring["pts_percent_midrange"],
-            "pts_percent_pitp": scoring["pts_percent_pitp"],
-            "pts_percent_fastbreak": scoring["pts_percent_fastbreak"],
-            "pts_percent_second_chance": scoring["pts_percent_second_chance"],
-            "pts_percent_off_turnovers": scoring["pts_percent_off_turnovers"]
-        }
-        
-        # Write to Supabase
-        success = write_player_advanced_to_supabase(player_id, updated_fields)
-        if success:
-            processed += 1
-        else:
-            write_failures += 1
+        entries.append((player, team_stats, opp_stats))
+    
+    if advanced_stats_engine.enabled():
+        pending = advanced_stats_engine.player_advanced_rows(entries)
+    else:
+        pending = [
+            {"id": player["id"], **player_advanced_fields(player, team_stats, opp_stats)}
+            for player, team_stats, opp_stats in entries
+        ]
+    
+    # Write to Supabase in chunks rather than one update per player
+    computed = time.perf_counter()
+    processed, write_failures = bulk_update_by_id(_db(), "player_stats", pending)
+    finished = time.perf_counter()
     
     print(f"   ✅ Processed {processed} players, skipped {skipped}, write failures {write_failures}")
+    print(f"      computed {len(pending)} rows ({advanced_stats_engine.ADVANCED_STATS_ENGINE}) in {computed - started:.2f}s, "
+          f"written in {finished - computed:.2f}s "
+          f"({len(pending) / max(finished - started, 1e-9):,.0f} rows/sec)")
     return processed
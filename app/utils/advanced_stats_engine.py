@@ -0,0 +1,351 @@
+"""
+advanced_stats_engine.py
+------------------------
+Columnar (pandas/NumPy) evaluation of the advanced team and player metrics.
+
+advanced_team_stats.py and advanced_player_stats.py compute one dict per
+row through a few dozen .get(...) or 0 lookups.  Here every stat column a
+run needs is loaded once into an array, each row's team/opponent context is
+gathered with one integer take, and all 37 team and 23 player fields are
+evaluated as array expressions.
+
+The expressions mirror the scalar functions term by term (same operand
+order, same zero-denominator rules), so the values are identical to theirs.
+The scalar functions remain the reference implementation;
+tests/test_advanced_stats_engine.py compares the two.
+
+Environment variables:
+    ADVANCED_STATS_ENGINE   "vectorized" (default) or "scalar"
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+ADVANCED_STATS_ENGINE = os.environ.get("ADVANCED_STATS_ENGINE", "vectorized").strip().lower()
+
+TEAM_COLUMNS = (
+    "tot_spoints", "tot_sfieldgoalsmade", "tot_sfieldgoalsattempted",
+    "tot_stwopointersmade", "tot_sthreepointersmade", "tot_sthreepointersattempted",
+    "tot_sfreethrowsmade", "tot_sfreethrowsattempted",
+    "tot_sreboundsoffensive", "tot_sreboundstotal",
+    "tot_sassists", "tot_ssteals", "tot_sblocks", "tot_sturnovers", "tot_sfoulspersonal",
+    "tot_spointspaint", "tot_spointsinthepaint", "tot_spointsfastbreak",
+    "tot_spointssecondchance", "tot_spointsoffturnover", "tot_spointsfromturnovers",
+)
+
+# Team-context columns the player metrics read from team_map rows
+CONTEXT_COLUMNS = (
+    "possessions", "tot_spoints", "tot_sfieldgoalsmade", "tot_sfieldgoalsattempted",
+    "tot_sfreethrowsmade", "tot_sfreethrowsattempted",
+    "tot_sreboundsoffensive", "tot_sreboundstotal",
+    "tot_sassists", "tot_ssteals", "tot_sblockshots", "tot_sturnovers", "tot_spersonalfouls",
+)
+
+PLAYER_COLUMNS = (
+    "spoints", "sfieldgoalsmade", "sfieldgoalsattempted",
+    "stwopointersmade", "sthreepointersmade", "sthreepointersattempted",
+    "sfreethrowsmade", "sfreethrowsattempted",
+    "sreboundsoffensive", "sreboundstotal",
+    "sassists", "ssteals", "sblockshots", "sturnovers", "spersonalfouls",
+    "spointsmidrange", "spointsinthepaint", "spointsfastbreak",
+    "spointssecondchance", "spointsfromturnovers",
+)
+
+# Opponent raw counts copied onto team rows as-is (not recomputed)
+_OPP_PASSTHROUGH = (
+    ("opp_fgm", "tot_sfieldgoalsmade"),
+    ("opp_fga", "tot_sfieldgoalsattempted"),
+    ("opp_3pm", "tot_sthreepointersmade"),
+    ("opp_points", "tot_spoints"),
+    ("opp_turnovers", "tot_sturnovers"),
+)
+
+
+def enabled() -> bool:
+    """True unless ADVANCED_STATS_ENGINE=scalar."""
+    return ADVANCED_STATS_ENGINE != "scalar"
+
+
+def _columns(rows, names) -> dict:
+    """name -> float array, with the scalar code's .get(name, 0) or 0 semantics."""
+    cols = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        try:
+            column = np.array(values, dtype=float)  # None -> nan
+        except (TypeError, ValueError):
+            column = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+        column[np.isnan(column)] = 0
+        cols[name] = column
+    return cols
+
+
+def _take(cols: dict, idx) -> dict:
+    return {name: values[idx] for name, values in cols.items()}
+
+
+def _safe_div(n, d):
+    """Element-wise safe_div: n / d, or 0 where d == 0."""
+    n = np.asarray(n, dtype=float)
+    d = np.asarray(d, dtype=float)
+    out = np.zeros(np.broadcast(n, d).shape)
+    np.divide(n, d, out=out, where=d != 0)
+    return out
+
+
+def _unique_rows(pairs):
+    """Load each distinct row once; return (rows, index arrays per pair slot)."""
+    flat = [row for pair in pairs for row in pair]
+    keys = np.fromiter((id(row) for row in flat), dtype=np.uint64, count=len(flat))
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    width = len(pairs[0])
+    inverse = inverse.reshape(len(pairs), width)
+    return [flat[i] for i in first], [inverse[:, slot] for slot in range(width)]
+
+
+def _records(ids, fields: dict) -> list:
+    """[{"id": id, **fields}] with plain Python values, keys in *fields* order."""
+    names = ["id", *fields]
+    columns = [
+        values.tolist() if isinstance(values, np.ndarray) else list(values)
+        for values in fields.values()
+    ]
+    return [dict(zip(names, values)) for values in zip(ids, *columns)]
+
+
+# ---------------------------------------------------------------------------
+# Team metrics (advanced_team_stats.team_advanced_fields)
+# ---------------------------------------------------------------------------
+
+def _possessions(x):
+    return x["tot_sfieldgoalsattempted"] + 0.4 * x["tot_sfreethrowsattempted"] - x["tot_sreboundsoffensive"] + x["tot_sturnovers"]
+
+
+def _team_efg(x):
+    return _safe_div(x["tot_sfieldgoalsmade"] + 0.5 * x["tot_sthreepointersmade"], x["tot_sfieldgoalsattempted"]) * 100
+
+
+def _team_pie_score(x):
+    return (x["tot_spoints"] + x["tot_sfieldgoalsmade"] + x["tot_sfreethrowsmade"]
+            - x["tot_sfieldgoalsattempted"] - x["tot_sfreethrowsattempted"]
+            + x["tot_sreboundstotal"] + x["tot_sassists"] + x["tot_ssteals"] + x["tot_sblocks"]
+            - x["tot_sturnovers"] - x["tot_sfoulspersonal"])
+
+
+def team_metrics(t: dict, o: dict) -> dict:
+    """All computed team fields for column dicts *t* (team) and *o* (opponent)."""
+    team_poss = _possessions(t)
+    opp_poss = _possessions(o)
+    team_points = t["tot_spoints"]
+    opp_points = o["tot_spoints"]
+
+    off_rating = _safe_div(team_points, team_poss) * 100
+    def_rating = _safe_div(opp_points, opp_poss) * 100
+
+    # Rebounding
+    team_orb = t["tot_sreboundsoffensive"]
+    team_reb = t["tot_sreboundstotal"]
+    team_drb = team_reb - team_orb
+    opp_orb = o["tot_sreboundsoffensive"]
+    opp_reb = o["tot_sreboundstotal"]
+    opp_drb = opp_reb - opp_orb
+
+    # Scoring distribution (calculate_scoring_distribution)
+    total_points = t["tot_spoints"]
+    points_2pt = t["tot_stwopointersmade"] * 2
+    points_pitp = t["tot_spointspaint"]
+    points_midrange = np.maximum(0, points_2pt - points_pitp)
+
+    # calc_team_scoring_distribution divides by max(points, 1), unscaled
+    dist_total = np.where(total_points == 0, 1, total_points)
+
+    # Shot distribution, with the paint-attempt estimate for midrange
+    fga = t["tot_sfieldgoalsattempted"]
+    three_pa = t["tot_sthreepointersattempted"]
+    two_pa = fga - three_pa
+    two_pt_made = t["tot_stwopointersmade"]
+    two_pt_fg_pct = np.where(two_pa > 0, _safe_div(two_pt_made, two_pa), 0.5)
+    paint_attempts_est = np.where(two_pt_fg_pct > 0, _safe_div(points_pitp / 2, two_pt_fg_pct), 0)
+    midrange_attempts = np.where(
+        (two_pt_made > 0) & (points_pitp > 0),
+        np.maximum(0, two_pa - paint_attempts_est),
+        0,
+    )
+
+    team_score = _team_pie_score(t)
+    opp_score = _team_pie_score(o)
+
+    return {
+        "possessions": team_poss,
+        "opp_possessions": opp_poss,
+        "off_rating": off_rating,
+        "def_rating": def_rating,
+        "net_rating": off_rating - def_rating,
+        "pace": 40 * _safe_div(team_poss + opp_poss, 2 * 40),
+        "efg_percent": _team_efg(t),
+        "ts_percent": _safe_div(t["tot_spoints"], 2 * (fga + 0.44 * t["tot_sfreethrowsattempted"])) * 100,
+        "three_point_rate": _safe_div(three_pa, fga) * 100,
+        "ft_rate": _safe_div(t["tot_sfreethrowsattempted"], fga) * 100,
+        "tov_percent": _safe_div(t["tot_sturnovers"], team_poss) * 100,
+        "opp_tov_percent": _safe_div(o["tot_sturnovers"], opp_poss) * 100,
+        "oreb_percent": _safe_div(team_orb, team_orb + opp_drb) * 100,
+        "dreb_percent": _safe_div(team_drb, team_drb + opp_orb) * 100,
+        "reb_percent": _safe_div(team_reb, team_reb + opp_reb) * 100,
+        "opp_oreb_percent": _safe_div(opp_orb, opp_orb + team_drb) * 100,
+        "ast_percent": _safe_div(t["tot_sassists"], t["tot_sfieldgoalsmade"]) * 100,
+        "ast_to_ratio": _safe_div(t["tot_sassists"], t["tot_sturnovers"]),
+        "pie": _safe_div(team_score, team_score + opp_score) * 100,
+        "opp_efg_percent": _team_efg(o),
+        "opp_ft_rate": _safe_div(o["tot_sfreethrowsattempted"], o["tot_sfieldgoalsattempted"]) * 100,
+        "fga_percent_2pt": _safe_div(two_pa, fga) * 100,
+        "fga_percent_3pt": _safe_div(three_pa, fga) * 100,
+        "fga_percent_midrange": _safe_div(midrange_attempts, fga) * 100,
+        "pts_percent_2pt": _safe_div(points_2pt, total_points) * 100,
+        "pts_percent_3pt": _safe_div(t["tot_sthreepointersmade"] * 3, total_points) * 100,
+        "pts_percent_midrange": _safe_div(points_midrange, total_points) * 100,
+        "pts_percent_pitp": t["tot_spointsinthepaint"] / dist_total,
+        "pts_percent_fastbreak": t["tot_spointsfastbreak"] / dist_total,
+        "pts_percent_second_chance": t["tot_spointssecondchance"] / dist_total,
+        "pts_percent_off_turnovers": t["tot_spointsfromturnovers"] / dist_total,
+        "pts_percent_ft": _safe_div(t["tot_sfreethrowsmade"], total_points) * 100,
+    }
+
+
+def team_advanced_rows(pairs) -> list:
+    """
+    Pending team_stats rows ({"id": ..., **fields}) for (team, opponent)
+    row pairs, in pair order; pairs whose team row has no id are dropped.
+    Same values as team_advanced_fields(team, opp) for each pair.
+    """
+    pairs = [(team, opp) for team, opp in pairs if team.get("id")]
+    if not pairs:
+        return []
+
+    # Each row is usually both a team and an opponent: load it once
+    rows, (team_idx, opp_idx) = _unique_rows(pairs)
+    cols = _columns(rows, TEAM_COLUMNS)
+    fields = team_metrics(_take(cols, team_idx), _take(cols, opp_idx))
+
+    # Raw opponent counts are copied as stored, like the scalar path does
+    for field, column in _OPP_PASSTHROUGH:
+        fields[field] = [opp.get(column, 0) or 0 for _, opp in pairs]
+
+    return _records([team["id"] for team, _ in pairs], fields)
+
+
+# ---------------------------------------------------------------------------
+# Player metrics (advanced_player_stats.compute_player_advanced)
+# ---------------------------------------------------------------------------
+
+def _minutes(values) -> np.ndarray:
+    """convert_minutes_to_decimal over a column, once per distinct value."""
+    from app.utils.advanced_player_stats import convert_minutes_to_decimal
+
+    cache = {}
+    out = np.empty(len(values))
+    for i, value in enumerate(values):
+        try:
+            minutes = cache[value]
+        except KeyError:
+            minutes = cache[value] = convert_minutes_to_decimal(value)
+        except TypeError:  # unhashable
+            minutes = convert_minutes_to_decimal(value)
+        out[i] = minutes
+    return out
+
+
+def _pie_positive(x, prefix=""):
+    return (x[prefix + "spoints"] + x[prefix + "sfieldgoalsmade"] + x[prefix + "sfreethrowsmade"]
+            + x[prefix + "sreboundsoffensive"] + x[prefix + "sassists"] + x[prefix + "ssteals"]
+            + x[prefix + "sblockshots"])
+
+
+def _pie_negative(x, prefix=""):
+    return ((x[prefix + "sfieldgoalsattempted"] - x[prefix + "sfieldgoalsmade"])
+            + (x[prefix + "sfreethrowsattempted"] - x[prefix + "sfreethrowsmade"])
+            + x[prefix + "sturnovers"] + x[prefix + "spersonalfouls"])
+
+
+def player_metrics(p: dict, minutes, t: dict, o: dict) -> dict:
+    """All computed player fields for player columns *p*, decimal *minutes*
+    and the team (*t*) / opponent (*o*) context columns."""
+    fga = p["sfieldgoalsattempted"]
+    fta = p["sfreethrowsattempted"]
+    tov = p["sturnovers"]
+    ast = p["sassists"]
+    pts = p["spoints"]
+    team_poss = t["possessions"]
+
+    player_poss = fga + 0.44 * fta + tov
+
+    # Usage: 0 when team possessions or minutes are 0
+    has_usage = (team_poss != 0) & (minutes != 0)
+    usage = np.zeros(len(pts))
+    usage[has_usage] = (
+        (player_poss[has_usage] / team_poss[has_usage]) * (40 / minutes[has_usage]) * 100
+    )
+
+    player_orb = p["sreboundsoffensive"]
+    player_reb = p["sreboundstotal"]
+    player_drb = player_reb - player_orb
+    opp_orb = o["tot_sreboundsoffensive"]
+    opp_reb = o["tot_sreboundstotal"]
+    opp_drb = opp_reb - opp_orb
+
+    pie_total = (
+        (_pie_positive(t, "tot_") + _pie_negative(t, "tot_"))
+        + _pie_positive(o, "tot_") + _pie_negative(o, "tot_")
+    )
+
+    off_rating = np.where(player_poss > 0, _safe_div(pts, player_poss) * 100, 0)
+    def_rating = np.where(team_poss > 0, _safe_div(o["tot_spoints"], team_poss) * 100, 0)
+
+    return {
+        "player_possessions": player_poss,
+        "efg_percent": _safe_div(p["sfieldgoalsmade"] + 0.5 * p["sthreepointersmade"], fga) * 100,
+        "ts_percent": _safe_div(pts, 2 * (fga + 0.44 * fta)) * 100,
+        "three_point_rate": _safe_div(p["sthreepointersattempted"], fga) * 100,
+        "usage_percent": usage,
+        "ast_percent": _safe_div(ast, t["tot_sfieldgoalsmade"] - p["sfieldgoalsmade"]) * 100,
+        "ast_to_ratio": _safe_div(ast, tov),
+        "oreb_percent": _safe_div(player_orb, player_orb + opp_drb) * 100,
+        "dreb_percent": _safe_div(player_drb, player_drb + opp_orb) * 100,
+        "reb_percent": _safe_div(player_reb, player_reb + opp_reb) * 100,
+        "tov_percent": _safe_div(tov, fga + 0.44 * fta + ast + tov) * 100,
+        "pie": _safe_div(_pie_positive(p) - _pie_negative(p), pie_total) * 100,
+        "off_rating": off_rating,
+        "def_rating": def_rating,
+        "net_rating": off_rating - def_rating,
+        "pts_percent_2pt": _safe_div(p["stwopointersmade"] * 2, pts),
+        "pts_percent_3pt": _safe_div(p["sthreepointersmade"] * 3, pts),
+        "pts_percent_ft": _safe_div(p["sfreethrowsmade"], pts),
+        "pts_percent_midrange": _safe_div(p["spointsmidrange"], pts),
+        "pts_percent_pitp": _safe_div(p["spointsinthepaint"], pts),
+        "pts_percent_fastbreak": _safe_div(p["spointsfastbreak"], pts),
+        "pts_percent_second_chance": _safe_div(p["spointssecondchance"], pts),
+        "pts_percent_off_turnovers": _safe_div(p["spointsfromturnovers"], pts),
+    }
+
+
+def player_advanced_rows(entries) -> list:
+    """
+    Pending player_stats rows for (player, team_stats, opp_stats) entries,
+    in entry order.  Same values as the per-player loop in
+    compute_player_advanced.
+    """
+    if not entries:
+        return []
+
+    players = [player for player, _, _ in entries]
+    contexts, (team_idx, opp_idx) = _unique_rows([(team, opp) for _, team, opp in entries])
+    context_cols = _columns(contexts, CONTEXT_COLUMNS)
+
+    fields = player_metrics(
+        _columns(players, PLAYER_COLUMNS),
+        _minutes([player.get("sminutes", 0) for player in players]),
+        _take(context_cols, team_idx),
+        _take(context_cols, opp_idx),
+    )
+    return _records([player["id"] for player in players], fields)
@@ -1,4 +1,30 @@
-from app.utils.supabase_queries import supabase
+import os
+import time
+from app.utils import advanced_stats_engine
+from app.utils.helpers import iter_pages, select_existing_columns
+from app.utils.stats_writer import bulk_update_by_id
+
+# game_keys per .in_() filter when fetching a subset of games
+GAME_KEY_BATCH = 100
+
+# rows per .range() page when reading team_stats / player_stats (capped at
+# helpers.POSTGREST_MAX_ROWS, the most the server returns per request)
+ADVANCED_STATS_PAGE_SIZE = int(os.environ.get("ADVANCED_STATS_PAGE_SIZE", "1000"))
+
+# Columns the team metrics and the player team-context read; names a table
+# lacks are left out of the select (and read as 0, as with select("*"))
+TEAM_STATS_COLUMNS = (
+    ("id", "game_key", "team_id", "possessions")
+    + advanced_stats_engine.TEAM_COLUMNS
+    + advanced_stats_engine.CONTEXT_COLUMNS
+)
+
+
+def _db():
+    """The shared Supabase client, imported on first use so the metric
+    functions can be used (tests, benchmarks) without one."""
+    from app.utils.supabase_queries import supabase
+    return supabase
 
 
 def safe_div(n, d):
@@ -318,20 +344,42 @@ def write_team_advanced_to_supabase(team_id, updated_fields):
     Write advanced stats to team_stats table in Supabase
     """
     try:
-        result = supabase.table("team_stats").update(updated_fields).eq("id", team_id).execute()
+        result = _db().table("team_stats").update(updated_fields).eq("id", team_id).execute()
         return result
     except Exception as e:
         print(f"Error writing advanced stats for team_id {team_id}: {e}")
         return None
 
 
-def fetch_team_stats_for_league(league_id):
+def iter_team_stats_pages(league_id, game_keys=None, page_size=None):
+    """
+    Yield the league's team_stats rows (only those of *game_keys* when given)
+    a page at a time, selecting just TEAM_STATS_COLUMNS
+    """
+    db = _db()
+    columns = select_existing_columns(db, "team_stats", TEAM_STATS_COLUMNS)
+    if game_keys is None:
+        batches = [None]
+    else:
+        game_keys = list(game_keys)
+        batches = [game_keys[i:i + GAME_KEY_BATCH] for i in range(0, len(game_keys), GAME_KEY_BATCH)]
+
+    for batch in batches:
+        def query(batch=batch):
+            q = db.table("team_stats").select(columns).eq("league_id", league_id)
+            if batch is not None:
+                q = q.in_("game_key", batch)
+            return q.order("id")
+        yield from iter_pages(query, page_size or ADVANCED_STATS_PAGE_SIZE)
+
+
+def fetch_team_stats_for_league(league_id, game_keys=None):
     """
-    Fetch all team_stats rows for a given league
+    Fetch all team_stats rows for a given league, or only those of
+    *game_keys* when given
     """
     try:
-        result = supabase.table("team_stats").select("*").eq("league_id", league_id).execute()
-        return result.data if result.data else []
+        return [row for page in iter_team_stats_pages(league_id, game_keys) for row in page]
     except Exception as e:
         print(f"Error fetching team stats for league {league_id}: {e}")
         return []
@@ -343,8 +391,12 @@ def compute_team_advanced(team_rows):
     
     For each team row:
     1. Find opponent by matching game_key
-    2. Calculate all advanced metrics
-    3. Write back to Supabase
+    2. Calculate all advanced metrics (advanced_stats_engine, or
+       team_advanced_fields per row when ADVANCED_STATS_ENGINE=scalar)
+    3. Write back to Supabase in chunks (see stats_writer.bulk_update_by_id)
+    
+    The computed fields are also applied to team_rows in place, so the
+    caller can build player context from them without re-reading team_stats.
     
     Args:
         team_rows: List of team_stats rows from Supabase
@@ -353,6 +405,8 @@ def compute_team_advanced(team_rows):
         Number of teams processed
     """
     processed = 0
+    pairs = []
+    started = time.perf_counter()
     
     # Create a lookup dict by game_key for fast opponent matching
     game_dict = {}
@@ -375,14 +429,34 @@ def compute_team_advanced(team_rows):
         
         team_a, team_b = teams[0], teams[1]
         
-        # Process team A vs team B
-        process_team_vs_opponent(team_a, team_b)
-        
-        # Process team B vs team A
-        process_team_vs_opponent(team_b, team_a)
+        # Process team A vs team B, then team B vs team A
+        pairs.append((team_a, team_b))
+        pairs.append((team_b, team_a))
         
         processed += 2
     
+    if advanced_stats_engine.enabled():
+        pending = advanced_stats_engine.team_advanced_rows(pairs)
+    else:
+        pending = [
+            {"id": team["id"], **team_advanced_fields(team, opp)}
+            for team, opp in pairs if team.get("id")
+        ]
+    
+    # Keep the in-memory rows in step with what is written
+    rows_by_id = {row["id"]: row for row in team_rows if row.get("id")}
+    for fields in pending:
+        rows_by_id[fields["id"]].update(fields)
+    
+    # Write every row in chunks rather than one update per team
+    computed = time.perf_counter()
+    written, failed = bulk_update_by_id(_db(), "team_stats", pending)
+    finished = time.perf_counter()
+    print(f"   ✅ Team advanced stats ({advanced_stats_engine.ADVANCED_STATS_ENGINE}): "
+          f"{len(pending)} rows computed in {computed - started:.2f}s, "
+          f"{written} written ({failed} failed) in {finished - computed:.2f}s "
+          f"({len(pending) / max(finished - started, 1e-9):,.0f} rows/sec)")
+    
     return processed
 
 
@@ -390,6 +464,15 @@ def process_team_vs_opponent(team, opp):
     """
     Calculate and write all advanced stats for a team against their opponent
     """
+    team_id = team.get("id")
+    if team_id:
+        write_team_advanced_to_supabase(team_id, team_advanced_fields(team, opp))
+
+
+def team_advanced_fields(team, opp):
+    """
+    Calculate all advanced stats for a team against their opponent
+    """
     # Basic metrics
     team_poss = calculate_possessions(team)
     opp_poss = calculate_opp_possessions(opp)
@@ -475,7 +558,4 @@ def process_team_vs_opponent(team, opp):
         "opp_turnovers": opp_turnovers
     }
     
-    # Write to database
-    team_id = team.get("id")
-    if team_id:
-        write_team_advanced_to_supabase(team_id, updated_fields)
+    return updated_fields
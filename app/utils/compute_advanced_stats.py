@@ -1,10 +1,11 @@
 from app.utils.supabase_queries import supabase
+from app.utils.helpers import select_all_pages
 from app.utils.advanced_team_stats import (
     fetch_team_stats_for_league,
     compute_team_advanced
 )
 from app.utils.advanced_player_stats import (
-    fetch_player_stats_for_league,
+    iter_player_stats_pages,
     compute_player_advanced
 )
 
@@ -73,30 +74,71 @@ def build_team_context(team_rows):
     return team_map
 
 
-def compute_advanced_stats(league_id):
+def changed_game_keys(league_id, since):
+    """
+    game_keys of the league whose team_stats or player_stats rows have an
+    updated_at at or after *since* (an ISO timestamp).
+
+    Returns None when the watermark cannot be applied (e.g. no updated_at
+    column), so the caller falls back to the whole league.
+    """
+    game_keys = set()
+    try:
+        for table in ("team_stats", "player_stats"):
+            rows = select_all_pages(
+                lambda: supabase.table(table).select("id,game_key")
+                .eq("league_id", league_id)
+                .gte("updated_at", since)
+                .order("id")
+            )
+            game_keys.update(r["game_key"] for r in rows if r.get("game_key"))
+    except Exception as e:
+        print(f"   ⚠️  Could not apply since={since} watermark, recomputing whole league: {e}")
+        return None
+    return game_keys
+
+
+def compute_advanced_stats(league_id, game_keys=None, since=None):
     """
     Main coordinator function to compute both team and player advanced stats
     
     Flow:
     1. Fetch team stats
-    2. Compute team advanced stats (possessions, ratings, etc.)
-    3. Re-fetch updated team stats (now includes possessions)
+    2. Compute team advanced stats (possessions, ratings, etc.); the
+       fetched rows are updated in memory as they are written
+    3. Check the computed rows carry possessions
     4. Build team_map for player context
-    5. Fetch player stats
-    6. Compute player advanced stats using team_map
+    5. Fetch player stats a page at a time
+    6. Compute player advanced stats for each page using team_map
+    
+    With game_keys (or a since watermark, resolved through
+    changed_game_keys) only those games' team and player rows are fetched
+    and rewritten; ingestion passes the games it just stored.  Advanced
+    stats are per game, so the other games' rows do not change.
     
     Args:
         league_id: The league ID to process
+        game_keys: Optional iterable of game_keys to restrict the run to
+        since:     Optional ISO timestamp; games updated at or after it
     
     Returns:
         Dict with status, counts, and processing details
     """
-    print(f"\n🔧 Computing advanced stats for league: {league_id}")
+    if game_keys is None and since:
+        game_keys = changed_game_keys(league_id, since)
+    if game_keys is not None:
+        game_keys = sorted(set(game_keys))
+        if not game_keys:
+            print(f"\n🔧 No changed games for league {league_id} - advanced stats untouched")
+            return {"status": "no_data", "teams_processed": 0, "players_processed": 0, "games": 0}
+
+    scope = f"{len(game_keys)} game(s)" if game_keys is not None else "all games"
+    print(f"\n🔧 Computing advanced stats for league: {league_id} ({scope})")
     
     try:
         # Step 1: Fetch all team rows
         print("   📊 Step 1: Fetching team stats...")
-        team_rows = fetch_team_stats_for_league(league_id)
+        team_rows = fetch_team_stats_for_league(league_id, game_keys)
         
         if not team_rows:
             print("   ⚠️  No team stats found for this league")
@@ -118,23 +160,14 @@ def compute_advanced_stats(league_id):
                 "error": "Team advanced stats computation produced no results"
             }
         
-        # Step 3: Re-fetch UPDATED team stats (to include calculated fields like possessions)
-        print("   📊 Step 3: Re-fetching updated team stats...")
-        updated_team_rows = fetch_team_stats_for_league(league_id)
-        
-        if not updated_team_rows:
-            print("   ❌ Failed to re-fetch team stats")
-            return {
-                "status": "refetch_failed",
-                "teams_processed": teams_processed,
-                "players_processed": 0,
-                "error": "Could not re-fetch updated team stats"
-            }
+        # Step 3: compute_team_advanced applied the computed fields (possessions
+        # included) to team_rows in place, so no re-fetch is needed
+        updated_team_rows = team_rows
         
         # Validate that updated rows have possessions
         rows_with_possessions = sum(1 for row in updated_team_rows if row.get("possessions"))
         if rows_with_possessions == 0:
-            print("   ❌ Re-fetched team stats do not contain possessions data")
+            print("   ❌ Computed team stats do not contain possessions data")
             return {
                 "status": "missing_possessions",
                 "teams_processed": teams_processed,
@@ -158,11 +191,16 @@ def compute_advanced_stats(league_id):
                 "error": "No games passed validation for player context"
             }
         
-        # Step 5: Fetch all PLAYER rows
-        print("   📊 Step 5: Fetching player stats...")
-        player_rows = fetch_player_stats_for_league(league_id)
+        # Step 5/6: Fetch PLAYER rows a page at a time and compute each page
+        # (using team_map), so only one page of player rows is held at once
+        print("   📊 Step 5: Fetching and computing player stats page by page...")
+        total_players = players_processed = 0
+        for player_rows in iter_player_stats_pages(league_id, game_keys):
+            total_players += len(player_rows)
+            print(f"   Found {len(player_rows)} player stat records ({total_players} so far)")
+            players_processed += compute_player_advanced(player_rows, team_map)
         
-        if not player_rows:
+        if not total_players:
             print("   ⚠️  No player stats found for this league")
             return {
                 "status": "success",
@@ -171,11 +209,6 @@ def compute_advanced_stats(league_id):
                 "message": "Team stats computed, no players found"
             }
         
-        print(f"   Found {len(player_rows)} player stat records")
-        
-        # Step 6: Compute PLAYER advanced stats (using team_map)
-        print("   📊 Step 6: Computing player advanced stats...")
-        players_processed = compute_player_advanced(player_rows, team_map)
         print(f"   Player stats processed: {players_processed}")
         
         # Step 7: Return summary
@@ -185,8 +218,9 @@ def compute_advanced_stats(league_id):
             "teams_processed": teams_processed,
             "players_processed": players_processed,
             "total_teams": len(team_rows),
-            "total_players": len(player_rows),
-            "valid_games": len(team_map)
+            "total_players": total_players,
+            "valid_games": len(team_map),
+            "games": len(game_keys) if game_keys is not None else None
         }
         
     except Exception as e:
@@ -0,0 +1,107 @@
+"""
+entity_cache.py
+---------------
+Process-wide bounded caches for reference entities (leagues, teams, players
+and per-team rosters).
+
+Leagues and teams are close to immutable, and players only ever get added, so
+the worker, the Excel runner, the PDF parser and the backfill scripts can
+answer most get-or-create lookups from memory.  Each TTLCache is an LRU
+bounded by maxsize whose entries also expire after ttl seconds, so rows
+edited by hand in Supabase (merges, renames) are picked up eventually.
+Writers call invalidate() when they insert, so a new player is visible to
+the next roster lookup straight away.
+
+Environment variables:
+    ENTITY_CACHE_SIZE         max entries per cache (default: 5000)
+    ENTITY_CACHE_TTL_SECS     TTL for leagues/teams (default: 3600)
+    PLAYER_CACHE_TTL_SECS     TTL for players/rosters (default: 600)
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+ENTITY_CACHE_SIZE = int(os.environ.get("ENTITY_CACHE_SIZE", "5000"))
+ENTITY_CACHE_TTL_SECS = float(os.environ.get("ENTITY_CACHE_TTL_SECS", "3600"))
+PLAYER_CACHE_TTL_SECS = float(os.environ.get("PLAYER_CACHE_TTL_SECS", "600"))
+
+# Returned by get() on a miss, so None can be cached as a real value.
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int = ENTITY_CACHE_SIZE, ttl: float = ENTITY_CACHE_TTL_SECS):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=MISSING):
+        """Drop one key, or everything when called without a key."""
+        with self._lock:
+            if key is MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+# Shared caches used by app/utils/json_parser.py
+leagues = TTLCache("leagues")                              # name -> league_id
+teams = TTLCache("teams")                                  # (league_id, normalized name) -> team_id
+players = TTLCache("players", ttl=PLAYER_CACHE_TTL_SECS)   # (full_name, team_id, shirt) -> player id
+rosters = TTLCache("rosters", ttl=PLAYER_CACHE_TTL_SECS)   # team_id -> [player rows]
+roster_indexes = TTLCache("roster_indexes", ttl=PLAYER_CACHE_TTL_SECS)  # team_id -> PlayerNameIndex
+
+_ALL = (leagues, teams, players, rosters, roster_indexes)
+
+
+def stats() -> dict:
+    """Hit/miss/size counters for every shared cache, keyed by cache name."""
+    return {c.name: c.stats() for c in _ALL}
+
+
+def invalidate_roster(team_id: str):
+    """Forget a team's cached roster (and its name index) after a player insert."""
+    rosters.invalidate(team_id)
+    roster_indexes.invalidate(team_id)
+
+
+def clear_all():
+    for c in _ALL:
+        c.invalidate()
@@ -1,6 +1,11 @@
 import asyncio
+import os
 from typing import Any
 
+# PostgREST's max-rows (db-max-rows) for this project; Supabase's default is
+# 1000.  Raise it only together with the server setting.
+POSTGREST_MAX_ROWS = int(os.environ.get("POSTGREST_MAX_ROWS", "1000"))
+
 def run_async(func, *args, **kwargs):
     try:
         return asyncio.run(func(*args, **kwargs))
@@ -17,3 +22,82 @@ def get_val(row, *keys, fallback: Any =""):
         if val not in (None, ""):
             return val
     return fallback
+
+
+def is_missing_rpc_error(exc: Exception) -> bool:
+    """True when a PostgREST error means the called SQL function is not deployed."""
+    code = str(getattr(exc, "code", "") or "")
+    msg = str(exc)
+    return (
+        code in ("PGRST202", "42883")
+        or "PGRST202" in msg
+        or "Could not find the function" in msg
+    )
+
+
+def is_missing_table_error(exc: Exception) -> bool:
+    """True when a PostgREST error means the queried table/view does not exist yet."""
+    code = str(getattr(exc, "code", "") or "")
+    msg = str(exc)
+    return (
+        code in ("PGRST205", "42P01")
+        or "PGRST205" in msg
+        or "Could not find the table" in msg
+    )
+
+
+def is_missing_column_error(exc: Exception) -> bool:
+    """True when a PostgREST error means a selected/written column does not exist yet."""
+    code = str(getattr(exc, "code", "") or "")
+    msg = str(exc)
+    return (
+        code in ("PGRST204", "42703")
+        or "PGRST204" in msg
+        or ("column" in msg and "does not exist" in msg)
+    )
+
+
+def iter_pages(make_query, page_size: int = 1000):
+    """
+    Run an ordered PostgREST select page by page with .range() until a short
+    page, yielding each page, so results are not cut off at the server's
+    max-rows limit.  *make_query* returns a fresh query builder for each page.
+
+    page_size is clamped to POSTGREST_MAX_ROWS: the server never returns more
+    than max-rows rows, so a larger page would look short (and end the loop)
+    after its first max-rows rows.
+    """
+    page_size = max(1, min(page_size, POSTGREST_MAX_ROWS))
+    start = 0
+    while True:
+        res = make_query().range(start, start + page_size - 1).execute()
+        page = res.data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        start += page_size
+
+
+def select_all_pages(make_query, page_size: int = 1000) -> list:
+    """All rows of iter_pages(make_query, page_size) as one list."""
+    return [row for page in iter_pages(make_query, page_size) for row in page]
+
+
+# table -> frozenset of its column names, read once per process
+_table_columns = {}
+
+
+def select_existing_columns(db, table: str, wanted) -> str:
+    """
+    Select list of the *wanted* columns that *table* actually has, so a
+    projection never names a column PostgREST would reject.  The table's
+    columns are read from one sample row; "*" when the table is empty.
+    """
+    columns = _table_columns.get(table)
+    if columns is None:
+        sample = db.table(table).select("*").limit(1).execute().data or []
+        if not sample:
+            return "*"
+        columns = _table_columns[table] = frozenset(sample[0])
+    return ",".join(c for c in dict.fromkeys(wanted) if c in columns)
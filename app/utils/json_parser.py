@@ -1,11 +1,16 @@
 import os
 import logging
-import requests
+import threading
+import contextlib
 import pandas as pd
 from io import BytesIO
 from supabase import create_client, Client
 from supabase.lib.client_options import ClientOptions
 from app.utils.compute_advanced_stats import compute_advanced_stats
+from app.utils import livestats_http
+from app.utils import write_snapshot
+from app.utils import entity_cache
+from app.utils.name_matcher import PlayerNameIndex, normalize_player_name
 
 log = logging.getLogger("json_parser")
 
@@ -171,19 +176,44 @@ PBP_FIELD_MAP = {
 # Helpers
 # ----------------------------
 def build_data_url(numeric_id: str) -> str:
-    return f"https://fibalivestats.dcd.shared.geniussports.com/data/{numeric_id}/data.json"
+    return livestats_http.data_url(numeric_id)
 
-def insert_supabase(table: str, records: list, conflict_keys: str):
-    """Insert game data records using game_db (respects DB_SCHEMA)."""
+def insert_supabase(table: str, records: list, conflict_keys: str) -> bool:
+    """Insert game data records using game_db (respects DB_SCHEMA). Returns True on success."""
     if not records:
-        return
+        return True
     try:
         game_db.table(table) \
             .upsert(records, on_conflict=conflict_keys) \
             .execute()
         print(f"✅ Upserted {len(records)} into {DB_SCHEMA}.{table}")
+        return True
     except Exception as e:
         print(f"❌ Supabase upsert failed for {table}: {e}")
+        return False
+
+def _upsert_game_rows(table: str, records: list, conflict_keys: str, game_key: str, incremental: bool, write_stats: dict):
+    """
+    Upsert one game's rows for a table. With incremental=True only rows that
+    changed since the last successful write for this game are sent.
+    """
+    columns = [c.strip() for c in conflict_keys.split(",")]
+    key_fn = lambda r: tuple(r.get(c) for c in columns)
+
+    if incremental:
+        to_write, skipped = write_snapshot.changed_records(game_key, table, records, key_fn)
+    else:
+        to_write, skipped = records, 0
+    write_stats["skipped"] += skipped
+
+    if not to_write:
+        if records:
+            print(f"⏭️  {table}: {skipped} rows unchanged - nothing to upsert")
+        return
+    if insert_supabase(table, to_write, conflict_keys):
+        write_stats["written"] += len(to_write)
+        if incremental:
+            write_snapshot.remember(game_key, table, to_write, key_fn)
 
 # ----------------------------
 # Team Name Normalization
@@ -220,59 +250,31 @@ def normalize_team_name(name: str) -> str:
 # ----------------------------
 # Player Name Normalization & Fuzzy Matching
 # ----------------------------
-def normalize_player_name(name: str) -> str:
-    if not name:
-        return name
-    
-    import re
-    normalized = name.strip()
-    
-    normalized = re.sub(r'\s+', ' ', normalized)
-    
-    return normalized
+_ROSTER_COLUMNS = "id, full_name, shirtNumber, team_id, team_name, league_id"
+
+def _team_roster(team_id: str) -> list:
+    """All player rows for a team, via the shared roster cache. Do not mutate the result."""
+    roster = entity_cache.rosters.get(team_id)
+    if roster is entity_cache.MISSING:
+        result = ref_db.table("players").select(_ROSTER_COLUMNS).eq("team_id", team_id).execute()
+        roster = result.data or []
+        entity_cache.rosters.set(team_id, roster)
+    return roster
+
+def _team_roster_index(team_id: str) -> PlayerNameIndex:
+    index = entity_cache.roster_indexes.get(team_id)
+    if index is entity_cache.MISSING:
+        index = PlayerNameIndex(_team_roster(team_id))
+        entity_cache.roster_indexes.set(team_id, index)
+    return index
 
 def find_similar_player(full_name: str, team_id: str, similarity_threshold: float = 0.85):
-    from difflib import SequenceMatcher
-    
-    normalized_search = normalize_player_name(full_name)
+    index = _team_roster_index(team_id)
     
-    result = ref_db.table("players").select("id, full_name, shirtNumber").eq("team_id", team_id).execute()
-    
-    if not result.data:
+    if not len(index):
         return None
     
-    best_match = None
-    best_score = 0.0
-    match_type = None
-    
-    search_parts = normalized_search.split()
-    
-    for player in result.data:
-        existing_name = normalize_player_name(player["full_name"])
-        existing_parts = existing_name.split()
-        
-        if len(search_parts) >= 2 and len(existing_parts) >= 2:
-            search_last = search_parts[-1].lower()
-            existing_last = existing_parts[-1].lower()
-            search_first = search_parts[0].lower()
-            existing_first = existing_parts[0].lower()
-            
-            if search_last == existing_last:
-                if (len(search_first) == 1 and existing_first.startswith(search_first)) or \
-                   (len(existing_first) == 1 and search_first.startswith(existing_first)):
-                    best_match = player
-                    best_score = 1.0
-                    match_type = "initial"
-                    break
-        
-        similarity = SequenceMatcher(None, normalized_search.lower(), existing_name.lower()).ratio()
-        
-        if similarity > best_score and similarity >= similarity_threshold:
-            best_score = similarity
-            best_match = player
-            match_type = "fuzzy"
-    
-    return best_match
+    return index.best_match(full_name, similarity_threshold)
 
 # ----------------------------
 # Entity Get-or-Create
@@ -286,7 +288,34 @@ def _slugify(text: str) -> str:
     return slug or "league"
 
 
+# Locks for the re-check-then-insert steps below, one per league name (leagues),
+# league_id (teams) or team_id (players), so concurrent parses (worker pool,
+# parallel Excel import) cannot create the same entity twice.  Lookups and
+# roster reads run unlocked; parses touching different leagues/teams never wait
+# on each other.
+_insert_locks = {}
+_insert_locks_guard = threading.Lock()
+
+def _insert_lock(kind: str, key):
+    with _insert_locks_guard:
+        lock = _insert_locks.get((kind, key))
+        if lock is None:
+            lock = _insert_locks[(kind, key)] = threading.Lock()
+        return lock
+
 def get_or_create_league(name: str, user_id: str = None):
+    cached = entity_cache.leagues.get(name)
+    if cached is not entity_cache.MISSING:
+        return cached
+    with _insert_lock("league", name):
+        cached = entity_cache.leagues.get(name)
+        if cached is not entity_cache.MISSING:
+            return cached
+        league_id = _get_or_create_league(name, user_id)
+        entity_cache.leagues.set(name, league_id)
+    return league_id
+
+def _get_or_create_league(name: str, user_id: str = None):
     res = ref_db.table("leagues").select("league_id").eq("name", name).execute()
     if res.data:
         return res.data[0]["league_id"]
@@ -316,13 +345,50 @@ def get_or_create_league(name: str, user_id: str = None):
 
 def get_or_create_team(league_id: str, name: str, user_id: str = None):
     normalized_name = normalize_team_name(name)
+    cache_key = (league_id, normalized_name)
+    team_id = find_team_id(league_id, name)
+    if team_id is not None:
+        return team_id
+    with _insert_lock("teams", league_id):
+        team_id = _find_team(league_id, normalized_name)
+        if team_id is None:
+            new = ref_db.table("teams").insert({"league_id": league_id, "name": normalized_name}).execute()
+            team_id = new.data[0]["team_id"]
+    entity_cache.teams.set(cache_key, team_id)
+    return team_id
+
+def find_team_id(league_id: str, name: str):
+    """Existing team_id for *name* in the league (shared cache, then DB), or None; never inserts."""
+    cache_key = (league_id, normalize_team_name(name))
+    cached = entity_cache.teams.get(cache_key)
+    if cached is not entity_cache.MISSING:
+        return cached
+    team_id = _find_team(league_id, cache_key[1])
+    if team_id is not None:
+        entity_cache.teams.set(cache_key, team_id)
+    return team_id
+
+def _find_team(league_id: str, normalized_name: str):
     res = ref_db.table("teams").select("team_id").eq("league_id", league_id).eq("name", normalized_name).execute()
-    if res.data:
-        return res.data[0]["team_id"]
-    new = ref_db.table("teams").insert({"league_id": league_id, "name": normalized_name}).execute()
-    return new.data[0]["team_id"]
+    return res.data[0]["team_id"] if res.data else None
 
 def get_or_create_player(full_name: str, team_id: str, shirtnumber=None, team_name=None, league_id=None, user_id: str = None):
+    cache_key = (full_name, team_id, shirtnumber)
+    cached = entity_cache.players.get(cache_key)
+    if cached is not entity_cache.MISSING:
+        return cached
+    player_id = _find_player(full_name, team_id, shirtnumber, team_name, league_id)
+    if player_id is None:
+        with _insert_lock("players", team_id):
+            # Re-check: another parse may have created the player meanwhile.
+            player_id = _find_player(full_name, team_id, shirtnumber, team_name, league_id)
+            if player_id is None:
+                player_id = _insert_player(full_name, team_id, shirtnumber, team_name, league_id)
+    entity_cache.players.set(cache_key, player_id)
+    return player_id
+
+def _find_player(full_name: str, team_id: str, shirtnumber=None, team_name=None, league_id=None):
+    """Existing player id (exact, then similar name on the team's roster), or None."""
     query = ref_db.table("players").select("id, team_name, league_id").eq("full_name", full_name).eq("team_id", team_id)
     if shirtnumber is not None:
         query = query.eq("shirtNumber", shirtnumber)
@@ -365,6 +431,9 @@ def get_or_create_player(full_name: str, team_id: str, shirtnumber=None, team_na
         
         return player_id
     
+    return None
+
+def _insert_player(full_name: str, team_id: str, shirtnumber=None, team_name=None, league_id=None):
     insert_data = {
         "full_name": full_name,
         "team_id": team_id,
@@ -376,27 +445,265 @@ def get_or_create_player(full_name: str, team_id: str, shirtnumber=None, team_na
         insert_data["league_id"] = league_id
     
     new = ref_db.table("players").insert(insert_data).execute()
+    entity_cache.invalidate_roster(team_id)
     return new.data[0]["id"]
 
+class _GameEntityResolver:
+    """
+    Resolves every team and player a single game references with a handful
+    of bulk queries instead of one get_or_create_* round trip per lookup.
+
+    Teams: one select for all names in the league, one bulk insert for the
+    missing ones.  Players: one select for the rosters of all resolved teams,
+    then the same exact -> initial/fuzzy -> create order as
+    get_or_create_player, matched in memory; new players are inserted in one
+    batch per resolve_players() call.
+    """
+
+    def __init__(self, league_id: str, user_id: str = None):
+        self.league_id = league_id
+        self.user_id = user_id
+        self._team_ids = {}      # normalized team name -> team_id
+        self._rosters = {}       # team_id -> [player rows]
+        self._indexes = {}       # team_id -> PlayerNameIndex over self._rosters[team_id]
+        self._roster_src = {}    # team_id -> entity_cache roster list self._rosters was copied from
+        self._player_ids = {}    # (full_name, team_id, shirt) -> player id
+
+    # --- Teams ---
+    def resolve_teams(self, names):
+        wanted = {normalize_team_name(n) for n in names if n}
+        missing = []
+        for n in wanted:
+            if n in self._team_ids:
+                continue
+            cached = entity_cache.teams.get((self.league_id, n))
+            if cached is entity_cache.MISSING:
+                missing.append(n)
+            else:
+                self._team_ids[n] = cached
+        if not missing:
+            return
+        self._select_teams(missing)
+        to_create = [n for n in missing if n not in self._team_ids]
+        if to_create:
+            with _insert_lock("teams", self.league_id):
+                # Re-check: another parse may have created them meanwhile.
+                self._select_teams(to_create)
+                to_create = [n for n in to_create if n not in self._team_ids]
+                if to_create:
+                    new = ref_db.table("teams").insert([{"league_id": self.league_id, "name": n} for n in to_create]).execute()
+                    for row in new.data or []:
+                        self._team_ids[row["name"]] = row["team_id"]
+        for n in missing:
+            if n in self._team_ids:
+                entity_cache.teams.set((self.league_id, n), self._team_ids[n])
+
+    def _select_teams(self, names):
+        res = ref_db.table("teams").select("team_id, name").eq("league_id", self.league_id).in_("name", names).execute()
+        for row in res.data or []:
+            self._team_ids.setdefault(row["name"], row["team_id"])
+
+    def team_id(self, name):
+        if not name:
+            return None
+        normalized = normalize_team_name(name)
+        if normalized not in self._team_ids:
+            self._team_ids[normalized] = get_or_create_team(self.league_id, name, self.user_id)
+        return self._team_ids[normalized]
+
+    # --- Players ---
+    def _load_rosters(self, team_ids):
+        missing = []
+        for t in team_ids:
+            if not t:
+                continue
+            cached = entity_cache.rosters.get(t)
+            if t in self._rosters and cached is self._roster_src.get(t):
+                continue
+            # New to this game, or another parse inserted players for the team
+            # (its cached roster was invalidated): load the current one.
+            if cached is entity_cache.MISSING:
+                missing.append(t)
+            else:
+                # Copy: pending (not yet inserted) rows get appended below.
+                self._rosters[t] = list(cached)
+                self._roster_src[t] = cached
+                self._indexes[t] = PlayerNameIndex(self._rosters[t])
+        if not missing:
+            return
+        fetched = {t: [] for t in missing}
+        res = ref_db.table("players").select(_ROSTER_COLUMNS).in_("team_id", missing).execute()
+        for row in res.data or []:
+            fetched.setdefault(row.get("team_id"), []).append(row)
+        for t, rows in fetched.items():
+            entity_cache.rosters.set(t, rows)
+            self._rosters[t] = list(rows)
+            self._roster_src[t] = rows
+            self._indexes[t] = PlayerNameIndex(self._rosters[t])
+
+    def _backfill_fields(self, row, team_name):
+        update_data = {}
+        if not row.get("team_name") and team_name:
+            update_data["team_name"] = team_name
+        if not row.get("league_id") and self.league_id:
+            update_data["league_id"] = self.league_id
+        if update_data:
+            ref_db.table("players").update(update_data).eq("id", row["id"]).execute()
+            row.update(update_data)
+            print(f"✅ Updated player {row.get('full_name')} with missing fields: {list(update_data.keys())}")
+
+    def resolve_players(self, wanted):
+        """
+        wanted: iterable of (full_name, team_id, shirtnumber, team_name).
+        Later lookups see players created by earlier ones in the same batch,
+        exactly as sequential get_or_create_player calls would.
+        """
+        wanted = [w for w in wanted if w[0] and w[1]]
+        self._load_rosters({w[1] for w in wanted})
+
+        pending = []  # new player rows awaiting their id
+        for full_name, team_id, shirt, team_name in wanted:
+            key = (full_name, team_id, shirt)
+            if key in self._player_ids:
+                continue
+            cached = entity_cache.players.get(key)
+            if cached is not entity_cache.MISSING:
+                self._player_ids[key] = cached
+                continue
+            row = self._match(full_name, team_id, shirt)
+            if row is None:
+                row = {"id": None, "full_name": full_name, "team_id": team_id, "shirtNumber": shirt,
+                       "team_name": team_name, "league_id": self.league_id}
+                self._rosters[team_id].append(row)
+                self._indexes[team_id].add(row)
+                pending.append((key, row))
+                continue
+            if row["id"] is None:
+                pending.append((key, row))
+                continue
+            self._backfill_fields(row, team_name)
+            self._player_ids[key] = row["id"]
+            entity_cache.players.set(key, row["id"])
+
+        new_rows = []
+        seen = set()
+        for _, row in pending:
+            if row["id"] is None and id(row) not in seen:
+                seen.add(id(row))
+                new_rows.append(row)
+        if new_rows:
+            self._create_players(new_rows)
+
+        for key, row in pending:
+            if row["id"] is not None:
+                self._player_ids[key] = row["id"]
+                entity_cache.players.set(key, row["id"])
+
+    def _match(self, full_name, team_id, shirt):
+        """Exact (name + shirt) roster match, else the fuzzy one, else None."""
+        row = next(
+            (p for p in self._rosters[team_id]
+             if p["full_name"] == full_name
+             and (shirt is None or str(p.get("shirtNumber")) == str(shirt))),
+            None,
+        )
+        return row if row is not None else self._indexes[team_id].best_match(full_name)
+
+    def _create_players(self, new_rows):
+        """
+        Insert *new_rows* holding the insert lock of each team involved.
+        Rosters another parse changed since they were loaded are re-read
+        first, and rows that now match an existing player take its id.
+        """
+        team_ids = sorted({row["team_id"] for row in new_rows})
+        with contextlib.ExitStack() as locks:
+            for team_id in team_ids:  # sorted, so parses lock in the same order
+                locks.enter_context(_insert_lock("players", team_id))
+
+            stale = [t for t in team_ids if entity_cache.rosters.get(t) is not self._roster_src.get(t)]
+            if stale:
+                self._load_rosters(stale)
+                for row in new_rows:
+                    if row["team_id"] in stale:
+                        match = self._match(row["full_name"], row["team_id"], row["shirtNumber"])
+                        if match is not None and match["id"] is not None:
+                            row["id"] = match["id"]
+            created = [row for row in new_rows if row["id"] is None]
+            if created:
+                self._insert_players(created)
+
+            # Publish the grown rosters so other parses (and our next call) see the new players.
+            for team_id in team_ids:
+                roster = [p for p in self._rosters[team_id] if p["id"] is not None]
+                listed = {id(p) for p in roster}
+                roster += [r for r in created
+                           if r["team_id"] == team_id and r["id"] is not None and id(r) not in listed]
+                entity_cache.invalidate_roster(team_id)
+                entity_cache.rosters.set(team_id, roster)
+                self._rosters[team_id] = list(roster)
+                self._roster_src[team_id] = roster
+                self._indexes[team_id] = PlayerNameIndex(self._rosters[team_id])
+
+    def _insert_players(self, rows):
+        payload = []
+        for row in rows:
+            insert_data = {"full_name": row["full_name"], "team_id": row["team_id"], "shirtNumber": row["shirtNumber"]}
+            if row.get("team_name"):
+                insert_data["team_name"] = row["team_name"]
+            if row.get("league_id"):
+                insert_data["league_id"] = row["league_id"]
+            payload.append(insert_data)
+        try:
+            new = ref_db.table("players").insert(payload).execute()
+            for row, created in zip(rows, new.data or []):
+                row["id"] = created["id"]
+            print(f"✅ Created {len(rows)} new players")
+        except Exception as e:
+            # One bad row fails the whole batch; retry individually so the rest still resolve.
+            log.warning("Bulk player insert failed (%s), retrying one by one", e)
+            for row, insert_data in zip(rows, payload):
+                try:
+                    new = ref_db.table("players").insert(insert_data).execute()
+                    row["id"] = new.data[0]["id"]
+                except Exception as row_err:
+                    log.warning("Failed to create player %s: %s", row["full_name"], row_err)
+
+    def player_id(self, full_name, team_id, shirtnumber=None):
+        return self._player_ids.get((full_name, team_id, shirtnumber))
+
 # ----------------------------
 # Game Parser
 # ----------------------------
 
-def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home_team_name=None, away_team_name=None, game_key=None, livestats_url=None, user_id: str = None, pool=None):
+def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home_team_name=None, away_team_name=None, game_key=None, livestats_url=None, user_id: str = None, pool=None, data: dict = None, etag: str = None, last_modified: str = None, incremental: bool = False):
+    """
+    Upsert the schedule row for a game and, when stats are available, store
+    its team/player stats, play-by-play and shot chart.
+
+    Returns {"written": n, "skipped": m} row counts for the stats/roster/shot
+    upserts, or None when no stats were stored.
+
+    data           pre-fetched data.json payload (e.g. from the worker's poll);
+                   when given, no LiveStats request is made.
+    etag /         conditional-request validators used when *data* is not
+    last_modified  given; a 304 means nothing changed and the parse is skipped.
+    incremental    live-sync mode: skip rows identical to what this process
+                   last wrote for the game (see write_snapshot).
+    """
     print(f"🔍 Processing game {numeric_id}")
 
+    if not incremental:
+        write_snapshot.forget(game_key)
+    write_stats = {"written": 0, "skipped": 0}
+
     # --- Ensure league ---
     league_id = get_or_create_league(league_name, user_id)
 
     # --- Ensure teams ---
-    if home_team_name:
-        home_team_id = get_or_create_team(league_id, home_team_name, user_id)
-    else:
-        home_team_id = None
-    if away_team_name:
-        away_team_id = get_or_create_team(league_id, away_team_name, user_id)
-    else:
-        away_team_id = None
+    resolver = _GameEntityResolver(league_id, user_id)
+    resolver.resolve_teams([home_team_name, away_team_name])
+    home_team_id = resolver.team_id(home_team_name)
+    away_team_id = resolver.team_id(away_team_name)
 
     # --- Insert game schedule row (ALWAYS, even if stats unavailable) ---
     game_record = {
@@ -416,20 +723,43 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
     game_db.table("game_schedule").upsert(game_record, on_conflict="game_key").execute()
     print(f"✅ Game schedule entry created for {game_key}")
 
-    # --- Try to fetch LiveStats data ---
-    url = build_data_url(numeric_id)
-    try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if r.status_code != 200:
-            print(f"⏭️  No stats available yet (HTTP {r.status_code}) - game added to schedule")
+    # --- Try to fetch LiveStats data (unless the caller already has it) ---
+    if data is None:
+        url = build_data_url(numeric_id)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            r, _ = livestats_http.get(url, headers=headers or None)
+            if r.status_code == 304:
+                print("⏭️  LiveStats data unchanged (HTTP 304) - skipping parse")
+                return
+            if r.status_code != 200:
+                print(f"⏭️  No stats available yet (HTTP {r.status_code}) - game added to schedule")
+                return
+            data = r.json()
+        except Exception as e:
+            print(f"⏭️  No stats available yet ({e}) - game added to schedule")
             return
-        data = r.json()
-    except Exception as e:
-        print(f"⏭️  No stats available yet ({e}) - game added to schedule")
-        return
 
     teams = data.get("tm", {})
 
+    # --- Resolve every team and roster player of this game in bulk ---
+    resolver.resolve_teams([team.get("name") for team in teams.values()])
+    team_ids = {side: resolver.team_id(team.get("name")) for side, team in teams.items()}
+    resolver.resolve_players(
+        (
+            f"{player.get('firstName', '')} {player.get('familyName', '')}".strip(),
+            team_ids[side],
+            player.get("shirtNumber"),
+            team.get("name"),
+        )
+        for side, team in teams.items()
+        for player in team.get("pl", {}).values()
+    )
+
     # --- Update game_schedule with attendance and officials if present ---
     _sched_extra = {}
     _attendance = data.get("attendance")
@@ -450,7 +780,7 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
     # --- Insert team stats ---
     team_records = []
     for side, team in teams.items():
-        team_id = get_or_create_team(league_id, team.get("name"), user_id)
+        team_id = team_ids[side]
 
         team_record = {
             "numeric_id": numeric_id,
@@ -468,19 +798,21 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
             team_record["game_leaders_json"] = lds
         team_records.append(team_record)
 
-    insert_supabase("team_stats", team_records, conflict_keys="identifier_duplicate")
+    _upsert_game_rows("team_stats", team_records, "identifier_duplicate", game_key, incremental, write_stats)
 
     # --- Insert player stats (build roster_map for shot linking) ---
     player_records = []
     roster_map = {}  # (side, pno_int) -> player_id
     try:
         for side, team in teams.items():
-            team_id = get_or_create_team(league_id, team.get("name"), user_id)
+            team_id = team_ids[side]
             team_name = team.get("name")
             for pid, player in team.get("pl", {}).items():
                 try:
                     full_name = f"{player.get('firstName', '')} {player.get('familyName', '')}".strip()
-                    player_id = get_or_create_player(full_name, team_id, player.get("shirtNumber"), team_name, league_id, user_id)
+                    player_id = resolver.player_id(full_name, team_id, player.get("shirtNumber"))
+                    if player_id is None:
+                        raise LookupError("player could not be resolved")
 
                     # Build roster_map for shot linking: pno from roster is the dict key (pid)
                     try:
@@ -508,15 +840,15 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
                     continue
 
         log.info("Prepared %d player records for game %s", len(player_records), numeric_id)
-        insert_supabase("player_stats", player_records, conflict_keys="identifier_duplicate")
+        _upsert_game_rows("player_stats", player_records, "identifier_duplicate", game_key, incremental, write_stats)
     except Exception as e:
         log.error("Failed to process player stats for game %s: %s", numeric_id, e, exc_info=True)
 
     # --- Build and upsert game_rosters ---
+    roster_records = []
     try:
-        roster_records = []
         for side, team in teams.items():
-            team_id = get_or_create_team(league_id, team.get("name"), user_id)
+            team_id = team_ids[side]
             for pid, player in team.get("pl", {}).items():
                 full_name = f"{player.get('firstName', '')} {player.get('familyName', '')}".strip()
                 shirt = player.get("shirtNumber")
@@ -541,12 +873,7 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
                     "player_id": resolved_pid,
                 })
 
-        if roster_records:
-            game_db.table("game_rosters").upsert(
-                roster_records,
-                on_conflict="game_key,team_id,shirt_number",
-            ).execute()
-            print(f"✅ Upserted {len(roster_records)} game_rosters rows for {game_key}")
+        _upsert_game_rows("game_rosters", roster_records, "game_key,team_id,shirt_number", game_key, incremental, write_stats)
     except Exception as e:
         log.warning("Failed to upsert game_rosters for game %s: %s", numeric_id, e)
 
@@ -562,7 +889,7 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
     shot_records = []
     try:
         for side, team in teams.items():
-            team_id = get_or_create_team(league_id, team.get("name"), user_id)
+            team_id = team_ids[side]
             team_shots = team.get("shot") or []
             log.debug("Side %s: %d shots found", side, len(team_shots))
             for s in team_shots:
@@ -594,13 +921,15 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
                 shot_records.append(record)
 
         log.info("Prepared %d shot records for game %s", len(shot_records), numeric_id)
-        if shot_records:
-            insert_supabase("shot_chart", shot_records, conflict_keys="game_key,action_number")
+        _upsert_game_rows("shot_chart", shot_records, "game_key,action_number", game_key, incremental, write_stats)
     except Exception as e:
         log.error("Failed to process shot chart for game %s: %s", numeric_id, e, exc_info=True)
 
     # --- Incremental play-by-play insertion ---
-    # Query the latest action_number for this game to only insert new events
+    # Query the latest action_number for this game to only insert new events.
+    # Records are built for the whole feed so the lineup builder can walk it
+    # from memory; only the new ones are inserted.
+    lineup_events = None
     try:
         last_action = 0
         last_action_result = (
@@ -618,24 +947,29 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
         total_events_in_json = len(pbp)
         print(f"📊 PBP: last_action={last_action}, total_events_in_json={total_events_in_json}")
         
-        # Filter to only new events (actionNumber > last_action)
-        pbp_records = []
-        for e in pbp:
+        numbered_events = [e for e in pbp if e.get("actionNumber") is not None]
+
+        # Players named in PBP (often "J. Smith" style) resolve against the
+        # rosters already loaded above; only unknown names cost an insert.
+        resolver.resolve_players(
+            (e.get("player"), team_ids.get(str(e.get("tno"))), e.get("shirtNumber"), teams[str(e.get("tno"))].get("name"))
+            for e in numbered_events
+            if e.get("tno") and str(e.get("tno")) in teams
+        )
+
+        event_records = []
+        for e in numbered_events:
             action_num = e.get("actionNumber")
-            if action_num is None or action_num <= last_action:
-                continue
             
             team_id = None
-            team_name = None
             tno = e.get("tno")
             if tno and str(tno) in teams:
-                team_name = teams[str(tno)].get("name")
-                team_id = get_or_create_team(league_id, team_name, user_id)
+                team_id = team_ids[str(tno)]
 
             player_id = None
             player_name = e.get("player")
             if player_name and team_id:
-                player_id = get_or_create_player(player_name, team_id, e.get("shirtNumber"), team_name, league_id, user_id)
+                player_id = resolver.player_id(player_name, team_id, e.get("shirtNumber"))
 
             # Build score string from s1 and s2
             s1 = e.get("s1", "")
@@ -692,7 +1026,11 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
                 "team_score": _team_score,
                 "opp_score": _opp_score,
             }
-            pbp_records.append(pbp_record)
+            event_records.append(pbp_record)
+
+        lineup_events = sorted(event_records, key=lambda r: r["action_number"])
+        # Filter to only new events (actionNumber > last_action)
+        pbp_records = [r for r in event_records if r["action_number"] > last_action]
 
         if not pbp_records:
             print(f"⏭️  No new play-by-play events to insert")
@@ -718,12 +1056,23 @@ def parse_and_store_game(numeric_id: str, league_name: str, game_date=None, home
 
     # --- Build lineup stints ---
     # Only run if roster and PBP data are present; log a warning rather than failing.
+    # Rosters and events come from this payload, so nothing is read back.
     try:
         from app.utils.lineup_builder import build_lineups_for_game
-        build_lineups_for_game(game_key=game_key, league_id=league_id)
+        build_lineups_for_game(
+            game_key=game_key,
+            league_id=league_id,
+            incremental=incremental,
+            roster_rows=roster_records,
+            events=lineup_events,
+        )
     except Exception as e:
         log.warning("Lineup builder failed for game %s (non-fatal): %s", game_key, e)
 
+    if incremental:
+        print(f"📉 Delta write: {write_stats['written']} rows written, {write_stats['skipped']} unchanged")
+    return write_stats
+
 # ----------------------------
 # Change Detection Helper
 # ----------------------------
@@ -776,6 +1125,103 @@ def has_game_changed(game_key: str, game_date: str, home_team: str, away_team: s
 # ----------------------------
 # Excel runner
 # ----------------------------
+EXCEL_IMPORT_WORKERS = max(1, int(os.getenv("EXCEL_IMPORT_WORKERS", "4")))
+
+def _excel_safe_str(val):
+    if pd.isna(val):
+        return ""
+    return str(val)
+
+def _normalize_matchtime(value):
+    from datetime import datetime
+
+    if pd.isna(value) or not value:
+        return None
+
+    # Case 1: already a pandas Timestamp
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+    # Case 2: string version
+    value_str = str(value).strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y/%m/%d %H:%M", "%d/%m/%Y %H:%M"):
+        try:
+            return datetime.strptime(value_str, fmt).strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            continue
+
+    print(f"⚠️ Could not parse match time: {value_str}")
+    return None
+
+def _excel_row_to_game(idx, row, columns):
+    """Build the parse_and_store_game arguments for one sheet row, or None if it has no URL."""
+    league_name = _excel_safe_str(row["Competition Name"])
+    game_date = _normalize_matchtime(row["Match Time"])
+    home_team_name = _excel_safe_str(row["Home Team"])
+    away_team_name = _excel_safe_str(row["Away Team"])
+
+    # Handle Game Key - use existing value or auto-generate if missing/empty
+    game_key = _excel_safe_str(row.get("Game Key", "")) if "Game Key" in columns else ""
+    if not game_key or game_key == "nan":
+        date_part = game_date.split("T")[0] if game_date else "unknown"
+        home_safe = home_team_name.replace(" ", "_")
+        away_safe = away_team_name.replace(" ", "_")
+        game_key = f"{date_part}_{home_safe}_vs_{away_safe}"
+        print(f"   🔑 Auto-generated game_key: {game_key}")
+
+    url = _excel_safe_str(row["LiveStats URL"])
+
+    # Optional: Pool column (for leagues with multiple pools like NBL Division 1)
+    pool = None
+    if "Pool" in columns:
+        pool_val = _excel_safe_str(row["Pool"])
+        pool = pool_val if pool_val and pool_val != "nan" else None
+
+    if not url or url == "nan":
+        return None
+
+    return {
+        "row_num": int(idx) + 1 if isinstance(idx, (int, float)) else idx,
+        "numeric_id": url.rstrip("/").split("/")[-1],
+        "league_name": league_name,
+        "game_date": game_date,
+        "home_team_name": home_team_name,
+        "away_team_name": away_team_name,
+        "game_key": game_key,
+        "url": url,
+        "pool": pool,
+    }
+
+def _import_excel_game(game: dict, user_id: str = None) -> str:
+    """Check and parse one sheet game. Returns "skipped", "processed" or "error"."""
+    row_num = game["row_num"]
+    game_key = game["game_key"]
+
+    # Check if game has changed before processing
+    if not has_game_changed(game_key, game["game_date"], game["home_team_name"], game["away_team_name"], game["url"], game["pool"]):
+        print(f"⏭️  Row {row_num}: Skipping {game_key} (no changes)")
+        return "skipped"
+
+    print(f"\n➡️  Row {row_num}: {game['url']}")
+    print(f"   🎯 Extracted numeric_id: {game['numeric_id']}")
+
+    try:
+        parse_and_store_game(
+            numeric_id=game["numeric_id"],
+            league_name=game["league_name"],
+            game_date=game["game_date"],
+            home_team_name=game["home_team_name"],
+            away_team_name=game["away_team_name"],
+            game_key=game_key,
+            livestats_url=game["url"],
+            user_id=user_id,
+            pool=game["pool"]
+        )
+        return "processed"
+    except Exception as e:
+        print(f"❌ Error processing row {row_num}: {e}")
+        return "error"
+
 def run_from_excel(path: str, user_id: str = None):
     print("🚀 json_parser starting...")
 
@@ -806,119 +1252,61 @@ def run_from_excel(path: str, user_id: str = None):
         if col not in df.columns:
             raise ValueError(f"❌ Excel file must have a column named '{col}'.")
 
-    # Track processing stats
-    skipped_count = 0
-    processed_count = 0
-    error_count = 0
+    # First pass: turn rows into game dicts and resolve leagues up front, so
+    # pool threads never race to create the same league.
+    games = []
+    league_ids = {}
     league_id_to_return = None
-
     for idx, row in df.iterrows():
-        def safe_str(val):
-            if pd.isna(val):
-                return ""
-            return str(val)
-        
-        league_name = safe_str(row["Competition Name"])
-        
+        league_name = _excel_safe_str(row["Competition Name"])
+
         # Capture league_id from first row for advanced stats processing
         if league_id_to_return is None and league_name:
-            league_id_to_return = get_or_create_league(league_name, user_id)
-        
-        from datetime import datetime
-
-        def normalize_matchtime(value):
-            if pd.isna(value) or not value:
-                return None
-
-                # Case 1: already a pandas Timestamp
-            if isinstance(value, pd.Timestamp):
-                return value.strftime("%Y-%m-%dT%H:%M:%S")
-
-                # Case 2: string version
-            value_str = str(value).strip()
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y/%m/%d %H:%M", "%d/%m/%Y %H:%M"):
-                try:
-                    return datetime.strptime(value_str, fmt).strftime("%Y-%m-%dT%H:%M:%S")
-                except ValueError:
-                    continue
-
-            print(f"⚠️ Could not parse match time: {value_str}")
-            return None
-
+            league_id_to_return = league_ids.setdefault(league_name, get_or_create_league(league_name, user_id))
 
-            # Replace the old section with this:
-        game_date = normalize_matchtime(row["Match Time"])
-
-            
-        home_team_name = safe_str(row["Home Team"])
-        away_team_name = safe_str(row["Away Team"])
-        
-        # Handle Game Key - use existing value or auto-generate if missing/empty
-        game_key = safe_str(row.get("Game Key", "")) if "Game Key" in df.columns else ""
-        if not game_key or game_key == "nan":
-            date_part = game_date.split("T")[0] if game_date else "unknown"
-            home_safe = home_team_name.replace(" ", "_")
-            away_safe = away_team_name.replace(" ", "_")
-            game_key = f"{date_part}_{home_safe}_vs_{away_safe}"
-            print(f"   🔑 Auto-generated game_key: {game_key}")
-        
-        url = safe_str(row["LiveStats URL"])
-        
-        # Optional: Pool column (for leagues with multiple pools like NBL Division 1)
-        pool = None
-        if "Pool" in df.columns:
-            pool_val = safe_str(row["Pool"])
-            pool = pool_val if pool_val and pool_val != "nan" else None
-
-        if not url or url == "nan":
+        game = _excel_row_to_game(idx, row, df.columns)
+        if game is None:
             continue
+        if league_name and league_name not in league_ids:
+            league_ids[league_name] = get_or_create_league(league_name, user_id)
+        games.append(game)
+
+    # Second pass: check + parse each game, on a bounded pool when enabled.
+    # Games run independently; entity inserts are serialized per league/team by _insert_lock.
+    counts = {"skipped": 0, "processed": 0, "error": 0}
+    touched_games = {}  # league_id -> game_keys parsed in this run
+    workers = min(EXCEL_IMPORT_WORKERS, len(games)) if games else 1
+    print(f"🧵 Importing {len(games)} games with {workers} worker(s)")
+
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="excel") as executor:
+            results = list(executor.map(lambda g: _import_excel_game(g, user_id), games))
+    else:
+        results = [_import_excel_game(g, user_id) for g in games]
 
-        numeric_id = url.rstrip("/").split("/")[-1]
-        
-        row_num = int(idx) + 1 if isinstance(idx, (int, float)) else idx
-        
-        # Check if game has changed before processing
-        if not has_game_changed(game_key, game_date, home_team_name, away_team_name, url, pool):
-            skipped_count += 1
-            print(f"⏭️  Row {row_num}: Skipping {game_key} (no changes)")
-            continue
-        
-        print(f"\n➡️  Row {row_num}: {url}")
-        print(f"   🎯 Extracted numeric_id: {numeric_id}")
-        
-        try:
-            parse_and_store_game(
-                numeric_id=numeric_id,
-                league_name=league_name,
-                game_date=game_date,
-                home_team_name=home_team_name,
-                away_team_name=away_team_name,
-                game_key=game_key,
-                livestats_url=url,
-                user_id=user_id,
-                pool=pool
-            )
-            processed_count += 1
-        except Exception as e:
-            error_count += 1
-            print(f"❌ Error processing row {row_num}: {e}")
-            # Continue with next game instead of failing completely
-            continue
+    for game, status in zip(games, results):
+        counts[status] += 1
+        if status == "processed":
+            lid = league_ids.get(game["league_name"])
+            if lid:
+                touched_games.setdefault(lid, []).append(game["game_key"])
 
     # Print summary
     print(f"\n{'='*60}")
     print(f"✅ Parsing Complete")
     print(f"{'='*60}")
-    print(f"   Skipped (unchanged): {skipped_count}")
-    print(f"   Processed (new/updated): {processed_count}")
-    print(f"   Errors: {error_count}")
+    print(f"   Skipped (unchanged): {counts['skipped']}")
+    print(f"   Processed (new/updated): {counts['processed']}")
+    print(f"   Errors: {counts['error']}")
     print(f"   Total rows: {len(df)}")
     print(f"{'='*60}")
     
-    # Compute advanced stats for all games in this league
-    if league_id_to_return:
+    # Compute advanced stats once per league, after every game is in,
+    # for just the games this run stored
+    for lid, game_keys in touched_games.items():
         try:
-            compute_advanced_stats(league_id_to_return)
+            compute_advanced_stats(lid, game_keys=game_keys)
         except Exception as e:
             print("Error computing advanced stats:", e)
     
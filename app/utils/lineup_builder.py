@@ -7,6 +7,8 @@ and substitution data for a single game.
 Algorithm overview:
   1. Load game_rosters for the game → identify starting fives per team.
   2. Load live_events ordered by action_number.
+     (parse_and_store_game passes both straight from the parsed payload.)
+     Events are converted once to compact _Event records (compact_events).
   3. Walk events in order, tracking the active 5-man lineup per team.
   4. Open a new stint when the game starts or when a substitution completes.
   5. Close the current stint on substitution, period boundary, or end of game.
@@ -21,12 +23,25 @@ lineup_key generation:
   - FALLBACK: sort concatenated tokens of "team_id:player_name:shirt_number"
     for each of the 5 players. This is stable until player_ids are resolved.
     Once player_ids are available the key can be regenerated without schema changes.
+
+Live games (incremental=True):
+  - The walk state after the last event is kept in a per-process checkpoint.
+    The next build reads only newer events, resumes a copy of the walk, and
+    replaces just the stints that were still open (provisional) last time.
+  - Any mismatch (no checkpoint, different stint count in the DB, failed
+    insert) falls back to the full rebuild above.
 """
 
 import os
+import sys
+import copy
+import uuid
 import logging
+import threading
 from typing import Optional
 
+from app.utils.helpers import is_missing_rpc_error, select_all_pages
+
 log = logging.getLogger("lineup_builder")
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -125,6 +140,18 @@ def build_lineup_key(players: list, team_id: str) -> str:
 # Core data loaders
 # ---------------------------------------------------------------------------
 
+_ROSTER_COLUMNS = "game_key, team_id, team_no, player_name, shirt_number, pno, starter, active, player_id"
+_EVENT_COLUMNS = (
+    "game_key, action_number, period, clock, team_id, team_no, player_id, "
+    "player_name, shirt_number, pno, action_type, sub_type, "
+    "success, scoring, score, team_score, opp_score, period_type"
+)
+
+
+# Games per bulk query: keeps the in.(...) filter well inside URL limits.
+GAME_KEY_CHUNK = int(os.getenv("LINEUP_GAME_KEY_CHUNK", "50"))
+
+
 def load_game_rosters(game_key: str) -> dict:
     """
     Load roster entries for *game_key* from game_rosters table.
@@ -136,48 +163,168 @@ def load_game_rosters(game_key: str) -> dict:
     """
     db = _get_db()
     try:
-        res = db.table("game_rosters").select(
-            "team_id, team_no, player_name, shirt_number, pno, starter, active, player_id"
-        ).eq("game_key", game_key).execute()
+        rows = select_all_pages(
+            lambda: db.table("game_rosters")
+            .select(_ROSTER_COLUMNS)
+            .eq("game_key", game_key)
+            .order("created_at")
+            .order("id")
+        )
     except Exception as exc:
         log.error("Failed to load game_rosters for %s: %s", game_key, exc)
         return {}
 
+    rosters = group_rosters(rows)
+    log.info("Loaded rosters for %d teams in game %s", len(rosters), game_key)
+    return rosters
+
+
+def group_rosters(rows: list) -> dict:
+    """Group game_rosters-shaped rows by team_id (rows without one are dropped)."""
     rosters: dict = {}
-    for row in res.data:
-        tid = row["team_id"]
+    for row in rows:
+        tid = row.get("team_id")
+        if not tid:
+            continue
         if tid not in rosters:
             rosters[tid] = []
         rosters[tid].append(row)
-
-    log.info("Loaded rosters for %d teams in game %s", len(rosters), game_key)
     return rosters
 
 
-def load_live_events(game_key: str) -> list:
+def load_live_events(game_key: str, after_action: Optional[int] = None) -> list:
     """
     Load all live_events for *game_key* ordered by action_number ascending.
+    With *after_action*, only events with a greater action_number are loaded.
+    Paginated, so long (overtime) games are not cut off at the max-rows limit.
     """
     db = _get_db()
+
+    def query():
+        q = db.table("live_events").select(_EVENT_COLUMNS).eq("game_key", game_key)
+        if after_action is not None:
+            q = q.gt("action_number", after_action)
+        return q.order("action_number", desc=False)
+
     try:
-        res = (
-            db.table("live_events")
-            .select(
-                "action_number, period, clock, team_id, team_no, player_id, "
-                "player_name, shirt_number, pno, action_type, sub_type, "
-                "success, scoring, score, team_score, opp_score, period_type"
-            )
-            .eq("game_key", game_key)
-            .order("action_number", desc=False)
-            .execute()
-        )
-        log.info("Loaded %d events for game %s", len(res.data), game_key)
-        return res.data
+        events = select_all_pages(query)
+        log.info("Loaded %d events for game %s", len(events), game_key)
+        return events
     except Exception as exc:
         log.error("Failed to load live_events for %s: %s", game_key, exc)
         return []
 
 
+# ---------------------------------------------------------------------------
+# Bulk loaders (multi-game backfills)
+# ---------------------------------------------------------------------------
+
+def _select_by_game(table: str, columns: str, game_keys: list, *order: str, convert=None) -> dict:
+    """
+    Paginated select of *table* rows for many games, GAME_KEY_CHUNK keys per
+    query, grouped by game_key (row order within a game follows *order*).
+    *convert*, if given, is applied to each game's rows as its chunk arrives,
+    so only one chunk of raw rows is alive at a time.
+    """
+    db = _get_db()
+    keys = list(dict.fromkeys(game_keys))
+    by_game: dict = {}
+    for i in range(0, len(keys), GAME_KEY_CHUNK):
+        chunk = keys[i:i + GAME_KEY_CHUNK]
+
+        def query(chunk=chunk):
+            q = db.table(table).select(columns).in_("game_key", chunk).order("game_key")
+            for col in order:
+                q = q.order(col)
+            return q
+
+        chunk_rows: dict = {}
+        for row in select_all_pages(query):
+            chunk_rows.setdefault(row["game_key"], []).append(row)
+        for gk, rows in chunk_rows.items():
+            by_game[gk] = convert(rows) if convert else rows
+    return by_game
+
+
+def load_rosters_for_games(game_keys: list) -> dict:
+    """
+    Load game_rosters for many games with a few paginated queries.
+
+    Returns
+    -------
+    dict  game_key → {team_id → list of roster rows}  (games with no rows are absent)
+    """
+    by_game = _select_by_game("game_rosters", _ROSTER_COLUMNS, game_keys, "created_at", "id")
+    return {gk: group_rosters(rows) for gk, rows in by_game.items()}
+
+
+def load_events_for_games(game_keys: list) -> dict:
+    """
+    Load live_events for many games with a few paginated queries.
+
+    Returns
+    -------
+    dict  game_key → compact event records ordered by action_number
+          (games with no rows are absent)
+    """
+    return _select_by_game("live_events", _EVENT_COLUMNS, game_keys, "action_number", convert=compact_events)
+
+
+def games_with_stints(game_keys: list) -> set:
+    """The subset of *game_keys* that already have lineup_stints rows."""
+    return set(_select_by_game("lineup_stints", "game_key", game_keys, "id"))
+
+
+# ---------------------------------------------------------------------------
+# Compact event records
+# ---------------------------------------------------------------------------
+
+def _team_index(team_no) -> int:
+    """LiveStats team_no ("1"/"2" or 1/2) as an int; 0 when missing or not numeric."""
+    try:
+        return int(str(team_no).strip())
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Event:
+    """
+    One live_events row, reduced to what the walk reads.
+
+    Normalisation the walk used to redo on every pass happens once here:
+    action/sub types are lowercased and interned, team_no becomes the integer
+    team index (see _team_index), success/scoring are bools and game_secs is pre-computed (None
+    when the row has no period, since the walk then uses the running one).
+    """
+    __slots__ = (
+        "action_number", "period", "clock", "game_secs", "action_type", "sub_type",
+        "team_idx", "team_id", "player_id", "player_name", "shirt_number", "pno",
+        "success", "scoring",
+    )
+
+    def __init__(self, row: dict):
+        intern = sys.intern
+        self.action_number = row.get("action_number")
+        self.period = row.get("period")
+        self.clock = row.get("clock")
+        self.game_secs = _event_game_secs(self.period, self.clock or "") if self.period else None
+        self.action_type = intern((row.get("action_type") or "").lower())
+        self.sub_type = intern((row.get("sub_type") or "").lower())
+        self.team_idx = _team_index(row.get("team_no"))
+        self.team_id = row.get("team_id")
+        self.player_id = row.get("player_id")
+        self.player_name = row.get("player_name")
+        self.shirt_number = row.get("shirt_number")
+        self.pno = row.get("pno")
+        self.success = bool(row.get("success"))
+        self.scoring = bool(row.get("scoring"))
+
+
+def compact_events(rows: list) -> list:
+    """Convert live_events rows (dicts) to _Event records; records pass through."""
+    return [r if isinstance(r, _Event) else _Event(r) for r in rows]
+
+
 # ---------------------------------------------------------------------------
 # Internal lineup state management
 # ---------------------------------------------------------------------------
@@ -511,33 +658,45 @@ def _find_definitive_match(active: dict, player: dict) -> Optional[str]:
     return None
 
 
-def _resolve_player_from_event(event: dict, roster: list) -> dict:
+def _roster_by_shirt(roster: list) -> dict:
+    """Stripped shirt number → first roster row wearing it."""
+    by_shirt: dict = {}
+    for r in roster:
+        shirt = str(r.get("shirt_number") or "").strip()
+        if shirt:
+            by_shirt.setdefault(shirt, r)
+    return by_shirt
+
+
+def _resolve_player_from_event(event: "_Event", roster: list, roster_by_shirt: Optional[dict] = None) -> dict:
     """
-    Build a player dict from a live_events row, optionally enriching from roster.
+    Build a player dict from a live_events record, optionally enriching from roster.
     Falls back to name-based roster lookup when shirt_number is absent (historical data).
     """
     player = {
-        "player_id": event.get("player_id"),
-        "player_name": event.get("player_name"),
-        "shirt_number": event.get("shirt_number") or event.get("pno"),
+        "player_id": event.player_id,
+        "player_name": event.player_name,
+        "shirt_number": event.shirt_number or event.pno,
     }
     if not roster:
         return player
 
-    shirt = str(event.get("shirt_number") or "").strip()
-    evt_name = (event.get("player_name") or "").strip()
+    shirt = str(event.shirt_number or "").strip()
+    evt_name = (event.player_name or "").strip()
 
     # Try shirt-number match first (most reliable)
     if shirt:
-        for r in roster:
-            if str(r.get("shirt_number") or "").strip() == shirt:
-                if not player["player_id"]:
-                    player["player_id"] = r.get("player_id")
-                if not player["shirt_number"]:
-                    player["shirt_number"] = r.get("shirt_number")
-                if not player["player_name"]:
-                    player["player_name"] = r.get("player_name")
-                return player
+        if roster_by_shirt is None:
+            roster_by_shirt = _roster_by_shirt(roster)
+        r = roster_by_shirt.get(shirt)
+        if r is not None:
+            if not player["player_id"]:
+                player["player_id"] = r.get("player_id")
+            if not player["shirt_number"]:
+                player["shirt_number"] = r.get("shirt_number")
+            if not player["player_name"]:
+                player["player_name"] = r.get("player_name")
+            return player
 
     # Fall back to name match (handles historical events where shirt_number is NULL)
     if evt_name:
@@ -553,6 +712,344 @@ def _resolve_player_from_event(event: dict, roster: list) -> dict:
     return player
 
 
+# ---------------------------------------------------------------------------
+# Event walk
+# ---------------------------------------------------------------------------
+
+class _GameWalk:
+    """
+    The lineup reconstruction state machine for one game.
+
+    feed() consumes events in action_number order and can be called
+    repeatedly as new events arrive; finish() closes whatever is still open
+    at the last event seen (pending subs, open possession, open stints) and
+    returns the stints it closed.  finish() is destructive, so live callers
+    deepcopy the walk first and keep the copy as their resume point.
+    """
+
+    def __init__(self, game_key: str, league_id: str, rosters_by_team: dict):
+        self.game_key = game_key
+        self.league_id = league_id
+
+        # --- Build team state objects ---
+        self.team_state: dict[str, _TeamLineup] = {}
+        self.team_roster_map: dict[str, list] = {}
+        self.roster_by_shirt: dict[str, dict] = {}
+
+        for team_id, roster in rosters_by_team.items():
+            tl = _TeamLineup(team_id=team_id, league_id=league_id, game_key=game_key)
+            starters = [p for p in roster if p.get("starter")]
+            if len(starters) != 5:
+                log.warning(
+                    "game=%s team=%s: found %d starters (expected 5); will use all active players as fallback",
+                    game_key, team_id, len(starters),
+                )
+                if len(starters) < 5:
+                    active = [p for p in roster if p.get("active", True)]
+                    starters = active[:5]
+
+            for s in starters[:5]:
+                player = {
+                    "player_id": s.get("player_id"),
+                    "player_name": s.get("player_name"),
+                    "shirt_number": s.get("shirt_number"),
+                }
+                key = _player_key(player)
+                tl.active[key] = player
+
+            self.team_state[team_id] = tl
+            self.team_roster_map[team_id] = roster
+            self.roster_by_shirt[team_id] = _roster_by_shirt(roster)
+
+        # Build a map from team index -> team_id (team_no is the 1 or 2 side key)
+        self.team_idx_to_id: dict[int, str] = {}
+        for team_id, roster in rosters_by_team.items():
+            for row in roster:
+                idx = _team_index(row.get("team_no"))
+                if idx:
+                    self.team_idx_to_id[idx] = team_id
+                    break
+
+        self.started = False
+        self.current_period = 1
+        self.last_event: Optional[_Event] = None
+
+        # Track which team currently has the ball so we can close open possessions
+        # at period boundaries and game end.  None = unknown (e.g. game start before
+        # first possession-changing event).
+        self.current_possessor_id: Optional[str] = None
+
+    @property
+    def last_action(self) -> int:
+        return (self.last_event.action_number if self.last_event else None) or 0
+
+    def completed_stints(self) -> list:
+        stints = []
+        for tl in self.team_state.values():
+            stints.extend(tl.completed_stints)
+        return stints
+
+    def completed_counts(self) -> dict:
+        return {tid: len(tl.completed_stints) for tid, tl in self.team_state.items()}
+
+    def stints_since(self, counts: dict) -> list:
+        """Stints completed after completed_counts() returned *counts*."""
+        stints = []
+        for tid, tl in self.team_state.items():
+            stints.extend(tl.completed_stints[counts.get(tid, 0):])
+        return stints
+
+    def _close_open_possession(self):
+        """
+        If a possession is in-flight (current_possessor_id is known), attribute
+        it to the active stints and return True.  Used at period/game boundaries.
+        """
+        team_state = self.team_state
+        current_possessor_id = self.current_possessor_id
+        if current_possessor_id and current_possessor_id in team_state:
+            team_state[current_possessor_id].possessions_for += 1
+            for _tid, _tl in team_state.items():
+                if _tid != current_possessor_id:
+                    _tl.possessions_against += 1
+            return True
+        return False
+
+    def _start(self, first_event: _Event):
+        # --- Open initial stints at game start ---
+        # Anchor to the period start (10:00 for regulation quarters, 5:00 for OT)
+        # rather than the first logged event clock, to avoid undercounting dead-ball
+        # time before the first action appears in the feed.
+        init_period = first_event.period or 1
+        period_dur = _period_duration(init_period)
+        init_clock = f"{period_dur // 60}:00"
+        init_secs = _period_start_secs(init_period)
+        init_action = first_event.action_number or 1
+        for tl in self.team_state.values():
+            if tl.active:
+                tl.open_stint(init_secs, init_action, init_clock, init_period)
+        self.current_period = first_event.period
+        self.started = True
+
+    def feed(self, events: list):
+        """Walk *events* (live_events rows or compact_events() records)."""
+        game_key = self.game_key
+        team_state = self.team_state
+        team_idx_to_id = self.team_idx_to_id
+
+        for evt in compact_events(events):
+            if not self.started:
+                self._start(evt)
+            self.last_event = evt
+
+            action_type = evt.action_type
+            clock = evt.clock or ""
+            action = evt.action_number or 0
+            if evt.period:
+                period = evt.period
+                game_secs = evt.game_secs
+            else:
+                period = self.current_period
+                game_secs = _event_game_secs(period, clock)
+
+            # --- Period boundary ---
+            if period != self.current_period:
+                new_period_start_clock = f"{_period_duration(period) // 60}:00"
+                # Close any open possession before flushing the period
+                self._close_open_possession()
+                self.current_possessor_id = None
+                for tl in team_state.values():
+                    # Flush any pending subs before closing period
+                    tl.flush_pending_subs(
+                        _event_game_secs(self.current_period, "00:00"),
+                        action, "00:00", self.current_period
+                    )
+                    tl.period_break(
+                        _event_game_secs(self.current_period, "00:00"),
+                        action, "00:00", period, new_period_start_clock
+                    )
+                self.current_period = period
+
+            # --- Get the teams involved ---
+            team_idx = evt.team_idx
+            event_team_id = team_idx_to_id.get(team_idx) or evt.team_id
+
+            # --- Substitution event ---
+            if action_type == "substitution":
+                direction = evt.sub_type
+                if direction not in ("in", "out"):
+                    log.debug("game=%s: unknown sub sub_type '%s' at action %d", game_key, direction, action)
+                    continue
+
+                if event_team_id and event_team_id in team_state:
+                    roster = self.team_roster_map.get(event_team_id, [])
+                    player = _resolve_player_from_event(evt, roster, self.roster_by_shirt[event_team_id])
+                    tl = team_state[event_team_id]
+                    tl.buffer_sub(direction, player, action)
+
+                    # Check if we have a complete in+out pair buffered → flush
+                    pending = tl._pending_subs
+                    outs = [p for p in pending if p[1] == "out"]
+                    ins = [p for p in pending if p[1] == "in"]
+                    if len(outs) == len(ins) and len(outs) > 0:
+                        tl.flush_pending_subs(game_secs, action, clock, period)
+                else:
+                    log.warning(
+                        "game=%s: substitution event at action %d has unknown team_no=%s",
+                        game_key, action, team_idx,
+                    )
+                continue
+
+            # --- For any non-sub event, flush pending subs first ---
+            for tl in team_state.values():
+                if tl._pending_subs:
+                    tl.flush_pending_subs(game_secs, action, clock, period)
+
+            # --- Stat attribution ---
+            if action_type in ("2pt", "3pt", "freethrow"):
+                success = evt.success
+                scoring = evt.scoring
+
+                # Points scored this play
+                pts = 0
+                if success and scoring:
+                    if action_type == "2pt":
+                        pts = 2
+                    elif action_type == "3pt":
+                        pts = 3
+                    elif action_type == "freethrow":
+                        pts = 1
+
+                if event_team_id and event_team_id in team_state:
+                    team_state[event_team_id].add_stat(action_type, "", success, scoring, pts)
+
+                # Points against for the opponent
+                if pts > 0:
+                    for tid, tl in team_state.items():
+                        if tid != event_team_id:
+                            tl.add_points_against(pts)
+
+            elif action_type == "rebound":
+                sub_type = evt.sub_type
+                if event_team_id and event_team_id in team_state:
+                    team_state[event_team_id].add_stat("rebound", sub_type, True, False)
+
+            elif action_type in ("turnover", "foul", "steal", "block", "assist"):
+                if event_team_id and event_team_id in team_state:
+                    team_state[event_team_id].add_stat(action_type, "", True, False)
+
+            # --- Possession attribution ---
+            # Possessions are tracked via explicit ownership (current_possessor_id).
+            # A possession ends on: made FG, turnover, or defensive rebound.
+            # Offensive rebounds continue the same possession (possessor unchanged).
+            # Period/game boundaries close any open possession via _close_open_possession().
+            # Free throws are not counted as independent possession enders; the surrounding
+            # made FG or defensive rebound after the last missed FT covers the sequence.
+            if action_type in ("2pt", "3pt"):
+                success = evt.success
+                scoring = evt.scoring
+                if success and scoring and event_team_id and event_team_id in team_state:
+                    # Scoring team's possession ended with a make
+                    team_state[event_team_id].possessions_for += 1
+                    for tid, tl in team_state.items():
+                        if tid != event_team_id:
+                            tl.possessions_against += 1
+                    # Opponent now has possession
+                    self.current_possessor_id = next(
+                        (tid for tid in team_state if tid != event_team_id), None
+                    )
+
+            elif action_type == "turnover":
+                if event_team_id and event_team_id in team_state:
+                    team_state[event_team_id].possessions_for += 1
+                    for tid, tl in team_state.items():
+                        if tid != event_team_id:
+                            tl.possessions_against += 1
+                    # Opponent gains possession
+                    self.current_possessor_id = next(
+                        (tid for tid in team_state if tid != event_team_id), None
+                    )
+
+            elif action_type == "rebound":
+                reb_sub_type = evt.sub_type
+                if reb_sub_type == "defensive" and event_team_id and event_team_id in team_state:
+                    # Defensive rebound: the team that missed (NOT the rebounder) ends their possession
+                    team_state[event_team_id].possessions_against += 1
+                    for tid, tl in team_state.items():
+                        if tid != event_team_id:
+                            tl.possessions_for += 1
+                    # Rebounder now has possession
+                    self.current_possessor_id = event_team_id
+                elif reb_sub_type == "offensive" and event_team_id and event_team_id in team_state:
+                    # Offensive rebound: same team retains possession
+                    self.current_possessor_id = event_team_id
+
+            # --- End-of-game / end-of-period markers ---
+            if action_type in ("gameend", "endofgame", "endofperiod", "periodend"):
+                # Close any possession still open at the buzzer
+                self._close_open_possession()
+                self.current_possessor_id = None
+                for tl in team_state.values():
+                    tl.close_stint(game_secs, action, clock)
+                    tl.stint_start_action = None  # don't reopen
+
+    def finish(self) -> list:
+        """Close everything still open at the last event; return the stints this closed."""
+        counts = self.completed_counts()
+        last_evt = self.last_event
+        if last_evt:
+            last_period = last_evt.period or self.current_period
+            last_clock = last_evt.clock or "00:00"
+            last_action = last_evt.action_number or 0
+            last_secs = _event_game_secs(last_period, last_clock)
+            # Close any possession still open at the true end of the game
+            self._close_open_possession()
+            for tl in self.team_state.values():
+                if tl._pending_subs:
+                    tl.flush_pending_subs(last_secs, last_action, last_clock, last_period)
+                tl.close_stint(last_secs, last_action, last_clock)
+        return self.stints_since(counts)
+
+
+# ---------------------------------------------------------------------------
+# Live-game checkpoints
+# ---------------------------------------------------------------------------
+# game_key -> {
+#     "league_id":       league the walk was built for,
+#     "walk":            _GameWalk after the last event fed (before finish()),
+#     "rosters":         rosters_by_team used for the walk and player expansion,
+#     "provisional_ids": lineup_stints ids of the stints finish() closed, which
+#                        are still open in reality and get replaced next time,
+#     "rows_written":    lineup_stints rows this process left for the game,
+# }
+# Process-local: after a restart (or if another process rewrote the game) the
+# next build is a full one.  Each entry holds deep copies of a walk, so at most
+# LINEUP_CHECKPOINT_MAX games are kept; the least recently saved is dropped
+# first (its next build is simply a full one).
+LINEUP_CHECKPOINT_MAX = int(os.environ.get("LINEUP_CHECKPOINT_MAX", "64"))
+_checkpoints: dict = {}
+_checkpoints_lock = threading.Lock()
+
+
+def forget_checkpoint(game_key: str):
+    with _checkpoints_lock:
+        _checkpoints.pop(game_key, None)
+
+
+def _save_checkpoint(game_key: str, league_id: str, walk: _GameWalk, rosters_by_team: dict,
+                     provisional_ids: list, rows_written: int):
+    with _checkpoints_lock:
+        _checkpoints.pop(game_key, None)
+        _checkpoints[game_key] = {
+            "league_id": league_id,
+            "walk": walk,
+            "rosters": rosters_by_team,
+            "provisional_ids": provisional_ids,
+            "rows_written": rows_written,
+        }
+        while len(_checkpoints) > LINEUP_CHECKPOINT_MAX:
+            _checkpoints.pop(next(iter(_checkpoints)))
+
+
 # ---------------------------------------------------------------------------
 # Main lineup reconstruction function
 # ---------------------------------------------------------------------------
@@ -561,6 +1058,9 @@ def build_lineups_for_game(
     game_key: str,
     league_id: str,
     dry_run: bool = False,
+    incremental: bool = False,
+    roster_rows: Optional[list] = None,
+    events: Optional[list] = None,
 ) -> bool:
     """
     Reconstruct 5-man lineups for *game_key* and write to lineup_stints
@@ -568,267 +1068,58 @@ def build_lineups_for_game(
 
     Parameters
     ----------
-    game_key  : str   The game identifier.
-    league_id : str   UUID of the league (for FK population).
-    dry_run   : bool  If True, compute stints but do NOT write to Supabase.
+    game_key    : str   The game identifier.
+    league_id   : str   UUID of the league (for FK population).
+    dry_run     : bool  If True, compute stints but do NOT write to Supabase.
+    incremental : bool  Live-game mode: resume from this process's checkpoint
+                        for the game, read only events after it, and replace
+                        only the stints that are still open.  Falls back to a
+                        full rebuild when there is no usable checkpoint.
+    roster_rows : list  Optional game_rosters-shaped rows already in memory.
+    events      : list  Optional live_events-shaped rows, ordered by
+                        action_number.  When both are given (the parser
+                        passes what it just wrote) game_rosters and
+                        live_events are not read back; backfills leave them
+                        out and read from the DB.
 
     Returns
     -------
     bool  True on success, False on unrecoverable error.
     """
-    log.info("Starting lineup build for game=%s (dry_run=%s)", game_key, dry_run)
+    log.info("Starting lineup build for game=%s (dry_run=%s incremental=%s)", game_key, dry_run, incremental)
+
+    in_memory = bool(roster_rows) and bool(events)
+    if not in_memory:
+        events = None
+
+    if incremental and not dry_run:
+        result = _build_incremental(game_key, league_id, events)
+        if result is not None:
+            return result
+    else:
+        forget_checkpoint(game_key)
 
     # --- Load rosters ---
-    rosters_by_team = load_game_rosters(game_key)
+    rosters_by_team = group_rosters(roster_rows) if in_memory else load_game_rosters(game_key)
     if not rosters_by_team:
         log.warning("game=%s: no roster data, skipping lineup build", game_key)
         return False
 
     # --- Load events ---
-    events = load_live_events(game_key)
+    if not in_memory:
+        events = load_live_events(game_key)
     if not events:
         log.warning("game=%s: no live_events, skipping lineup build", game_key)
         return False
 
-    # --- Build team state objects ---
-    team_state: dict[str, _TeamLineup] = {}
-    team_roster_map: dict[str, list] = {}
-
-    for team_id, roster in rosters_by_team.items():
-        tl = _TeamLineup(team_id=team_id, league_id=league_id, game_key=game_key)
-        starters = [p for p in roster if p.get("starter")]
-        if len(starters) != 5:
-            log.warning(
-                "game=%s team=%s: found %d starters (expected 5); will use all active players as fallback",
-                game_key, team_id, len(starters),
-            )
-            if len(starters) < 5:
-                active = [p for p in roster if p.get("active", True)]
-                starters = active[:5]
-
-        for s in starters[:5]:
-            player = {
-                "player_id": s.get("player_id"),
-                "player_name": s.get("player_name"),
-                "shirt_number": s.get("shirt_number"),
-            }
-            key = _player_key(player)
-            tl.active[key] = player
-
-        team_state[team_id] = tl
-        team_roster_map[team_id] = roster
-
-    # Build a map from team_no -> team_id (team_no is the "1" or "2" side key)
-    team_no_to_id: dict[str, str] = {}
-    for team_id, roster in rosters_by_team.items():
-        for row in roster:
-            tno = str(row.get("team_no") or "").strip()
-            if tno:
-                team_no_to_id[tno] = team_id
-                break
-
-    # --- Open initial stints at game start ---
-    # Anchor to the period start (10:00 for regulation quarters, 5:00 for OT)
-    # rather than the first logged event clock, to avoid undercounting dead-ball
-    # time before the first action appears in the feed.
-    first_event = events[0] if events else None
-    if first_event:
-        init_period = first_event.get("period") or 1
-        period_dur = _period_duration(init_period)
-        init_clock = f"{period_dur // 60}:00"
-        init_secs = _period_start_secs(init_period)
-        init_action = first_event.get("action_number") or 1
-        for tl in team_state.values():
-            if tl.active:
-                tl.open_stint(init_secs, init_action, init_clock, init_period)
-
     # --- Walk events ---
-    current_period = first_event.get("period") if first_event else 1
-
-    # Track which team currently has the ball so we can close open possessions
-    # at period boundaries and game end.  None = unknown (e.g. game start before
-    # first possession-changing event).
-    current_possessor_id: Optional[str] = None
-
-    def _close_open_possession():
-        """
-        If a possession is in-flight (current_possessor_id is known), attribute
-        it to the active stints and return True.  Used at period/game boundaries.
-        """
-        if current_possessor_id and current_possessor_id in team_state:
-            team_state[current_possessor_id].possessions_for += 1
-            for _tid, _tl in team_state.items():
-                if _tid != current_possessor_id:
-                    _tl.possessions_against += 1
-            return True
-        return False
-
-    for evt in events:
-        action_type = (evt.get("action_type") or "").lower()
-        period = evt.get("period") or current_period
-        clock = evt.get("clock") or ""
-        action = evt.get("action_number") or 0
-        game_secs = _event_game_secs(period, clock)
-
-        # --- Period boundary ---
-        if period != current_period:
-            new_period_start_clock = f"{_period_duration(period) // 60}:00"
-            # Close any open possession before flushing the period
-            _close_open_possession()
-            current_possessor_id = None
-            for tl in team_state.values():
-                # Flush any pending subs before closing period
-                tl.flush_pending_subs(
-                    _event_game_secs(current_period, "00:00"),
-                    action, "00:00", current_period
-                )
-                tl.period_break(
-                    _event_game_secs(current_period, "00:00"),
-                    action, "00:00", period, new_period_start_clock
-                )
-            current_period = period
-
-        # --- Get the teams involved ---
-        team_no = str(evt.get("team_no") or "").strip()
-        event_team_id = team_no_to_id.get(team_no) or evt.get("team_id")
-
-        # --- Substitution event ---
-        if action_type == "substitution":
-            direction = (evt.get("sub_type") or "").lower()
-            if direction not in ("in", "out"):
-                log.debug("game=%s: unknown sub sub_type '%s' at action %d", game_key, direction, action)
-                continue
-
-            if event_team_id and event_team_id in team_state:
-                roster = team_roster_map.get(event_team_id, [])
-                player = _resolve_player_from_event(evt, roster)
-                tl = team_state[event_team_id]
-                tl.buffer_sub(direction, player, action)
-
-                # Check if we have a complete in+out pair buffered → flush
-                pending = tl._pending_subs
-                outs = [p for p in pending if p[1] == "out"]
-                ins = [p for p in pending if p[1] == "in"]
-                if len(outs) == len(ins) and len(outs) > 0:
-                    tl.flush_pending_subs(game_secs, action, clock, period)
-            else:
-                log.warning(
-                    "game=%s: substitution event at action %d has unknown team_no=%s",
-                    game_key, action, team_no,
-                )
-            continue
-
-        # --- For any non-sub event, flush pending subs first ---
-        for tl in team_state.values():
-            if tl._pending_subs:
-                tl.flush_pending_subs(game_secs, action, clock, period)
-
-        # --- Stat attribution ---
-        if action_type in ("2pt", "3pt", "freethrow"):
-            success = bool(evt.get("success"))
-            scoring = bool(evt.get("scoring"))
-
-            # Points scored this play
-            pts = 0
-            if success and scoring:
-                if action_type == "2pt":
-                    pts = 2
-                elif action_type == "3pt":
-                    pts = 3
-                elif action_type == "freethrow":
-                    pts = 1
-
-            if event_team_id and event_team_id in team_state:
-                team_state[event_team_id].add_stat(action_type, "", success, scoring, pts)
-
-            # Points against for the opponent
-            if pts > 0:
-                for tid, tl in team_state.items():
-                    if tid != event_team_id:
-                        tl.add_points_against(pts)
-
-        elif action_type == "rebound":
-            sub_type = (evt.get("sub_type") or "").lower()
-            if event_team_id and event_team_id in team_state:
-                team_state[event_team_id].add_stat("rebound", sub_type, True, False)
-
-        elif action_type in ("turnover", "foul", "steal", "block", "assist"):
-            if event_team_id and event_team_id in team_state:
-                team_state[event_team_id].add_stat(action_type, "", True, False)
-
-        # --- Possession attribution ---
-        # Possessions are tracked via explicit ownership (current_possessor_id).
-        # A possession ends on: made FG, turnover, or defensive rebound.
-        # Offensive rebounds continue the same possession (possessor unchanged).
-        # Period/game boundaries close any open possession via _close_open_possession().
-        # Free throws are not counted as independent possession enders; the surrounding
-        # made FG or defensive rebound after the last missed FT covers the sequence.
-        if action_type in ("2pt", "3pt"):
-            success = bool(evt.get("success"))
-            scoring = bool(evt.get("scoring"))
-            if success and scoring and event_team_id and event_team_id in team_state:
-                # Scoring team's possession ended with a make
-                team_state[event_team_id].possessions_for += 1
-                for tid, tl in team_state.items():
-                    if tid != event_team_id:
-                        tl.possessions_against += 1
-                # Opponent now has possession
-                current_possessor_id = next(
-                    (tid for tid in team_state if tid != event_team_id), None
-                )
-
-        elif action_type == "turnover":
-            if event_team_id and event_team_id in team_state:
-                team_state[event_team_id].possessions_for += 1
-                for tid, tl in team_state.items():
-                    if tid != event_team_id:
-                        tl.possessions_against += 1
-                # Opponent gains possession
-                current_possessor_id = next(
-                    (tid for tid in team_state if tid != event_team_id), None
-                )
-
-        elif action_type == "rebound":
-            reb_sub_type = (evt.get("sub_type") or "").lower()
-            if reb_sub_type == "defensive" and event_team_id and event_team_id in team_state:
-                # Defensive rebound: the team that missed (NOT the rebounder) ends their possession
-                team_state[event_team_id].possessions_against += 1
-                for tid, tl in team_state.items():
-                    if tid != event_team_id:
-                        tl.possessions_for += 1
-                # Rebounder now has possession
-                current_possessor_id = event_team_id
-            elif reb_sub_type == "offensive" and event_team_id and event_team_id in team_state:
-                # Offensive rebound: same team retains possession
-                current_possessor_id = event_team_id
-
-        # --- End-of-game / end-of-period markers ---
-        if action_type in ("gameend", "endofgame", "endofperiod", "periodend"):
-            # Close any possession still open at the buzzer
-            _close_open_possession()
-            current_possessor_id = None
-            for tl in team_state.values():
-                tl.close_stint(game_secs, action, clock)
-                tl.stint_start_action = None  # don't reopen
-
-    # --- Close any still-open stints ---
-    last_evt = events[-1] if events else None
-    if last_evt:
-        last_period = last_evt.get("period") or current_period
-        last_clock = last_evt.get("clock") or "00:00"
-        last_action = last_evt.get("action_number") or 0
-        last_secs = _event_game_secs(last_period, last_clock)
-        # Close any possession still open at the true end of the game
-        _close_open_possession()
-        for tl in team_state.values():
-            if tl._pending_subs:
-                tl.flush_pending_subs(last_secs, last_action, last_clock, last_period)
-            tl.close_stint(last_secs, last_action, last_clock)
+    walk = _GameWalk(game_key, league_id, rosters_by_team)
+    walk.feed(events)
+    checkpoint = copy.deepcopy(walk) if incremental else None
+    provisional = walk.finish()
 
     # --- Collect all stints ---
-    all_stints = []
-    for tl in team_state.values():
-        all_stints.extend(tl.completed_stints)
+    all_stints = walk.completed_stints()
 
     log.info("game=%s: generated %d lineup stints", game_key, len(all_stints))
 
@@ -842,90 +1133,228 @@ def build_lineups_for_game(
 
     # --- Write to Supabase ---
     db = _get_db()
+    inserted, player_rows = _write_stints(db, game_key, league_id, all_stints, rosters_by_team)
 
-    # Delete existing stints for this game first (idempotent).
-    # Fetch IDs first then delete in small batches to avoid Supabase statement timeouts
-    # that occur when deleting many rows via a single filter query.
-    _delete_by_game_key(db, "lineup_stints", game_key)
-    _delete_by_game_key(db, "player_on_court_stints", game_key)
+    if checkpoint is not None:
+        if len(inserted) == len(all_stints):
+            provisional_ids = [s["id"] for s in provisional]
+            _save_checkpoint(game_key, league_id, checkpoint, rosters_by_team, provisional_ids, len(inserted))
+        else:
+            forget_checkpoint(game_key)
+
+    log.info(
+        "game=%s: wrote %d lineup stints, %d player on-court rows",
+        game_key, len(all_stints), len(player_rows),
+    )
+    return True
 
-    # Insert lineup_stints in chunks
-    _bulk_insert(db, "lineup_stints", all_stints, game_key)
 
-    # --- Reload inserted stints to get their IDs ---
+def _build_incremental(game_key: str, league_id: str, events: Optional[list] = None) -> Optional[bool]:
+    """
+    Resume the checkpointed walk for a live game.
+
+    Only events after the checkpoint are read (or taken from *events*, the
+    in-memory feed, when given).  Stints that were closed
+    before the checkpoint are final and stay as written; the provisional
+    stints from the previous build (the lineups that were still on court)
+    are deleted and replaced by whatever the resumed walk produces.
+
+    Returns None when there is no usable checkpoint, so the caller does a
+    full rebuild.
+    """
+    with _checkpoints_lock:
+        cp = _checkpoints.get(game_key)
+    if not cp or cp["league_id"] != league_id:
+        return None
+
+    db = _get_db()
+
+    # Another process (backfill, admin rebuild) may have rewritten the game
+    # since our last build; the stint count is a cheap way to notice.
     try:
-        stint_rows = (
+        res = (
             db.table("lineup_stints")
-            .select("id, team_id, lineup_key, period, start_game_secs, end_game_secs, "
-                    "seconds_played, points_for, points_against, possessions_for, possessions_against, "
-                    "lineup_player_ids, lineup_names")
+            .select("id", count="exact")
             .eq("game_key", game_key)
+            .limit(1)
             .execute()
         )
     except Exception as exc:
-        log.error("game=%s: failed to reload lineup_stints for player expansion: %s", game_key, exc)
-        return True  # stints were written, player rows failed
+        log.warning("game=%s: could not verify lineup checkpoint, rebuilding: %s", game_key, exc)
+        forget_checkpoint(game_key)
+        return None
+    if res.count != cp["rows_written"]:
+        log.info(
+            "game=%s: lineup_stints has %s rows, checkpoint expected %d; rebuilding",
+            game_key, res.count, cp["rows_written"],
+        )
+        forget_checkpoint(game_key)
+        return None
+
+    resume_from = cp["walk"].last_action
+    if events is not None:
+        events = [e for e in events if (e.get("action_number") or 0) > resume_from]
+    else:
+        events = load_live_events(game_key, after_action=resume_from)
+    if not events:
+        log.info("game=%s: no events after action %d, lineups unchanged", game_key, resume_from)
+        return True
+
+    walk = copy.deepcopy(cp["walk"])
+    counts = walk.completed_counts()
+    walk.feed(events)
+    checkpoint = copy.deepcopy(walk)
+    provisional = walk.finish()
+    new_stints = walk.stints_since(counts)
+
+    old_ids = cp["provisional_ids"]
+    inserted, player_rows = _write_stints(db, game_key, league_id, new_stints, cp["rosters"], delete_ids=old_ids)
+
+    if len(inserted) == len(new_stints):
+        provisional_ids = [s["id"] for s in provisional]
+        rows_written = cp["rows_written"] - len(old_ids) + len(inserted)
+        _save_checkpoint(game_key, league_id, checkpoint, cp["rosters"], provisional_ids, rows_written)
+    else:
+        forget_checkpoint(game_key)
+
+    log.info(
+        "game=%s: resumed after action %d with %d events; replaced %d provisional stints "
+        "with %d stints, %d player on-court rows",
+        game_key, resume_from, len(events), len(old_ids), len(inserted), len(player_rows),
+    )
+    return True
+
+
+def compute_stints(game_key: str, league_id: str, rosters_by_team: dict, events: list) -> list:
+    """
+    Walk *events* and return every stint, with no DB access.  Used by the
+    parallel backfill, which runs this in worker processes.
+    """
+    walk = _GameWalk(game_key, league_id, rosters_by_team)
+    walk.feed(events)
+    walk.finish()
+    return walk.completed_stints()
+
+
+def write_stints(game_key: str, league_id: str, stints: list, rosters_by_team: dict) -> tuple[list, list]:
+    """
+    Replace every lineup_stints / player_on_court_stints row for *game_key*
+    with *stints*.  Returns (stints written, player rows written).
+    """
+    forget_checkpoint(game_key)
+    return _write_stints(_get_db(), game_key, league_id, stints, rosters_by_team)
+
+
+# ---------------------------------------------------------------------------
+# Writing stints
+# ---------------------------------------------------------------------------
+# replace_game_lineups (migrations/lineup_replace_rpc.sql) swaps the rows in
+# one transaction; flips to False the first time it turns out not to be
+# deployed, after which the chunked delete + insert path is used.
+_replace_rpc_available = True
+
+
+def _write_stints(db, game_key: str, league_id: str, stints: list, rosters_by_team: dict,
+                  delete_ids: Optional[list] = None) -> tuple[list, list]:
+    """
+    Replace the game's stints (or only *delete_ids*, when given) with *stints*
+    and their player_on_court_stints rows.
+
+    Returns (stints written, player rows written).
+    """
+    global _replace_rpc_available
+
+    # Stint ids are generated here, so the player expansion needs no
+    # read-back of the inserted rows.
+    _assign_ids(stints)
+    player_rows = _expand_player_rows(stints, rosters_by_team, game_key, league_id)
+
+    if _replace_rpc_available:
+        try:
+            db.rpc("replace_game_lineups", {
+                "p_game_key": game_key,
+                "p_stints": stints,
+                "p_players": player_rows,
+                "p_delete_ids": delete_ids,
+            }).execute()
+            return stints, player_rows
+        except Exception as exc:
+            if is_missing_rpc_error(exc):
+                log.warning("replace_game_lineups RPC not deployed — falling back to chunked delete/insert")
+                _replace_rpc_available = False
+            else:
+                log.error("game=%s: replace_game_lineups failed, falling back to chunked writes: %s", game_key, exc)
+
+    # Delete existing stints first (idempotent).
+    # Fetch IDs first then delete in small batches to avoid Supabase statement timeouts
+    # that occur when deleting many rows via a single filter query.
+    if delete_ids is None:
+        _delete_by_game_key(db, "lineup_stints", game_key)
+        _delete_by_game_key(db, "player_on_court_stints", game_key)
+    else:
+        _delete_by_ids(db, "player_on_court_stints", "stint_id", delete_ids, game_key)
+        _delete_by_ids(db, "lineup_stints", "id", delete_ids, game_key)
+
+    inserted = _bulk_insert(db, "lineup_stints", stints, game_key)
+    # Only expand the stints that made it in
+    if len(inserted) != len(stints):
+        player_rows = _expand_player_rows(inserted, rosters_by_team, game_key, league_id)
+    _bulk_insert(db, "player_on_court_stints", player_rows, game_key)
+    return inserted, player_rows
+
+
+def _assign_ids(stints: list):
+    """Give each stint a client-generated lineup_stints id (uuid4, like gen_random_uuid)."""
+    for stint in stints:
+        stint["id"] = str(uuid.uuid4())
+
+
+def _expand_player_rows(stints: list, rosters_by_team: dict, game_key: str, league_id: str) -> list:
+    """One player_on_court_stints row per player in each inserted stint."""
+    # Shirt-number lookups, built once per team rather than once per stint.
+    lookups = {}
+    for team_id, roster in rosters_by_team.items():
+        lookups[team_id] = (
+            {str(r.get("player_id")): r for r in roster if r.get("player_id")},
+            {(r.get("player_name") or "").strip().lower(): r for r in roster},
+        )
+    no_roster = ({}, {})
 
-    # --- Build player_on_court_stints ---
     player_rows = []
-    for stint_row in stint_rows.data:
-        stint_id = stint_row["id"]
-        team_id = stint_row["team_id"]
-        lineup_key = stint_row["lineup_key"]
-        period = stint_row.get("period")
-        start_secs = stint_row.get("start_game_secs")
-        end_secs = stint_row.get("end_game_secs")
-        secs_played = stint_row.get("seconds_played", 0)
-        pts_for = stint_row.get("points_for", 0)
-        pts_against = stint_row.get("points_against", 0)
-        poss_for = stint_row.get("possessions_for", 0)
-        poss_against = stint_row.get("possessions_against", 0)
-
-        player_ids = stint_row.get("lineup_player_ids") or []
-        player_names = stint_row.get("lineup_names") or []
-
-        # Look up shirt numbers from rosters
-        roster = rosters_by_team.get(team_id, [])
-        roster_by_pid = {str(r.get("player_id")): r for r in roster if r.get("player_id")}
-        roster_by_name = {(r.get("player_name") or "").strip().lower(): r for r in roster}
+    for stint in stints:
+        roster_by_pid, roster_by_name = lookups.get(stint["team_id"], no_roster)
+        shared = {
+            "stint_id": stint["id"],
+            "game_key": game_key,
+            "league_id": league_id,
+            "team_id": stint["team_id"],
+            "lineup_key": stint["lineup_key"],
+            "period": stint.get("period"),
+            "start_game_secs": stint.get("start_game_secs"),
+            "end_game_secs": stint.get("end_game_secs"),
+            "seconds_played": stint.get("seconds_played", 0),
+            "points_for": stint.get("points_for", 0),
+            "points_against": stint.get("points_against", 0),
+            "possessions_for": stint.get("possessions_for", 0),
+            "possessions_against": stint.get("possessions_against", 0),
+        }
+
+        player_ids = stint.get("lineup_player_ids") or []
+        player_names = stint.get("lineup_names") or []
 
         for i, pid in enumerate(player_ids):
             name = player_names[i] if i < len(player_names) else None
-            shirt = None
-            roster_row = None
-            if pid:
-                roster_row = roster_by_pid.get(str(pid))
+            roster_row = roster_by_pid.get(str(pid)) if pid else None
             if not roster_row and name:
-                roster_row = roster_by_name.get((name or "").strip().lower())
-            if roster_row:
-                shirt = roster_row.get("shirt_number")
+                roster_row = roster_by_name.get(name.strip().lower())
 
             player_rows.append({
-                "stint_id": stint_id,
-                "game_key": game_key,
-                "league_id": league_id,
-                "team_id": team_id,
+                **shared,
                 "player_id": pid or None,
                 "player_name": name,
-                "shirt_number": shirt,
-                "lineup_key": lineup_key,
-                "period": period,
-                "start_game_secs": start_secs,
-                "end_game_secs": end_secs,
-                "seconds_played": secs_played,
-                "points_for": pts_for,
-                "points_against": pts_against,
-                "possessions_for": poss_for,
-                "possessions_against": poss_against,
+                "shirt_number": roster_row.get("shirt_number") if roster_row else None,
             })
-
-    _bulk_insert(db, "player_on_court_stints", player_rows, game_key)
-
-    log.info(
-        "game=%s: wrote %d lineup stints, %d player on-court rows",
-        game_key, len(all_stints), len(player_rows),
-    )
-    return True
+    return player_rows
 
 
 # ---------------------------------------------------------------------------
@@ -951,13 +1380,15 @@ def _delete_by_game_key(db, table: str, game_key: str, chunk_size: int = 50):
         log.warning("game=%s: could not fetch IDs from %s for deletion: %s", game_key, table, exc)
         return
 
-    if not ids:
-        return
+    _delete_by_ids(db, table, "id", ids, game_key, chunk_size)
+
 
+def _delete_by_ids(db, table: str, column: str, ids: list, game_key: str, chunk_size: int = 50):
+    """Delete rows whose *column* is in *ids*, in small batches."""
     for i in range(0, len(ids), chunk_size):
         batch = ids[i:i + chunk_size]
         try:
-            db.table(table).delete().in_("id", batch).execute()
+            db.table(table).delete().in_(column, batch).execute()
         except Exception as exc:
             log.error(
                 "game=%s: failed deleting batch from %s (offset=%d): %s",
@@ -965,12 +1396,17 @@ def _delete_by_game_key(db, table: str, game_key: str, chunk_size: int = 50):
             )
 
 
-def _bulk_insert(db, table: str, rows: list, game_key: str, chunk_size: int = 200):
-    if not rows:
-        return
+def _bulk_insert(db, table: str, rows: list, game_key: str, chunk_size: int = 200) -> list:
+    """
+    Insert rows in chunks without asking for them back (returning=minimal).
+    Returns the rows from the chunks that succeeded.
+    """
+    inserted = []
     for i in range(0, len(rows), chunk_size):
         chunk = rows[i:i + chunk_size]
         try:
-            db.table(table).insert(chunk).execute()
+            db.table(table).insert(chunk, returning="minimal").execute()
+            inserted.extend(chunk)
         except Exception as exc:
             log.error("game=%s: failed inserting chunk into %s (offset=%d): %s", game_key, table, i, exc)
+    return inserted
@@ -0,0 +1,143 @@
+"""
+livestats_http.py
+-----------------
+Shared, pooled HTTP client for FIBA LiveStats
+(fibalivestats.dcd.shared.geniussports.com).
+
+Every LiveStats fetcher (worker, json_parser, live_parser and the backfill
+scripts) goes through one process-wide httpx.Client, so repeated polls reuse
+kept-alive TLS connections instead of paying a fresh TCP+TLS handshake per
+request.  HTTP/2 is negotiated when the h2 package is installed (it ships with
+supabase's httpx[http2] dependency); otherwise the client speaks HTTP/1.1.
+
+Connect errors, 429 and 5xx responses are retried with exponential backoff.
+403/404 are returned as-is: the worker treats them as "game not ready yet".
+
+Environment variables:
+    LIVESTATS_POOL_SIZE        max open connections (default: 20)
+    LIVESTATS_KEEPALIVE        max idle keep-alive connections (default: 10)
+    LIVESTATS_KEEPALIVE_SECS   idle connection expiry in seconds (default: 60)
+    LIVESTATS_MAX_RETRIES      retries after the first attempt (default: 2)
+    LIVESTATS_BACKOFF_SECS     base backoff, doubled per retry (default: 0.5)
+"""
+
+import os
+import time
+import logging
+import threading
+
+import httpx
+
+log = logging.getLogger("livestats_http")
+
+LIVESTATS_BASE = "https://fibalivestats.dcd.shared.geniussports.com/data"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "SwishAssistant/1.0 (LiveStats)",
+    "Accept": "application/json",
+}
+
+POOL_SIZE = int(os.environ.get("LIVESTATS_POOL_SIZE", "20"))
+KEEPALIVE = int(os.environ.get("LIVESTATS_KEEPALIVE", "10"))
+KEEPALIVE_SECS = float(os.environ.get("LIVESTATS_KEEPALIVE_SECS", "60"))
+MAX_RETRIES = int(os.environ.get("LIVESTATS_MAX_RETRIES", "2"))
+BACKOFF_SECS = float(os.environ.get("LIVESTATS_BACKOFF_SECS", "0.5"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+_client = None
+_client_lock = threading.Lock()
+
+_counters = {"requests": 0, "new_connections": 0, "reused_connections": 0, "retries": 0}
+_counters_lock = threading.Lock()
+
+
+def _get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=HTTP2_ENABLED,
+                    headers=DEFAULT_HEADERS,
+                    limits=httpx.Limits(
+                        max_connections=POOL_SIZE,
+                        max_keepalive_connections=KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_SECS,
+                    ),
+                    follow_redirects=True,
+                )
+                log.info(
+                    "LiveStats client ready | http2=%s pool=%d keepalive=%d retries=%d",
+                    HTTP2_ENABLED, POOL_SIZE, KEEPALIVE, MAX_RETRIES,
+                )
+    return _client
+
+
+def data_url(numeric_id: str) -> str:
+    return f"{LIVESTATS_BASE}/{numeric_id}/data.json"
+
+
+def get(url: str, headers: dict | None = None, timeout: float = 15):
+    """
+    GET *url* through the shared pooled client.
+
+    Returns
+    -------
+    (response, conn) where response is an httpx.Response (same status_code /
+    headers / content / json() surface as requests) and conn is a dict:
+        conn_reused   bool  True if no new TCP connection was opened
+        http_version  str   e.g. "HTTP/2" or "HTTP/1.1"
+        retries       int   retry attempts made before this response
+
+    Raises the last transport error when every attempt fails to connect.
+    """
+    client = _get_client()
+    attempt = 0
+    opened = False
+
+    def _trace(event_name, info):
+        nonlocal opened
+        if event_name == "connection.connect_tcp.started":
+            opened = True
+
+    while True:
+        try:
+            response = client.get(url, headers=headers, timeout=timeout, extensions={"trace": _trace})
+            if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                break
+            log.debug("LiveStats HTTP %d for %s — retrying", response.status_code, url)
+        except httpx.TransportError as e:
+            if attempt >= MAX_RETRIES:
+                with _counters_lock:
+                    _counters["retries"] += attempt
+                raise
+            log.debug("LiveStats transport error for %s (%s) — retrying", url, e)
+        time.sleep(BACKOFF_SECS * (2 ** attempt))
+        attempt += 1
+
+    with _counters_lock:
+        _counters["requests"] += 1
+        _counters["retries"] += attempt
+        if opened:
+            _counters["new_connections"] += 1
+        else:
+            _counters["reused_connections"] += 1
+
+    return response, {
+        "conn_reused": not opened,
+        "http_version": response.http_version,
+        "retries": attempt,
+    }
+
+
+def pool_stats() -> dict:
+    """Process-lifetime counters: requests, new/reused connections, retries."""
+    with _counters_lock:
+        return dict(_counters)
@@ -0,0 +1,146 @@
+"""
+name_matcher.py
+---------------
+Indexed player-name matching shared by find_similar_player (json_parser) and
+the duplicate-player cleanup script.
+
+The old code ran difflib.SequenceMatcher against every player of a team on
+each lookup, and the cleanup script did that for every pair in the players
+table.  PlayerNameIndex gets the same answers while scoring far fewer pairs:
+
+  * Initial rule ("J Smith" == "John Smith"): blocked on the lowercased last
+    name, so only players sharing it are checked.
+  * Fuzzy rule: SequenceMatcher.ratio() is 2*M / (len(a) + len(b)), where M
+    is at most the shorter length and at most the size of the two names'
+    character multiset intersection.  Entries are kept sorted by length so
+    only names inside the length window that can still reach the threshold
+    are visited, and the multiset bound (difflib's quick_ratio, computed from
+    precomputed Counters) discards most of the rest.  Both bounds are exact
+    upper bounds, so no true match is ever pruned.
+
+Tie-breaking matches the original linear scans: the first initial match in
+insertion order wins outright, otherwise the highest ratio, earliest entry
+first on ties.
+"""
+
+import re
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from difflib import SequenceMatcher
+
+DEFAULT_THRESHOLD = 0.85
+
+
+def normalize_player_name(name: str) -> str:
+    if not name:
+        return name
+    return re.sub(r'\s+', ' ', name.strip())
+
+
+class _Entry:
+    __slots__ = ("order", "player", "name", "first", "last", "counts")
+
+    def __init__(self, order: int, player: dict, name: str):
+        self.order = order
+        self.player = player
+        self.name = name
+        parts = name.split()
+        self.first = parts[0] if len(parts) >= 2 else None
+        self.last = parts[-1] if len(parts) >= 2 else None
+        self.counts = Counter(name)
+
+
+def _initial_match(first_a: str, first_b: str) -> bool:
+    return (len(first_a) == 1 and first_b.startswith(first_a)) or \
+           (len(first_b) == 1 and first_a.startswith(first_b))
+
+
+def _multiset_bound(a: Counter, b: Counter) -> int:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(min(n, b[c]) for c, n in a.items() if c in b)
+
+
+class PlayerNameIndex:
+    """Index over player rows (dicts with a "full_name" key) for fast matching."""
+
+    def __init__(self, players=(), name_key: str = "full_name"):
+        self.name_key = name_key
+        self._entries = []
+        self._by_last = {}       # lowercased last name -> [entries]
+        self._lengths = []       # sorted (len(name), order) keys
+        self._by_order = {}      # order -> entry
+        for player in players:
+            self.add(player)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, player: dict):
+        name = (normalize_player_name(player.get(self.name_key)) or "").lower()
+        entry = _Entry(len(self._entries), player, name)
+        self._entries.append(entry)
+        self._by_order[entry.order] = entry
+        if entry.last is not None:
+            self._by_last.setdefault(entry.last, []).append(entry)
+        insort(self._lengths, (len(name), entry.order))
+
+    def _window(self, n: int, threshold: float):
+        """Entries whose length lets 2*min/(n+len) reach the threshold."""
+        if threshold <= 0:
+            return self._entries
+        # 2*min(n, m) / (n + m) >= t  <=>  t/(2-t) * n <= m <= (2-t)/t * n
+        # (epsilon keeps float rounding from excluding an exact boundary length)
+        lo = math.ceil(threshold / (2 - threshold) * n - 1e-9)
+        hi = math.floor((2 - threshold) / threshold * n + 1e-9)
+        start = bisect_left(self._lengths, (lo, -1))
+        end = bisect_right(self._lengths, (hi, len(self._entries)))
+        return [self._by_order[order] for _, order in self._lengths[start:end]]
+
+    def _scored(self, name: str, threshold: float):
+        """Yield (entry, ratio) for window entries whose ratio >= threshold."""
+        counts = Counter(name)
+        n = len(name)
+        for entry in self._window(n, threshold):
+            total = n + len(entry.name)
+            if total == 0:
+                continue
+            bound = 2.0 * _multiset_bound(counts, entry.counts) / total
+            if bound < threshold:
+                continue
+            ratio = SequenceMatcher(None, name, entry.name).ratio()
+            if ratio >= threshold:
+                yield entry, ratio
+
+    def best_match(self, full_name: str, similarity_threshold: float = DEFAULT_THRESHOLD):
+        """
+        Same answer as the original find_similar_player scan: the first
+        initial/last-name match, else the best ratio >= threshold, else None.
+        """
+        name = (normalize_player_name(full_name) or "").lower()
+        parts = name.split()
+
+        if len(parts) >= 2:
+            first, last = parts[0], parts[-1]
+            for entry in self._by_last.get(last, ()):
+                if _initial_match(first, entry.first):
+                    return entry.player
+
+        best = None
+        best_score = 0.0
+        for entry, ratio in self._scored(name, similarity_threshold):
+            if ratio > best_score or (ratio == best_score and best is not None and entry.order < best.order):
+                best, best_score = entry, ratio
+        return best.player if best else None
+
+    def similar(self, full_name: str, similarity_threshold: float = DEFAULT_THRESHOLD):
+        """All (player, ratio) pairs with ratio >= threshold, in insertion order."""
+        name = (normalize_player_name(full_name) or "").lower()
+        hits = sorted(self._scored(name, similarity_threshold), key=lambda pair: pair[0].order)
+        return [(entry.player, ratio) for entry, ratio in hits]
+
+
+def match_similar_player(full_name: str, candidates, similarity_threshold: float = DEFAULT_THRESHOLD):
+    """One-off lookup against a plain list of player rows."""
+    return PlayerNameIndex(candidates).best_match(full_name, similarity_threshold)
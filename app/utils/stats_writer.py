@@ -0,0 +1,93 @@
+"""
+stats_writer.py
+---------------
+Chunked write path for computed advanced stats (team_stats / player_stats).
+
+Rows are sent in chunks to the bulk_update_stats RPC
+(migrations/bulk_update_stats_rpc.sql), one UPDATE per chunk instead of one
+PATCH per row.  A chunk that fails is retried with backoff; if it still
+fails its rows are written one by one, so a single bad row only costs
+itself.  When the RPC is not deployed every row goes through the per-row
+update, as before.
+
+Environment variables:
+    ADVANCED_STATS_CHUNK_SIZE      rows per bulk_update_stats call (default: 500)
+    ADVANCED_STATS_WRITE_RETRIES   extra attempts for a failed chunk (default: 2)
+"""
+
+import os
+import time
+
+from app.utils.helpers import is_missing_rpc_error
+
+ADVANCED_STATS_CHUNK_SIZE = int(os.environ.get("ADVANCED_STATS_CHUNK_SIZE", "500"))
+ADVANCED_STATS_WRITE_RETRIES = int(os.environ.get("ADVANCED_STATS_WRITE_RETRIES", "2"))
+
+# Flips to False the first time bulk_update_stats turns out not to be deployed.
+_bulk_rpc_available = True
+
+
+def bulk_update_by_id(db, table: str, rows: list, chunk_size: int = None, retries: int = None) -> tuple:
+    """
+    Apply *rows* (dicts with "id" plus the columns to set, same keys in
+    every row) to *table*.
+
+    Returns (rows written, rows failed).
+    """
+    global _bulk_rpc_available
+
+    chunk_size = max(1, chunk_size or ADVANCED_STATS_CHUNK_SIZE)
+    retries = ADVANCED_STATS_WRITE_RETRIES if retries is None else retries
+    written = failed = 0
+
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i: i + chunk_size]
+
+        if _bulk_rpc_available:
+            for attempt in range(retries + 1):
+                try:
+                    res = db.rpc("bulk_update_stats", {"p_table": table, "p_rows": chunk}).execute()
+                    # The function returns its ROW_COUNT; rows whose id no
+                    # longer exists are not written.
+                    updated = res.data if isinstance(res.data, int) else len(chunk)
+                    updated = max(0, min(updated, len(chunk)))
+                    if updated < len(chunk):
+                        print(f"   ⚠️  {table} chunk {i // chunk_size + 1}: {len(chunk) - updated} of {len(chunk)} ids matched no row")
+                    written += updated
+                    failed += len(chunk) - updated
+                    chunk = None
+                    break
+                except Exception as e:
+                    if is_missing_rpc_error(e):
+                        print("   ⚠️  bulk_update_stats RPC not deployed - falling back to per-row updates")
+                        _bulk_rpc_available = False
+                        break
+                    print(f"   ⚠️  {table} chunk {i // chunk_size + 1} failed (attempt {attempt + 1}/{retries + 1}): {e}")
+                    if attempt < retries:
+                        time.sleep(0.5 * 2 ** attempt)
+            if chunk is None:
+                continue
+
+        ok, bad = _update_rows(db, table, chunk)
+        written += ok
+        failed += bad
+
+    return written, failed
+
+
+def _update_rows(db, table: str, rows: list) -> tuple:
+    """One update().eq("id") per row; returns (written, failed)."""
+    written = failed = 0
+    for row in rows:
+        fields = {k: v for k, v in row.items() if k != "id"}
+        try:
+            result = db.table(table).update(fields).eq("id", row["id"]).execute()
+            if result and result.data:
+                written += 1
+            else:
+                print(f"   ⚠️  No data returned when writing {table} id {row['id']}")
+                failed += 1
+        except Exception as e:
+            print(f"   ❌ Error writing {table} id {row['id']}: {e}")
+            failed += 1
+    return written, failed
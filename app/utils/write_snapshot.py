@@ -0,0 +1,61 @@
+"""
+write_snapshot.py
+-----------------
+Per-game snapshot of the last record written for each row key, used by
+parse_and_store_game(incremental=True) during live syncs.
+
+A live game is re-parsed every LIVE_SYNC_SECONDS, but between two syncs only a
+handful of stat lines actually move.  Before upserting, callers pass their
+records through changed_records(); only rows whose content differs from the
+last successful write (or that were never written by this process) go to
+Supabase.  After the write succeeds, remember() records the new hashes.
+
+Snapshots are process-local and keyed by game_key.  A restart simply means the
+first sync writes everything again.  Call forget() once a game is final so the
+map does not grow forever.
+"""
+
+import json
+import hashlib
+import threading
+
+# game_key -> {(table, row_key): digest}
+_snapshots: dict[str, dict[tuple, bytes]] = {}
+_lock = threading.Lock()
+
+
+def _digest(record: dict) -> bytes:
+    payload = json.dumps(record, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+def changed_records(game_key: str, table: str, records: list, key_fn) -> tuple[list, int]:
+    """
+    Return (records that differ from the snapshot, number skipped).
+
+    key_fn(record) gives the row key, normally the table's on_conflict columns.
+    """
+    with _lock:
+        snapshot = _snapshots.get(game_key, {})
+        changed = [r for r in records if snapshot.get((table, key_fn(r))) != _digest(r)]
+    return changed, len(records) - len(changed)
+
+
+def remember(game_key: str, table: str, records: list, key_fn):
+    """Record the digests of records that were just written successfully."""
+    if not records:
+        return
+    digests = {(table, key_fn(r)): _digest(r) for r in records}
+    with _lock:
+        _snapshots.setdefault(game_key, {}).update(digests)
+
+
+def forget(game_key: str):
+    """Drop the snapshot for a game (final, or written non-incrementally)."""
+    with _lock:
+        _snapshots.pop(game_key, None)
+
+
+def tracked_games() -> int:
+    with _lock:
+        return len(_snapshots)
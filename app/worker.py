@@ -15,6 +15,13 @@ Environment variables required:
 Render worker start command:
     python -m app.worker
 
+Concurrency:
+    POLL_WORKERS env var sets the size of the polling thread pool (default: 8).
+    Each due game is fetched, status-checked and parsed on its own pool thread.
+    A game is never polled twice at once: while a poll is still in flight the
+    game is skipped by later cycles, so per-game ordering is preserved.
+    Set POLL_WORKERS=1 to restore the serial loop.
+
 Polling cadence:
     - scheduled: every 2 minutes (or 15 minutes if matchtime is far away)
     - live: every 15 seconds
@@ -33,7 +40,8 @@ import json
 import time
 import signal
 import logging
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from time import perf_counter
 
@@ -41,6 +49,11 @@ from supabase import create_client
 from supabase.lib.client_options import ClientOptions
 
 from app.utils.json_parser import parse_and_store_game
+from app.utils import write_snapshot
+from app.utils import entity_cache
+from app.utils import lineup_builder
+from app.utils.helpers import is_missing_rpc_error, is_missing_column_error
+from app.utils import livestats_http
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING").upper()
 logging.basicConfig(
@@ -74,13 +87,14 @@ LIVE_SYNC_SECONDS = int(os.environ.get("LIVE_SYNC_SECONDS", "10"))
 log.info("DB_SCHEMA=%s  ENABLE_LIVE_SYNC=%s  LIVE_SYNC_SECONDS=%s", DB_SCHEMA, ENABLE_LIVE_SYNC, LIVE_SYNC_SECONDS)
 
 POLL_INTERVAL = 10
-LIVESTATS_BASE = "https://fibalivestats.dcd.shared.geniussports.com/data"
+POLL_WORKERS = max(1, int(os.environ.get("POLL_WORKERS", "8")))
+LIVESTATS_BASE = livestats_http.LIVESTATS_BASE
 
 _shutdown_requested = False
 
 def _handle_sigterm(signum, frame):
     global _shutdown_requested
-    log.warning("SIGTERM received — finishing current poll then shutting down")
+    log.warning("SIGTERM received — finishing in-flight polls then shutting down")
     _shutdown_requested = True
 
 signal.signal(signal.SIGTERM, _handle_sigterm)
@@ -92,21 +106,103 @@ REQUEST_HEADERS = {
     "Accept-Encoding": "gzip, deflate, br",
 }
 
+# game_keys whose poll is currently running on the pool
+_in_flight: set[str] = set()
+_in_flight_lock = threading.Lock()
+
+# Flipped to False the first time the get_due_games RPC turns out not to be
+# deployed (migrations/worker_due_games.sql); the multi-query path is used after.
+_due_games_rpc_available = True
+
+# Whether game_schedule has the livestats_etag / livestats_last_modified
+# columns (migrations/worker_livestats_validators.sql); None until probed.
+_validator_columns_available = None
+
+# Conditional-request validators seen by this process. The durable copy lives
+# on game_schedule and wins when present; an entry is dropped once its
+# validators are persisted there, so the cache only carries games on a
+# database without the columns, capped at VALIDATOR_CACHE_MAX games.
+VALIDATOR_CACHE_MAX = 2000
 _etag_cache: dict[str, str] = {}
 _last_modified_cache: dict[str, str] = {}
 
 
+def _remember_validator(cache: dict, game_key: str, value: str):
+    cache.pop(game_key, None)
+    cache[game_key] = value
+    while len(cache) > VALIDATOR_CACHE_MAX:
+        cache.pop(next(iter(cache)), None)
+
+
+def _forget_validators(game_key: str):
+    _etag_cache.pop(game_key, None)
+    _last_modified_cache.pop(game_key, None)
+
+
+def _has_validator_columns() -> bool:
+    """
+    True once game_schedule is known to carry the validator columns. Probed
+    with one select; a database without the migration keeps polling without
+    them instead of failing every query that names them.
+    """
+    global _validator_columns_available
+
+    if _validator_columns_available is None:
+        try:
+            game_db.table("game_schedule").select("livestats_etag, livestats_last_modified").limit(1).execute()
+            _validator_columns_available = True
+        except Exception as e:
+            if not is_missing_column_error(e):
+                log.warning("Could not check for livestats validator columns, will retry: %s", e)
+                return False
+            log.warning("game_schedule has no livestats_etag/livestats_last_modified — validators kept in memory only")
+            _validator_columns_available = False
+    return _validator_columns_available
+
+
+def _due_window(now: datetime) -> tuple[str, str]:
+    """Matchtime window for scheduled/live/error games: 12h back, 36h ahead."""
+    return (now - timedelta(hours=12)).isoformat(), (now + timedelta(hours=36)).isoformat()
+
+
 def get_due_games():
+    """
+    Fetch games that are due for polling.
+    Uses the get_due_games RPC (one round trip) and falls back to the
+    multi-query selection when the function is not deployed.
+    """
+    global _due_games_rpc_available
+
+    if _due_games_rpc_available:
+        window_start, window_end = _due_window(datetime.now(timezone.utc))
+        try:
+            result = game_db.rpc("get_due_games", {
+                "p_window_start": window_start,
+                "p_window_end": window_end,
+            }).execute()
+            return result.data or []
+        except Exception as e:
+            if is_missing_rpc_error(e):
+                log.warning("get_due_games RPC not deployed — falling back to multi-query selection")
+                _due_games_rpc_available = False
+            else:
+                log.warning("get_due_games RPC failed, using multi-query selection this cycle: %s", e)
+
+    return _get_due_games_multi_query()
+
+
+def _get_due_games_multi_query():
     """
     Fetch games that are due for polling.
     Uses multiple queries and merges by game_key.
     """
     now = datetime.now(timezone.utc)
     now_iso = now.isoformat()
-    window_start = (now - timedelta(hours=12)).isoformat()
-    window_end = (now + timedelta(hours=36)).isoformat()
+    window_start, window_end = _due_window(now)
     
     select_cols = 'game_key, competitionname, matchtime, hometeam, awayteam, "LiveStats URL", league_id, status, poll_fail_count, parsed_at, last_polled_at, poll_count, total_poll_bytes'
+    if _has_validator_columns():
+        select_cols += ', livestats_etag, livestats_last_modified'
     
     games_by_key = {}
     
@@ -289,22 +385,27 @@ def is_live_sync_due(last_polled_at: str | None) -> bool:
         return True
 
 
-def fetch_livestats_json(data_url: str, game_key: str = "probe"):
+def fetch_livestats_json(data_url: str, game_key: str = "probe", stored_etag: str = None,
+                         stored_last_modified: str = None, conditional: bool = True):
     """
     Fetch LiveStats JSON with instrumentation.
+    stored_etag / stored_last_modified are the validators persisted on the
+    game_schedule row; the in-process cache is used when the row has none.
+    conditional=False always asks for the full body.
     Returns (response, data, metrics) or raises on failure.
     """
     headers = dict(REQUEST_HEADERS)
 
-    cached_etag = _etag_cache.get(game_key)
-    cached_lm = _last_modified_cache.get(game_key)
-    if cached_etag:
-        headers["If-None-Match"] = cached_etag
-    if cached_lm:
-        headers["If-Modified-Since"] = cached_lm
+    if conditional:
+        cached_etag = stored_etag or _etag_cache.get(game_key)
+        cached_lm = stored_last_modified or _last_modified_cache.get(game_key)
+        if cached_etag:
+            headers["If-None-Match"] = cached_etag
+        if cached_lm:
+            headers["If-Modified-Since"] = cached_lm
 
     t0 = perf_counter()
-    response = requests.get(data_url, timeout=15, headers=headers)
+    response, conn = livestats_http.get(data_url, headers=headers, timeout=15)
     download_ms = round((perf_counter() - t0) * 1000, 1)
 
     content_encoding = response.headers.get("Content-Encoding", "none")
@@ -313,9 +414,9 @@ def fetch_livestats_json(data_url: str, game_key: str = "probe"):
     last_modified = response.headers.get("Last-Modified")
 
     if etag:
-        _etag_cache[game_key] = etag
+        _remember_validator(_etag_cache, game_key, etag)
     if last_modified:
-        _last_modified_cache[game_key] = last_modified
+        _remember_validator(_last_modified_cache, game_key, last_modified)
 
     metrics = {
         "status_code": response.status_code,
@@ -326,6 +427,9 @@ def fetch_livestats_json(data_url: str, game_key: str = "probe"):
         "etag": etag or "none",
         "last_modified": last_modified or "none",
         "cache_hit": response.status_code == 304,
+        "conn_reused": conn["conn_reused"],
+        "http_version": conn["http_version"],
+        "retries": conn["retries"],
     }
 
     if response.status_code == 304:
@@ -340,10 +444,12 @@ def fetch_livestats_json(data_url: str, game_key: str = "probe"):
 def log_poll_metrics(game_key: str, game_status: str, poll_number: int, metrics: dict):
     """Log a structured line with all poll metrics at DEBUG level."""
     log.debug(
-        "POLL game_key=%s status=%s poll=%d http=%d bytes_in=%d dl_ms=%.1f encoding=%s etag=%s cache_hit=%s",
+        "POLL game_key=%s status=%s poll=%d http=%d bytes_in=%d dl_ms=%.1f encoding=%s etag=%s cache_hit=%s "
+        "conn_reused=%s proto=%s retries=%d",
         game_key, game_status, poll_number,
         metrics["status_code"], metrics["bytes_in"], metrics["download_ms"],
         metrics["content_encoding"], metrics["etag"], metrics["cache_hit"],
+        metrics["conn_reused"], metrics["http_version"], metrics["retries"],
     )
 
 
@@ -371,11 +477,18 @@ def poll_game(game: dict):
         log.info("Skipping game %s: no numeric ID found in URL: %s", game_key, livestats_url)
         return
     
-    data_url = f"{LIVESTATS_BASE}/{numeric_id}/data.json"
+    data_url = livestats_http.data_url(numeric_id)
     now_iso = datetime.now(timezone.utc).isoformat()
     
     try:
-        response, data, metrics = fetch_livestats_json(data_url, game_key)
+        # A final/errored game is only due because it still needs a parse; a
+        # 304 would skip that parse forever, so always fetch the full body.
+        response, data, metrics = fetch_livestats_json(
+            data_url, game_key,
+            stored_etag=game.get("livestats_etag"),
+            stored_last_modified=game.get("livestats_last_modified"),
+            conditional=current_status not in ("final", "error"),
+        )
         response_bytes = metrics["bytes_in"]
         new_poll_count = prev_poll_count + 1
 
@@ -388,6 +501,8 @@ def poll_game(game: dict):
                 "poll_bytes_recent": 0,
                 "next_poll_at": compute_next_poll(current_status, matchtime),
             }).eq("game_key", game_key).execute()
+            if _has_validator_columns():
+                _forget_validators(game_key)
             return
         
         if response.status_code != 200:
@@ -405,10 +520,14 @@ def poll_game(game: dict):
                     "next_poll_at": compute_next_poll(current_status, matchtime),
                 }
             game_db.table("game_schedule").update(update_data).eq("game_key", game_key).execute()
+            if _has_validator_columns():
+                _forget_validators(game_key)
             return
         
     except Exception as e:
         log.error("%s: Request failed: %s", game_key, e)
+        if poll_fail_count >= 2:
+            lineup_builder.forget_checkpoint(game_key)
         update_data = {
             "last_polled_at": now_iso,
             "poll_fail_count": poll_fail_count + 1,
@@ -436,10 +555,26 @@ def poll_game(game: dict):
         "total_poll_bytes": new_total_bytes,
     }
     
+    persist_validators = _has_validator_columns()
+    if persist_validators:
+        new_etag = response.headers.get("ETag")
+        new_last_modified = response.headers.get("Last-Modified")
+        if new_etag and new_etag != game.get("livestats_etag"):
+            update_data["livestats_etag"] = new_etag
+        if new_last_modified and new_last_modified != game.get("livestats_last_modified"):
+            update_data["livestats_last_modified"] = new_last_modified
+
     if new_status == "final" and current_status != "final":
         update_data["final_detected_at"] = now_iso
+
+    if new_status == "final":
+        write_snapshot.forget(game_key)
+        lineup_builder.forget_checkpoint(game_key)
     
     game_db.table("game_schedule").update(update_data).eq("game_key", game_key).execute()
+
+    if persist_validators or new_status == "final":
+        _forget_validators(game_key)
     
     should_parse = False
     parse_reason = None
@@ -456,7 +591,7 @@ def poll_game(game: dict):
         
         try:
             t_parse = perf_counter()
-            parse_and_store_game(
+            write_stats = parse_and_store_game(
                 numeric_id=numeric_id,
                 league_name=game.get("competitionname", "Unknown League"),
                 game_date=matchtime,
@@ -464,9 +599,15 @@ def poll_game(game: dict):
                 away_team_name=game.get("awayteam"),
                 game_key=game_key,
                 livestats_url=livestats_url,
-            )
+                data=data,
+                incremental=parse_reason == "live_sync",
+            ) or {}
             parse_ms = round((perf_counter() - t_parse) * 1000, 1)
-            log.info("%s: parse complete in %.1fms (pbp_total=%s)", game_key, parse_ms, metrics.get("pbp_total", "n/a"))
+            log.info(
+                "%s: parse complete in %.1fms (pbp_total=%s rows_written=%s rows_skipped=%s)",
+                game_key, parse_ms, metrics.get("pbp_total", "n/a"),
+                write_stats.get("written", "n/a"), write_stats.get("skipped", "n/a"),
+            )
             
             if parse_reason == "final":
                 game_db.table("game_schedule").update({
@@ -475,32 +616,84 @@ def poll_game(game: dict):
             
         except Exception as e:
             log.error("%s: parse failed: %s", game_key, e)
+            lineup_builder.forget_checkpoint(game_key)
             game_db.table("game_schedule").update({
                 "status": "error",
                 "next_poll_at": (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat(),
             }).eq("game_key", game_key).execute()
 
 
+def _poll_game_guarded(game: dict):
+    """Pool task: poll one game and release its in-flight slot when done."""
+    game_key = game.get("game_key")
+    try:
+        if _shutdown_requested:
+            log.debug("%s: shutdown requested — dropping queued poll", game_key)
+            return
+        poll_game(game)
+    except Exception as e:
+        log.error("Error polling %s: %s", game_key, e)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(game_key)
+
+
+def _dispatch_games(executor: ThreadPoolExecutor, games: list):
+    """
+    Submit due games to the polling pool.
+    Games whose previous poll is still running are skipped this cycle so a
+    slow fetch or parse never overlaps with a newer poll of the same game.
+    """
+    submitted = 0
+    for game in games:
+        if _shutdown_requested:
+            log.warning("Shutdown requested — stopping mid-batch")
+            break
+        game_key = game.get("game_key")
+        with _in_flight_lock:
+            if game_key in _in_flight:
+                log.debug("%s: previous poll still running — skipping this cycle", game_key)
+                continue
+            _in_flight.add(game_key)
+        executor.submit(_poll_game_guarded, game)
+        submitted += 1
+    return submitted
+
+
 def run_worker():
     """Main worker loop - runs continuously polling games."""
-    log.info("Worker started | poll_interval=%ds | schema=%s | supabase=%s...", POLL_INTERVAL, DB_SCHEMA, SUPABASE_URL[:30])
-    
+    log.info(
+        "Worker started | poll_interval=%ds | poll_workers=%d | schema=%s | supabase=%s...",
+        POLL_INTERVAL, POLL_WORKERS, DB_SCHEMA, SUPABASE_URL[:30],
+    )
+
+    executor = None
+    if POLL_WORKERS > 1:
+        executor = ThreadPoolExecutor(max_workers=POLL_WORKERS, thread_name_prefix="poll")
+
     while not _shutdown_requested:
         try:
             games = get_due_games()
             
             if games:
                 log.info("Found %d games due for polling", len(games))
-                for game in games:
-                    if _shutdown_requested:
-                        log.warning("Shutdown requested — stopping mid-batch")
-                        break
-                    try:
-                        poll_game(game)
-                    except Exception as e:
-                        log.error("Error polling %s: %s", game.get("game_key"), e)
+                if executor:
+                    submitted = _dispatch_games(executor, games)
+                    with _in_flight_lock:
+                        in_flight = len(_in_flight)
+                    log.debug("Submitted %d polls (%d in flight)", submitted, in_flight)
+                else:
+                    for game in games:
+                        if _shutdown_requested:
+                            log.warning("Shutdown requested — stopping mid-batch")
+                            break
+                        try:
+                            poll_game(game)
+                        except Exception as e:
+                            log.error("Error polling %s: %s", game.get("game_key"), e)
             else:
                 log.debug("No games due")
+            log.debug("Entity cache: %s", entity_cache.stats())
             
         except Exception as e:
             log.error("Worker loop error: %s", e)
@@ -510,6 +703,13 @@ def run_worker():
                 break
             time.sleep(0.1)
 
+    if executor:
+        with _in_flight_lock:
+            in_flight = len(_in_flight)
+        if in_flight:
+            log.warning("Waiting for %d in-flight polls to finish", in_flight)
+        executor.shutdown(wait=True, cancel_futures=True)
+
     log.info("Worker shut down cleanly.")
 
 
@@ -545,6 +745,9 @@ def run_probe():
     print(f"\nTransfer:")
     print(f"   Bytes downloaded:  {metrics['bytes_in']:,}")
     print(f"   Download time:     {metrics['download_ms']}ms")
+    print(f"   Protocol:          {metrics['http_version']}")
+    print(f"   Conn reused:       {metrics['conn_reused']}")
+    print(f"   Retries:           {metrics['retries']}")
 
     if data:
         pbp = data.get("pbp", [])
@@ -1,7 +1,8 @@
 import os
-from difflib import SequenceMatcher
+import sys
 from supabase import create_client, Client
 from app.utils.json_parser import normalize_player_name
+from app.utils.name_matcher import PlayerNameIndex
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -11,9 +12,23 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def find_duplicate_players(similarity_threshold=0.85):
-    result = supabase.table("players").select("id, full_name, team_id, shirtNumber").execute()
-    players = result.data
+PAGE_SIZE = 1000
+
+def _fetch_players(league_id=None):
+    players = []
+    offset = 0
+    while True:
+        query = supabase.table("players").select("id, full_name, team_id, shirtNumber")
+        if league_id:
+            query = query.eq("league_id", league_id)
+        page = query.order("id").range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        players.extend(page)
+        if len(page) < PAGE_SIZE:
+            return players
+        offset += PAGE_SIZE
+
+def find_duplicate_players(similarity_threshold=0.85, league_id=None):
+    players = _fetch_players(league_id)
     
     team_players = {}
     for player in players:
@@ -24,27 +39,23 @@ def find_duplicate_players(similarity_threshold=0.85):
     
     duplicates = []
     for team_id, player_list in team_players.items():
+        # Only names the index says can reach the threshold get a full
+        # SequenceMatcher comparison, instead of every pair on the team.
+        index = PlayerNameIndex(player_list)
         checked = set()
         
-        for i, player1 in enumerate(player_list):
+        for player1 in player_list:
             if player1["id"] in checked:
                 continue
             
             similar_group = [player1]
             checked.add(player1["id"])
             
-            normalized1 = normalize_player_name(player1["full_name"])
-            
-            for j, player2 in enumerate(player_list):
-                if i == j or player2["id"] in checked:
+            for player2, _ in index.similar(player1["full_name"], similarity_threshold):
+                if player2["id"] in checked:
                     continue
-                
-                normalized2 = normalize_player_name(player2["full_name"])
-                similarity = SequenceMatcher(None, normalized1.lower(), normalized2.lower()).ratio()
-                
-                if similarity >= similarity_threshold:
-                    similar_group.append(player2)
-                    checked.add(player2["id"])
+                similar_group.append(player2)
+                checked.add(player2["id"])
             
             if len(similar_group) > 1:
                 duplicates.append({
@@ -86,9 +97,9 @@ def merge_players(canonical_player_id, duplicate_player_ids, canonical_name):
         except Exception as e:
             print(f"   ⚠️  Error deleting player {dup_id}: {e}")
 
-def run_player_cleanup():
+def run_player_cleanup(league_id=None):
     print("🔍 Finding duplicate players (this may take a moment)...")
-    duplicates = find_duplicate_players()
+    duplicates = find_duplicate_players(league_id=league_id)
     
     if not duplicates:
         print("✅ No duplicate players found!")
@@ -114,4 +125,5 @@ def run_player_cleanup():
     print("🎉 All player duplicates have been merged!")
 
 if __name__ == "__main__":
-    run_player_cleanup()
+    # Optional: python cleanup_duplicate_players.py <league_id>
+    run_player_cleanup(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,95 @@
+-- Migration: Bulk advanced-stats update
+-- Created: 2026-10-17
+-- Description: Adds bulk_update_stats(), which applies a chunk of computed
+--              advanced-stat rows to team_stats or player_stats in a single
+--              UPDATE ... FROM.  compute_advanced_stats used to send one
+--              PATCH per row (~7,600 requests for a 300-game league).
+--              Apply to both public and test schemas.
+--
+-- p_rows is a JSON array of objects that all carry "id" plus the same set of
+-- columns to update; the SET list is taken from the first row's keys.
+-- Returns the number of rows updated.
+
+-- ========================================
+-- bulk_update_stats(table, rows)
+-- ========================================
+
+CREATE OR REPLACE FUNCTION public.bulk_update_stats(
+    p_table text,
+    p_rows  jsonb
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_set     text;
+    v_updated integer;
+BEGIN
+    IF p_table NOT IN ('team_stats', 'player_stats') THEN
+        RAISE EXCEPTION 'bulk_update_stats: unsupported table %', p_table;
+    END IF;
+    IF p_rows IS NULL OR jsonb_array_length(p_rows) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    SELECT string_agg(format('%I = r.%I', k, k), ', ')
+    INTO v_set
+    FROM jsonb_object_keys(p_rows -> 0) AS k
+    WHERE k <> 'id';
+
+    IF v_set IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    EXECUTE format(
+        'UPDATE public.%I AS t SET %s '
+        'FROM jsonb_populate_recordset(NULL::public.%I, $1) AS r '
+        'WHERE t.id = r.id',
+        p_table, v_set, p_table
+    ) USING p_rows;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.bulk_update_stats(
+    p_table text,
+    p_rows  jsonb
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_set     text;
+    v_updated integer;
+BEGIN
+    IF p_table NOT IN ('team_stats', 'player_stats') THEN
+        RAISE EXCEPTION 'bulk_update_stats: unsupported table %', p_table;
+    END IF;
+    IF p_rows IS NULL OR jsonb_array_length(p_rows) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    SELECT string_agg(format('%I = r.%I', k, k), ', ')
+    INTO v_set
+    FROM jsonb_object_keys(p_rows -> 0) AS k
+    WHERE k <> 'id';
+
+    IF v_set IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    EXECUTE format(
+        'UPDATE test.%I AS t SET %s '
+        'FROM jsonb_populate_recordset(NULL::test.%I, $1) AS r '
+        'WHERE t.id = r.id',
+        p_table, v_set, p_table
+    ) USING p_rows;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- Migration complete
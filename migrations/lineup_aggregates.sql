@@ -0,0 +1,1395 @@
+-- Migration: Lineup and on/off aggregates
+-- Created: 2026-10-17
+-- Description: Adds lineup_aggregates, keyed by (league_id, team_id, lineup_key,
+--              is_valid_lineup), and player_on_off_aggregates, keyed by
+--              (game_key, league_id, team_id, player_id, is_valid_lineup).
+--              player_on_court_stints gains its stint's validity and box
+--              score.  Statement-level triggers on lineup_stints and
+--              player_on_court_stints keep the aggregates in step.
+--              replace_game_lineups() and the chunked fallback only insert and
+--              delete, so every rebuild of a game adjusts the totals by its delta.
+--              /api/lineups/top, /api/on-off/player, /api/on-off/team and the
+--              lineup_summary / player_on_off_summary views read these instead
+--              of re-aggregating every stint.
+--              Apply to both public and test schemas.
+--
+-- Requires PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT).
+-- lineup_stints / player_on_court_stints rows are never UPDATEd by the app; an
+-- UPDATE made by hand is not reflected until that game is rebuilt.
+
+-- ========================================
+-- PUBLIC: AGGREGATE TABLES
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS public.lineup_aggregates (
+    league_id           uuid REFERENCES public.leagues(league_id),
+    team_id             uuid REFERENCES public.teams(team_id),
+    lineup_key          text    NOT NULL,
+    is_valid_lineup     boolean NOT NULL DEFAULT true,
+    lineup_player_ids   text[],
+    lineup_names        text[],
+    stint_count         bigint  NOT NULL DEFAULT 0,
+    seconds_played      bigint  NOT NULL DEFAULT 0,
+    points_for          bigint  NOT NULL DEFAULT 0,
+    points_against      bigint  NOT NULL DEFAULT 0,
+    fg2_made            bigint  NOT NULL DEFAULT 0,
+    fg2_attempted       bigint  NOT NULL DEFAULT 0,
+    fg3_made            bigint  NOT NULL DEFAULT 0,
+    fg3_attempted       bigint  NOT NULL DEFAULT 0,
+    ft_made             bigint  NOT NULL DEFAULT 0,
+    ft_attempted        bigint  NOT NULL DEFAULT 0,
+    oreb                bigint  NOT NULL DEFAULT 0,
+    dreb                bigint  NOT NULL DEFAULT 0,
+    assists             bigint  NOT NULL DEFAULT 0,
+    turnovers           bigint  NOT NULL DEFAULT 0,
+    fouls               bigint  NOT NULL DEFAULT 0,
+    steals              bigint  NOT NULL DEFAULT 0,
+    blocks              bigint  NOT NULL DEFAULT 0,
+    possessions_for     bigint  NOT NULL DEFAULT 0,
+    possessions_against bigint  NOT NULL DEFAULT 0,
+    updated_at          timestamptz DEFAULT now(),
+    UNIQUE NULLS NOT DISTINCT (league_id, team_id, lineup_key, is_valid_lineup)
+);
+
+CREATE INDEX IF NOT EXISTS lineup_aggregates_team_idx ON public.lineup_aggregates (team_id);
+
+-- Each player row carries its stint's validity and box score (filled in by
+-- the public.player_on_court_stints_copy_stint trigger), so the aggregates below
+-- never join back to lineup_stints, whose rows may already be gone when the
+-- player rows are deleted.
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS is_valid_lineup boolean;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS fg2_made        integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS fg2_attempted   integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS fg3_made        integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS fg3_attempted   integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS ft_made         integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS ft_attempted    integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS oreb            integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS dreb            integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS assists         integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS turnovers       integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS steals          integer;
+ALTER TABLE public.player_on_court_stints ADD COLUMN IF NOT EXISTS blocks          integer;
+
+-- One row per player, game and lineup validity: the on-court totals the
+-- on/off endpoints need per game (team and opponent stats are per game).
+-- Derived data, rebuilt by the backfill below, so a copy keyed only by
+-- (league_id, team_id, player_id) from an earlier run is dropped.
+DROP VIEW IF EXISTS public.player_on_off_summary;
+DROP TABLE IF EXISTS public.player_on_off_aggregates;
+CREATE TABLE public.player_on_off_aggregates (
+    game_key            text    NOT NULL,
+    league_id           uuid REFERENCES public.leagues(league_id),
+    team_id             uuid REFERENCES public.teams(team_id),
+    player_id           uuid    NOT NULL REFERENCES public.players(id),
+    is_valid_lineup     boolean NOT NULL DEFAULT true,
+    player_name         text,
+    stint_count         bigint  NOT NULL DEFAULT 0,
+    seconds_played      bigint  NOT NULL DEFAULT 0,
+    points_for          bigint  NOT NULL DEFAULT 0,
+    points_against      bigint  NOT NULL DEFAULT 0,
+    possessions_for     bigint  NOT NULL DEFAULT 0,
+    possessions_against bigint  NOT NULL DEFAULT 0,
+    fg2_made            bigint  NOT NULL DEFAULT 0,
+    fg2_attempted       bigint  NOT NULL DEFAULT 0,
+    fg3_made            bigint  NOT NULL DEFAULT 0,
+    fg3_attempted       bigint  NOT NULL DEFAULT 0,
+    ft_made             bigint  NOT NULL DEFAULT 0,
+    ft_attempted        bigint  NOT NULL DEFAULT 0,
+    oreb                bigint  NOT NULL DEFAULT 0,
+    dreb                bigint  NOT NULL DEFAULT 0,
+    assists             bigint  NOT NULL DEFAULT 0,
+    turnovers           bigint  NOT NULL DEFAULT 0,
+    steals              bigint  NOT NULL DEFAULT 0,
+    blocks              bigint  NOT NULL DEFAULT 0,
+    updated_at          timestamptz DEFAULT now(),
+    UNIQUE NULLS NOT DISTINCT (game_key, league_id, team_id, player_id, is_valid_lineup)
+);
+
+CREATE INDEX IF NOT EXISTS player_on_off_aggregates_player_idx ON public.player_on_off_aggregates (player_id);
+CREATE INDEX IF NOT EXISTS player_on_off_aggregates_team_idx ON public.player_on_off_aggregates (team_id);
+
+-- ========================================
+-- PUBLIC: TRIGGER FUNCTIONS
+-- ========================================
+
+CREATE OR REPLACE FUNCTION public.lineup_aggregates_on_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO public.lineup_aggregates AS a (
+        league_id, team_id, lineup_key, is_valid_lineup,
+        lineup_player_ids, lineup_names, stint_count,
+        seconds_played,
+        points_for,
+        points_against,
+        fg2_made,
+        fg2_attempted,
+        fg3_made,
+        fg3_attempted,
+        ft_made,
+        ft_attempted,
+        oreb,
+        dreb,
+        assists,
+        turnovers,
+        fouls,
+        steals,
+        blocks,
+        possessions_for,
+        possessions_against,
+        updated_at
+    )
+    SELECT
+        g.league_id, g.team_id, g.lineup_key, g.is_valid_lineup,
+        r.lineup_player_ids, r.lineup_names, g.stint_count,
+        g.seconds_played,
+        g.points_for,
+        g.points_against,
+        g.fg2_made,
+        g.fg2_attempted,
+        g.fg3_made,
+        g.fg3_attempted,
+        g.ft_made,
+        g.ft_attempted,
+        g.oreb,
+        g.dreb,
+        g.assists,
+        g.turnovers,
+        g.fouls,
+        g.steals,
+        g.blocks,
+        g.possessions_for,
+        g.possessions_against,
+        now()
+    FROM (
+        SELECT
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(fouls), 0) AS fouls,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+    ) g
+    -- One representative stint per group, so the ids and names stay paired
+    JOIN (
+        SELECT DISTINCT ON (league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true))
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            lineup_player_ids, lineup_names
+        FROM new_rows
+        ORDER BY league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true), start_game_secs
+    ) r
+      ON  r.league_id IS NOT DISTINCT FROM g.league_id
+      AND r.team_id   IS NOT DISTINCT FROM g.team_id
+      AND r.lineup_key = g.lineup_key
+      AND r.is_valid_lineup = g.is_valid_lineup
+    ON CONFLICT (league_id, team_id, lineup_key, is_valid_lineup) DO UPDATE SET
+        lineup_player_ids = COALESCE(a.lineup_player_ids, EXCLUDED.lineup_player_ids),
+        lineup_names = COALESCE(a.lineup_names, EXCLUDED.lineup_names),
+        stint_count = a.stint_count + EXCLUDED.stint_count,
+        seconds_played = a.seconds_played + EXCLUDED.seconds_played,
+        points_for = a.points_for + EXCLUDED.points_for,
+        points_against = a.points_against + EXCLUDED.points_against,
+        fg2_made = a.fg2_made + EXCLUDED.fg2_made,
+        fg2_attempted = a.fg2_attempted + EXCLUDED.fg2_attempted,
+        fg3_made = a.fg3_made + EXCLUDED.fg3_made,
+        fg3_attempted = a.fg3_attempted + EXCLUDED.fg3_attempted,
+        ft_made = a.ft_made + EXCLUDED.ft_made,
+        ft_attempted = a.ft_attempted + EXCLUDED.ft_attempted,
+        oreb = a.oreb + EXCLUDED.oreb,
+        dreb = a.dreb + EXCLUDED.dreb,
+        assists = a.assists + EXCLUDED.assists,
+        turnovers = a.turnovers + EXCLUDED.turnovers,
+        fouls = a.fouls + EXCLUDED.fouls,
+        steals = a.steals + EXCLUDED.steals,
+        blocks = a.blocks + EXCLUDED.blocks,
+        possessions_for = a.possessions_for + EXCLUDED.possessions_for,
+        possessions_against = a.possessions_against + EXCLUDED.possessions_against,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.lineup_aggregates_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.lineup_aggregates a SET
+        stint_count = a.stint_count - g.stint_count,
+        seconds_played = a.seconds_played - g.seconds_played,
+        points_for = a.points_for - g.points_for,
+        points_against = a.points_against - g.points_against,
+        fg2_made = a.fg2_made - g.fg2_made,
+        fg2_attempted = a.fg2_attempted - g.fg2_attempted,
+        fg3_made = a.fg3_made - g.fg3_made,
+        fg3_attempted = a.fg3_attempted - g.fg3_attempted,
+        ft_made = a.ft_made - g.ft_made,
+        ft_attempted = a.ft_attempted - g.ft_attempted,
+        oreb = a.oreb - g.oreb,
+        dreb = a.dreb - g.dreb,
+        assists = a.assists - g.assists,
+        turnovers = a.turnovers - g.turnovers,
+        fouls = a.fouls - g.fouls,
+        steals = a.steals - g.steals,
+        blocks = a.blocks - g.blocks,
+        possessions_for = a.possessions_for - g.possessions_for,
+        possessions_against = a.possessions_against - g.possessions_against,
+        updated_at = now()
+    FROM (
+        SELECT
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(fouls), 0) AS fouls,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+    ) g
+    WHERE a.league_id IS NOT DISTINCT FROM g.league_id
+      AND a.team_id   IS NOT DISTINCT FROM g.team_id
+      AND a.lineup_key = g.lineup_key
+      AND a.is_valid_lineup = g.is_valid_lineup;
+
+    DELETE FROM public.lineup_aggregates WHERE stint_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.player_on_court_stints_copy_stint()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- lineup_stints rows are inserted before their player rows, by both
+    -- replace_game_lineups() and the chunked fallback
+    SELECT
+        s.is_valid_lineup,
+        s.fg2_made,
+        s.fg2_attempted,
+        s.fg3_made,
+        s.fg3_attempted,
+        s.ft_made,
+        s.ft_attempted,
+        s.oreb,
+        s.dreb,
+        s.assists,
+        s.turnovers,
+        s.steals,
+        s.blocks
+    INTO
+        NEW.is_valid_lineup,
+        NEW.fg2_made,
+        NEW.fg2_attempted,
+        NEW.fg3_made,
+        NEW.fg3_attempted,
+        NEW.ft_made,
+        NEW.ft_attempted,
+        NEW.oreb,
+        NEW.dreb,
+        NEW.assists,
+        NEW.turnovers,
+        NEW.steals,
+        NEW.blocks
+    FROM public.lineup_stints s
+    WHERE s.id = NEW.stint_id;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.player_on_off_aggregates_on_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO public.player_on_off_aggregates AS a (
+        game_key, league_id, team_id, player_id, is_valid_lineup,
+        player_name, stint_count,
+        seconds_played,
+        points_for,
+        points_against,
+        possessions_for,
+        possessions_against,
+        fg2_made,
+        fg2_attempted,
+        fg3_made,
+        fg3_attempted,
+        ft_made,
+        ft_attempted,
+        oreb,
+        dreb,
+        assists,
+        turnovers,
+        steals,
+        blocks,
+        updated_at
+    )
+    SELECT
+        game_key, league_id, team_id, player_id,
+        COALESCE(is_valid_lineup, true),
+        max(player_name), count(*),
+        COALESCE(sum(seconds_played), 0),
+        COALESCE(sum(points_for), 0),
+        COALESCE(sum(points_against), 0),
+        COALESCE(sum(possessions_for), 0),
+        COALESCE(sum(possessions_against), 0),
+        COALESCE(sum(fg2_made), 0),
+        COALESCE(sum(fg2_attempted), 0),
+        COALESCE(sum(fg3_made), 0),
+        COALESCE(sum(fg3_attempted), 0),
+        COALESCE(sum(ft_made), 0),
+        COALESCE(sum(ft_attempted), 0),
+        COALESCE(sum(oreb), 0),
+        COALESCE(sum(dreb), 0),
+        COALESCE(sum(assists), 0),
+        COALESCE(sum(turnovers), 0),
+        COALESCE(sum(steals), 0),
+        COALESCE(sum(blocks), 0),
+        now()
+    FROM new_rows
+    WHERE player_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (game_key, league_id, team_id, player_id, is_valid_lineup) DO UPDATE SET
+        player_name = COALESCE(EXCLUDED.player_name, a.player_name),
+        stint_count = a.stint_count + EXCLUDED.stint_count,
+        seconds_played = a.seconds_played + EXCLUDED.seconds_played,
+        points_for = a.points_for + EXCLUDED.points_for,
+        points_against = a.points_against + EXCLUDED.points_against,
+        possessions_for = a.possessions_for + EXCLUDED.possessions_for,
+        possessions_against = a.possessions_against + EXCLUDED.possessions_against,
+        fg2_made = a.fg2_made + EXCLUDED.fg2_made,
+        fg2_attempted = a.fg2_attempted + EXCLUDED.fg2_attempted,
+        fg3_made = a.fg3_made + EXCLUDED.fg3_made,
+        fg3_attempted = a.fg3_attempted + EXCLUDED.fg3_attempted,
+        ft_made = a.ft_made + EXCLUDED.ft_made,
+        ft_attempted = a.ft_attempted + EXCLUDED.ft_attempted,
+        oreb = a.oreb + EXCLUDED.oreb,
+        dreb = a.dreb + EXCLUDED.dreb,
+        assists = a.assists + EXCLUDED.assists,
+        turnovers = a.turnovers + EXCLUDED.turnovers,
+        steals = a.steals + EXCLUDED.steals,
+        blocks = a.blocks + EXCLUDED.blocks,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.player_on_off_aggregates_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.player_on_off_aggregates a SET
+        stint_count = a.stint_count - g.stint_count,
+        seconds_played = a.seconds_played - g.seconds_played,
+        points_for = a.points_for - g.points_for,
+        points_against = a.points_against - g.points_against,
+        possessions_for = a.possessions_for - g.possessions_for,
+        possessions_against = a.possessions_against - g.possessions_against,
+        fg2_made = a.fg2_made - g.fg2_made,
+        fg2_attempted = a.fg2_attempted - g.fg2_attempted,
+        fg3_made = a.fg3_made - g.fg3_made,
+        fg3_attempted = a.fg3_attempted - g.fg3_attempted,
+        ft_made = a.ft_made - g.ft_made,
+        ft_attempted = a.ft_attempted - g.ft_attempted,
+        oreb = a.oreb - g.oreb,
+        dreb = a.dreb - g.dreb,
+        assists = a.assists - g.assists,
+        turnovers = a.turnovers - g.turnovers,
+        steals = a.steals - g.steals,
+        blocks = a.blocks - g.blocks,
+        updated_at = now()
+    FROM (
+        SELECT
+            game_key, league_id, team_id, player_id,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks
+        FROM old_rows
+        WHERE player_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+    ) g
+    WHERE a.game_key = g.game_key
+      AND a.league_id IS NOT DISTINCT FROM g.league_id
+      AND a.team_id   IS NOT DISTINCT FROM g.team_id
+      AND a.player_id = g.player_id
+      AND a.is_valid_lineup = g.is_valid_lineup;
+
+    DELETE FROM public.player_on_off_aggregates WHERE stint_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+-- ========================================
+-- PUBLIC: TRIGGERS
+-- ========================================
+
+DROP TRIGGER IF EXISTS lineup_aggregates_insert ON public.lineup_stints;
+CREATE TRIGGER lineup_aggregates_insert
+    AFTER INSERT ON public.lineup_stints
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.lineup_aggregates_on_insert();
+
+DROP TRIGGER IF EXISTS lineup_aggregates_delete ON public.lineup_stints;
+CREATE TRIGGER lineup_aggregates_delete
+    AFTER DELETE ON public.lineup_stints
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.lineup_aggregates_on_delete();
+
+DROP TRIGGER IF EXISTS player_on_off_aggregates_insert ON public.player_on_court_stints;
+CREATE TRIGGER player_on_off_aggregates_insert
+    AFTER INSERT ON public.player_on_court_stints
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.player_on_off_aggregates_on_insert();
+
+DROP TRIGGER IF EXISTS player_on_off_aggregates_delete ON public.player_on_court_stints;
+CREATE TRIGGER player_on_off_aggregates_delete
+    AFTER DELETE ON public.player_on_court_stints
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.player_on_off_aggregates_on_delete();
+
+DROP TRIGGER IF EXISTS player_on_court_stints_copy_stint ON public.player_on_court_stints;
+CREATE TRIGGER player_on_court_stints_copy_stint
+    BEFORE INSERT ON public.player_on_court_stints
+    FOR EACH ROW EXECUTE FUNCTION public.player_on_court_stints_copy_stint();
+
+-- ========================================
+-- TEST: AGGREGATE TABLES
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS test.lineup_aggregates (
+    league_id           uuid,
+    team_id             uuid,
+    lineup_key          text    NOT NULL,
+    is_valid_lineup     boolean NOT NULL DEFAULT true,
+    lineup_player_ids   text[],
+    lineup_names        text[],
+    stint_count         bigint  NOT NULL DEFAULT 0,
+    seconds_played      bigint  NOT NULL DEFAULT 0,
+    points_for          bigint  NOT NULL DEFAULT 0,
+    points_against      bigint  NOT NULL DEFAULT 0,
+    fg2_made            bigint  NOT NULL DEFAULT 0,
+    fg2_attempted       bigint  NOT NULL DEFAULT 0,
+    fg3_made            bigint  NOT NULL DEFAULT 0,
+    fg3_attempted       bigint  NOT NULL DEFAULT 0,
+    ft_made             bigint  NOT NULL DEFAULT 0,
+    ft_attempted        bigint  NOT NULL DEFAULT 0,
+    oreb                bigint  NOT NULL DEFAULT 0,
+    dreb                bigint  NOT NULL DEFAULT 0,
+    assists             bigint  NOT NULL DEFAULT 0,
+    turnovers           bigint  NOT NULL DEFAULT 0,
+    fouls               bigint  NOT NULL DEFAULT 0,
+    steals              bigint  NOT NULL DEFAULT 0,
+    blocks              bigint  NOT NULL DEFAULT 0,
+    possessions_for     bigint  NOT NULL DEFAULT 0,
+    possessions_against bigint  NOT NULL DEFAULT 0,
+    updated_at          timestamptz DEFAULT now(),
+    UNIQUE NULLS NOT DISTINCT (league_id, team_id, lineup_key, is_valid_lineup)
+);
+
+CREATE INDEX IF NOT EXISTS test_lineup_aggregates_team_idx ON test.lineup_aggregates (team_id);
+
+-- Each player row carries its stint's validity and box score (filled in by
+-- the test.player_on_court_stints_copy_stint trigger), so the aggregates below
+-- never join back to lineup_stints, whose rows may already be gone when the
+-- player rows are deleted.
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS is_valid_lineup boolean;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS fg2_made        integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS fg2_attempted   integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS fg3_made        integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS fg3_attempted   integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS ft_made         integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS ft_attempted    integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS oreb            integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS dreb            integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS assists         integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS turnovers       integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS steals          integer;
+ALTER TABLE test.player_on_court_stints ADD COLUMN IF NOT EXISTS blocks          integer;
+
+-- One row per player, game and lineup validity: the on-court totals the
+-- on/off endpoints need per game (team and opponent stats are per game).
+-- Derived data, rebuilt by the backfill below, so a copy keyed only by
+-- (league_id, team_id, player_id) from an earlier run is dropped.
+DROP TABLE IF EXISTS test.player_on_off_aggregates;
+CREATE TABLE test.player_on_off_aggregates (
+    game_key            text    NOT NULL,
+    league_id           uuid,
+    team_id             uuid,
+    player_id           uuid    NOT NULL,
+    is_valid_lineup     boolean NOT NULL DEFAULT true,
+    player_name         text,
+    stint_count         bigint  NOT NULL DEFAULT 0,
+    seconds_played      bigint  NOT NULL DEFAULT 0,
+    points_for          bigint  NOT NULL DEFAULT 0,
+    points_against      bigint  NOT NULL DEFAULT 0,
+    possessions_for     bigint  NOT NULL DEFAULT 0,
+    possessions_against bigint  NOT NULL DEFAULT 0,
+    fg2_made            bigint  NOT NULL DEFAULT 0,
+    fg2_attempted       bigint  NOT NULL DEFAULT 0,
+    fg3_made            bigint  NOT NULL DEFAULT 0,
+    fg3_attempted       bigint  NOT NULL DEFAULT 0,
+    ft_made             bigint  NOT NULL DEFAULT 0,
+    ft_attempted        bigint  NOT NULL DEFAULT 0,
+    oreb                bigint  NOT NULL DEFAULT 0,
+    dreb                bigint  NOT NULL DEFAULT 0,
+    assists             bigint  NOT NULL DEFAULT 0,
+    turnovers           bigint  NOT NULL DEFAULT 0,
+    steals              bigint  NOT NULL DEFAULT 0,
+    blocks              bigint  NOT NULL DEFAULT 0,
+    updated_at          timestamptz DEFAULT now(),
+    UNIQUE NULLS NOT DISTINCT (game_key, league_id, team_id, player_id, is_valid_lineup)
+);
+
+CREATE INDEX IF NOT EXISTS test_player_on_off_aggregates_player_idx ON test.player_on_off_aggregates (player_id);
+CREATE INDEX IF NOT EXISTS test_player_on_off_aggregates_team_idx ON test.player_on_off_aggregates (team_id);
+
+-- ========================================
+-- TEST: TRIGGER FUNCTIONS
+-- ========================================
+
+CREATE OR REPLACE FUNCTION test.lineup_aggregates_on_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO test.lineup_aggregates AS a (
+        league_id, team_id, lineup_key, is_valid_lineup,
+        lineup_player_ids, lineup_names, stint_count,
+        seconds_played,
+        points_for,
+        points_against,
+        fg2_made,
+        fg2_attempted,
+        fg3_made,
+        fg3_attempted,
+        ft_made,
+        ft_attempted,
+        oreb,
+        dreb,
+        assists,
+        turnovers,
+        fouls,
+        steals,
+        blocks,
+        possessions_for,
+        possessions_against,
+        updated_at
+    )
+    SELECT
+        g.league_id, g.team_id, g.lineup_key, g.is_valid_lineup,
+        r.lineup_player_ids, r.lineup_names, g.stint_count,
+        g.seconds_played,
+        g.points_for,
+        g.points_against,
+        g.fg2_made,
+        g.fg2_attempted,
+        g.fg3_made,
+        g.fg3_attempted,
+        g.ft_made,
+        g.ft_attempted,
+        g.oreb,
+        g.dreb,
+        g.assists,
+        g.turnovers,
+        g.fouls,
+        g.steals,
+        g.blocks,
+        g.possessions_for,
+        g.possessions_against,
+        now()
+    FROM (
+        SELECT
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(fouls), 0) AS fouls,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+    ) g
+    -- One representative stint per group, so the ids and names stay paired
+    JOIN (
+        SELECT DISTINCT ON (league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true))
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            lineup_player_ids, lineup_names
+        FROM new_rows
+        ORDER BY league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true), start_game_secs
+    ) r
+      ON  r.league_id IS NOT DISTINCT FROM g.league_id
+      AND r.team_id   IS NOT DISTINCT FROM g.team_id
+      AND r.lineup_key = g.lineup_key
+      AND r.is_valid_lineup = g.is_valid_lineup
+    ON CONFLICT (league_id, team_id, lineup_key, is_valid_lineup) DO UPDATE SET
+        lineup_player_ids = COALESCE(a.lineup_player_ids, EXCLUDED.lineup_player_ids),
+        lineup_names = COALESCE(a.lineup_names, EXCLUDED.lineup_names),
+        stint_count = a.stint_count + EXCLUDED.stint_count,
+        seconds_played = a.seconds_played + EXCLUDED.seconds_played,
+        points_for = a.points_for + EXCLUDED.points_for,
+        points_against = a.points_against + EXCLUDED.points_against,
+        fg2_made = a.fg2_made + EXCLUDED.fg2_made,
+        fg2_attempted = a.fg2_attempted + EXCLUDED.fg2_attempted,
+        fg3_made = a.fg3_made + EXCLUDED.fg3_made,
+        fg3_attempted = a.fg3_attempted + EXCLUDED.fg3_attempted,
+        ft_made = a.ft_made + EXCLUDED.ft_made,
+        ft_attempted = a.ft_attempted + EXCLUDED.ft_attempted,
+        oreb = a.oreb + EXCLUDED.oreb,
+        dreb = a.dreb + EXCLUDED.dreb,
+        assists = a.assists + EXCLUDED.assists,
+        turnovers = a.turnovers + EXCLUDED.turnovers,
+        fouls = a.fouls + EXCLUDED.fouls,
+        steals = a.steals + EXCLUDED.steals,
+        blocks = a.blocks + EXCLUDED.blocks,
+        possessions_for = a.possessions_for + EXCLUDED.possessions_for,
+        possessions_against = a.possessions_against + EXCLUDED.possessions_against,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.lineup_aggregates_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE test.lineup_aggregates a SET
+        stint_count = a.stint_count - g.stint_count,
+        seconds_played = a.seconds_played - g.seconds_played,
+        points_for = a.points_for - g.points_for,
+        points_against = a.points_against - g.points_against,
+        fg2_made = a.fg2_made - g.fg2_made,
+        fg2_attempted = a.fg2_attempted - g.fg2_attempted,
+        fg3_made = a.fg3_made - g.fg3_made,
+        fg3_attempted = a.fg3_attempted - g.fg3_attempted,
+        ft_made = a.ft_made - g.ft_made,
+        ft_attempted = a.ft_attempted - g.ft_attempted,
+        oreb = a.oreb - g.oreb,
+        dreb = a.dreb - g.dreb,
+        assists = a.assists - g.assists,
+        turnovers = a.turnovers - g.turnovers,
+        fouls = a.fouls - g.fouls,
+        steals = a.steals - g.steals,
+        blocks = a.blocks - g.blocks,
+        possessions_for = a.possessions_for - g.possessions_for,
+        possessions_against = a.possessions_against - g.possessions_against,
+        updated_at = now()
+    FROM (
+        SELECT
+            league_id, team_id, lineup_key,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(fouls), 0) AS fouls,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+    ) g
+    WHERE a.league_id IS NOT DISTINCT FROM g.league_id
+      AND a.team_id   IS NOT DISTINCT FROM g.team_id
+      AND a.lineup_key = g.lineup_key
+      AND a.is_valid_lineup = g.is_valid_lineup;
+
+    DELETE FROM test.lineup_aggregates WHERE stint_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.player_on_court_stints_copy_stint()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- lineup_stints rows are inserted before their player rows, by both
+    -- replace_game_lineups() and the chunked fallback
+    SELECT
+        s.is_valid_lineup,
+        s.fg2_made,
+        s.fg2_attempted,
+        s.fg3_made,
+        s.fg3_attempted,
+        s.ft_made,
+        s.ft_attempted,
+        s.oreb,
+        s.dreb,
+        s.assists,
+        s.turnovers,
+        s.steals,
+        s.blocks
+    INTO
+        NEW.is_valid_lineup,
+        NEW.fg2_made,
+        NEW.fg2_attempted,
+        NEW.fg3_made,
+        NEW.fg3_attempted,
+        NEW.ft_made,
+        NEW.ft_attempted,
+        NEW.oreb,
+        NEW.dreb,
+        NEW.assists,
+        NEW.turnovers,
+        NEW.steals,
+        NEW.blocks
+    FROM test.lineup_stints s
+    WHERE s.id = NEW.stint_id;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.player_on_off_aggregates_on_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO test.player_on_off_aggregates AS a (
+        game_key, league_id, team_id, player_id, is_valid_lineup,
+        player_name, stint_count,
+        seconds_played,
+        points_for,
+        points_against,
+        possessions_for,
+        possessions_against,
+        fg2_made,
+        fg2_attempted,
+        fg3_made,
+        fg3_attempted,
+        ft_made,
+        ft_attempted,
+        oreb,
+        dreb,
+        assists,
+        turnovers,
+        steals,
+        blocks,
+        updated_at
+    )
+    SELECT
+        game_key, league_id, team_id, player_id,
+        COALESCE(is_valid_lineup, true),
+        max(player_name), count(*),
+        COALESCE(sum(seconds_played), 0),
+        COALESCE(sum(points_for), 0),
+        COALESCE(sum(points_against), 0),
+        COALESCE(sum(possessions_for), 0),
+        COALESCE(sum(possessions_against), 0),
+        COALESCE(sum(fg2_made), 0),
+        COALESCE(sum(fg2_attempted), 0),
+        COALESCE(sum(fg3_made), 0),
+        COALESCE(sum(fg3_attempted), 0),
+        COALESCE(sum(ft_made), 0),
+        COALESCE(sum(ft_attempted), 0),
+        COALESCE(sum(oreb), 0),
+        COALESCE(sum(dreb), 0),
+        COALESCE(sum(assists), 0),
+        COALESCE(sum(turnovers), 0),
+        COALESCE(sum(steals), 0),
+        COALESCE(sum(blocks), 0),
+        now()
+    FROM new_rows
+    WHERE player_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (game_key, league_id, team_id, player_id, is_valid_lineup) DO UPDATE SET
+        player_name = COALESCE(EXCLUDED.player_name, a.player_name),
+        stint_count = a.stint_count + EXCLUDED.stint_count,
+        seconds_played = a.seconds_played + EXCLUDED.seconds_played,
+        points_for = a.points_for + EXCLUDED.points_for,
+        points_against = a.points_against + EXCLUDED.points_against,
+        possessions_for = a.possessions_for + EXCLUDED.possessions_for,
+        possessions_against = a.possessions_against + EXCLUDED.possessions_against,
+        fg2_made = a.fg2_made + EXCLUDED.fg2_made,
+        fg2_attempted = a.fg2_attempted + EXCLUDED.fg2_attempted,
+        fg3_made = a.fg3_made + EXCLUDED.fg3_made,
+        fg3_attempted = a.fg3_attempted + EXCLUDED.fg3_attempted,
+        ft_made = a.ft_made + EXCLUDED.ft_made,
+        ft_attempted = a.ft_attempted + EXCLUDED.ft_attempted,
+        oreb = a.oreb + EXCLUDED.oreb,
+        dreb = a.dreb + EXCLUDED.dreb,
+        assists = a.assists + EXCLUDED.assists,
+        turnovers = a.turnovers + EXCLUDED.turnovers,
+        steals = a.steals + EXCLUDED.steals,
+        blocks = a.blocks + EXCLUDED.blocks,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.player_on_off_aggregates_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE test.player_on_off_aggregates a SET
+        stint_count = a.stint_count - g.stint_count,
+        seconds_played = a.seconds_played - g.seconds_played,
+        points_for = a.points_for - g.points_for,
+        points_against = a.points_against - g.points_against,
+        possessions_for = a.possessions_for - g.possessions_for,
+        possessions_against = a.possessions_against - g.possessions_against,
+        fg2_made = a.fg2_made - g.fg2_made,
+        fg2_attempted = a.fg2_attempted - g.fg2_attempted,
+        fg3_made = a.fg3_made - g.fg3_made,
+        fg3_attempted = a.fg3_attempted - g.fg3_attempted,
+        ft_made = a.ft_made - g.ft_made,
+        ft_attempted = a.ft_attempted - g.ft_attempted,
+        oreb = a.oreb - g.oreb,
+        dreb = a.dreb - g.dreb,
+        assists = a.assists - g.assists,
+        turnovers = a.turnovers - g.turnovers,
+        steals = a.steals - g.steals,
+        blocks = a.blocks - g.blocks,
+        updated_at = now()
+    FROM (
+        SELECT
+            game_key, league_id, team_id, player_id,
+            COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+            count(*) AS stint_count,
+            COALESCE(sum(seconds_played), 0) AS seconds_played,
+            COALESCE(sum(points_for), 0) AS points_for,
+            COALESCE(sum(points_against), 0) AS points_against,
+            COALESCE(sum(possessions_for), 0) AS possessions_for,
+            COALESCE(sum(possessions_against), 0) AS possessions_against,
+            COALESCE(sum(fg2_made), 0) AS fg2_made,
+            COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+            COALESCE(sum(fg3_made), 0) AS fg3_made,
+            COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+            COALESCE(sum(ft_made), 0) AS ft_made,
+            COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+            COALESCE(sum(oreb), 0) AS oreb,
+            COALESCE(sum(dreb), 0) AS dreb,
+            COALESCE(sum(assists), 0) AS assists,
+            COALESCE(sum(turnovers), 0) AS turnovers,
+            COALESCE(sum(steals), 0) AS steals,
+            COALESCE(sum(blocks), 0) AS blocks
+        FROM old_rows
+        WHERE player_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+    ) g
+    WHERE a.game_key = g.game_key
+      AND a.league_id IS NOT DISTINCT FROM g.league_id
+      AND a.team_id   IS NOT DISTINCT FROM g.team_id
+      AND a.player_id = g.player_id
+      AND a.is_valid_lineup = g.is_valid_lineup;
+
+    DELETE FROM test.player_on_off_aggregates WHERE stint_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+-- ========================================
+-- TEST: TRIGGERS
+-- ========================================
+
+DROP TRIGGER IF EXISTS lineup_aggregates_insert ON test.lineup_stints;
+CREATE TRIGGER lineup_aggregates_insert
+    AFTER INSERT ON test.lineup_stints
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION test.lineup_aggregates_on_insert();
+
+DROP TRIGGER IF EXISTS lineup_aggregates_delete ON test.lineup_stints;
+CREATE TRIGGER lineup_aggregates_delete
+    AFTER DELETE ON test.lineup_stints
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION test.lineup_aggregates_on_delete();
+
+DROP TRIGGER IF EXISTS player_on_off_aggregates_insert ON test.player_on_court_stints;
+CREATE TRIGGER player_on_off_aggregates_insert
+    AFTER INSERT ON test.player_on_court_stints
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION test.player_on_off_aggregates_on_insert();
+
+DROP TRIGGER IF EXISTS player_on_off_aggregates_delete ON test.player_on_court_stints;
+CREATE TRIGGER player_on_off_aggregates_delete
+    AFTER DELETE ON test.player_on_court_stints
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION test.player_on_off_aggregates_on_delete();
+
+DROP TRIGGER IF EXISTS player_on_court_stints_copy_stint ON test.player_on_court_stints;
+CREATE TRIGGER player_on_court_stints_copy_stint
+    BEFORE INSERT ON test.player_on_court_stints
+    FOR EACH ROW EXECUTE FUNCTION test.player_on_court_stints_copy_stint();
+
+-- ========================================
+-- BACKFILL FROM EXISTING STINTS
+-- ========================================
+
+TRUNCATE public.lineup_aggregates;
+INSERT INTO public.lineup_aggregates (
+    league_id, team_id, lineup_key, is_valid_lineup,
+    lineup_player_ids, lineup_names, stint_count,
+    seconds_played,
+    points_for,
+    points_against,
+    fg2_made,
+    fg2_attempted,
+    fg3_made,
+    fg3_attempted,
+    ft_made,
+    ft_attempted,
+    oreb,
+    dreb,
+    assists,
+    turnovers,
+    fouls,
+    steals,
+    blocks,
+    possessions_for,
+    possessions_against,
+    updated_at
+)
+SELECT
+    g.league_id, g.team_id, g.lineup_key, g.is_valid_lineup,
+    r.lineup_player_ids, r.lineup_names, g.stint_count,
+    g.seconds_played,
+    g.points_for,
+    g.points_against,
+    g.fg2_made,
+    g.fg2_attempted,
+    g.fg3_made,
+    g.fg3_attempted,
+    g.ft_made,
+    g.ft_attempted,
+    g.oreb,
+    g.dreb,
+    g.assists,
+    g.turnovers,
+    g.fouls,
+    g.steals,
+    g.blocks,
+    g.possessions_for,
+    g.possessions_against,
+    now()
+FROM (
+    SELECT
+        league_id, team_id, lineup_key,
+        COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+        count(*) AS stint_count,
+        COALESCE(sum(seconds_played), 0) AS seconds_played,
+        COALESCE(sum(points_for), 0) AS points_for,
+        COALESCE(sum(points_against), 0) AS points_against,
+        COALESCE(sum(fg2_made), 0) AS fg2_made,
+        COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+        COALESCE(sum(fg3_made), 0) AS fg3_made,
+        COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+        COALESCE(sum(ft_made), 0) AS ft_made,
+        COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+        COALESCE(sum(oreb), 0) AS oreb,
+        COALESCE(sum(dreb), 0) AS dreb,
+        COALESCE(sum(assists), 0) AS assists,
+        COALESCE(sum(turnovers), 0) AS turnovers,
+        COALESCE(sum(fouls), 0) AS fouls,
+        COALESCE(sum(steals), 0) AS steals,
+        COALESCE(sum(blocks), 0) AS blocks,
+        COALESCE(sum(possessions_for), 0) AS possessions_for,
+        COALESCE(sum(possessions_against), 0) AS possessions_against
+    FROM public.lineup_stints
+    GROUP BY 1, 2, 3, 4
+) g
+JOIN (
+    SELECT DISTINCT ON (league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true))
+        league_id, team_id, lineup_key,
+        COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+        lineup_player_ids, lineup_names
+    FROM public.lineup_stints
+    ORDER BY league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true), start_game_secs
+) r
+  ON  r.league_id IS NOT DISTINCT FROM g.league_id
+  AND r.team_id   IS NOT DISTINCT FROM g.team_id
+  AND r.lineup_key = g.lineup_key
+  AND r.is_valid_lineup = g.is_valid_lineup;
+
+UPDATE public.player_on_court_stints p SET
+    is_valid_lineup = s.is_valid_lineup,
+    fg2_made = s.fg2_made,
+    fg2_attempted = s.fg2_attempted,
+    fg3_made = s.fg3_made,
+    fg3_attempted = s.fg3_attempted,
+    ft_made = s.ft_made,
+    ft_attempted = s.ft_attempted,
+    oreb = s.oreb,
+    dreb = s.dreb,
+    assists = s.assists,
+    turnovers = s.turnovers,
+    steals = s.steals,
+    blocks = s.blocks
+FROM public.lineup_stints s
+WHERE s.id = p.stint_id;
+
+TRUNCATE public.player_on_off_aggregates;
+INSERT INTO public.player_on_off_aggregates (
+    game_key, league_id, team_id, player_id, is_valid_lineup,
+    player_name, stint_count,
+    seconds_played,
+    points_for,
+    points_against,
+    possessions_for,
+    possessions_against,
+    fg2_made,
+    fg2_attempted,
+    fg3_made,
+    fg3_attempted,
+    ft_made,
+    ft_attempted,
+    oreb,
+    dreb,
+    assists,
+    turnovers,
+    steals,
+    blocks,
+    updated_at
+)
+SELECT
+    game_key, league_id, team_id, player_id,
+    COALESCE(is_valid_lineup, true),
+    max(player_name), count(*),
+    COALESCE(sum(seconds_played), 0),
+    COALESCE(sum(points_for), 0),
+    COALESCE(sum(points_against), 0),
+    COALESCE(sum(possessions_for), 0),
+    COALESCE(sum(possessions_against), 0),
+    COALESCE(sum(fg2_made), 0),
+    COALESCE(sum(fg2_attempted), 0),
+    COALESCE(sum(fg3_made), 0),
+    COALESCE(sum(fg3_attempted), 0),
+    COALESCE(sum(ft_made), 0),
+    COALESCE(sum(ft_attempted), 0),
+    COALESCE(sum(oreb), 0),
+    COALESCE(sum(dreb), 0),
+    COALESCE(sum(assists), 0),
+    COALESCE(sum(turnovers), 0),
+    COALESCE(sum(steals), 0),
+    COALESCE(sum(blocks), 0),
+    now()
+FROM public.player_on_court_stints
+WHERE player_id IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5;
+
+TRUNCATE test.lineup_aggregates;
+INSERT INTO test.lineup_aggregates (
+    league_id, team_id, lineup_key, is_valid_lineup,
+    lineup_player_ids, lineup_names, stint_count,
+    seconds_played,
+    points_for,
+    points_against,
+    fg2_made,
+    fg2_attempted,
+    fg3_made,
+    fg3_attempted,
+    ft_made,
+    ft_attempted,
+    oreb,
+    dreb,
+    assists,
+    turnovers,
+    fouls,
+    steals,
+    blocks,
+    possessions_for,
+    possessions_against,
+    updated_at
+)
+SELECT
+    g.league_id, g.team_id, g.lineup_key, g.is_valid_lineup,
+    r.lineup_player_ids, r.lineup_names, g.stint_count,
+    g.seconds_played,
+    g.points_for,
+    g.points_against,
+    g.fg2_made,
+    g.fg2_attempted,
+    g.fg3_made,
+    g.fg3_attempted,
+    g.ft_made,
+    g.ft_attempted,
+    g.oreb,
+    g.dreb,
+    g.assists,
+    g.turnovers,
+    g.fouls,
+    g.steals,
+    g.blocks,
+    g.possessions_for,
+    g.possessions_against,
+    now()
+FROM (
+    SELECT
+        league_id, team_id, lineup_key,
+        COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+        count(*) AS stint_count,
+        COALESCE(sum(seconds_played), 0) AS seconds_played,
+        COALESCE(sum(points_for), 0) AS points_for,
+        COALESCE(sum(points_against), 0) AS points_against,
+        COALESCE(sum(fg2_made), 0) AS fg2_made,
+        COALESCE(sum(fg2_attempted), 0) AS fg2_attempted,
+        COALESCE(sum(fg3_made), 0) AS fg3_made,
+        COALESCE(sum(fg3_attempted), 0) AS fg3_attempted,
+        COALESCE(sum(ft_made), 0) AS ft_made,
+        COALESCE(sum(ft_attempted), 0) AS ft_attempted,
+        COALESCE(sum(oreb), 0) AS oreb,
+        COALESCE(sum(dreb), 0) AS dreb,
+        COALESCE(sum(assists), 0) AS assists,
+        COALESCE(sum(turnovers), 0) AS turnovers,
+        COALESCE(sum(fouls), 0) AS fouls,
+        COALESCE(sum(steals), 0) AS steals,
+        COALESCE(sum(blocks), 0) AS blocks,
+        COALESCE(sum(possessions_for), 0) AS possessions_for,
+        COALESCE(sum(possessions_against), 0) AS possessions_against
+    FROM test.lineup_stints
+    GROUP BY 1, 2, 3, 4
+) g
+JOIN (
+    SELECT DISTINCT ON (league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true))
+        league_id, team_id, lineup_key,
+        COALESCE(is_valid_lineup, true) AS is_valid_lineup,
+        lineup_player_ids, lineup_names
+    FROM test.lineup_stints
+    ORDER BY league_id, team_id, lineup_key, COALESCE(is_valid_lineup, true), start_game_secs
+) r
+  ON  r.league_id IS NOT DISTINCT FROM g.league_id
+  AND r.team_id   IS NOT DISTINCT FROM g.team_id
+  AND r.lineup_key = g.lineup_key
+  AND r.is_valid_lineup = g.is_valid_lineup;
+
+UPDATE test.player_on_court_stints p SET
+    is_valid_lineup = s.is_valid_lineup,
+    fg2_made = s.fg2_made,
+    fg2_attempted = s.fg2_attempted,
+    fg3_made = s.fg3_made,
+    fg3_attempted = s.fg3_attempted,
+    ft_made = s.ft_made,
+    ft_attempted = s.ft_attempted,
+    oreb = s.oreb,
+    dreb = s.dreb,
+    assists = s.assists,
+    turnovers = s.turnovers,
+    steals = s.steals,
+    blocks = s.blocks
+FROM test.lineup_stints s
+WHERE s.id = p.stint_id;
+
+TRUNCATE test.player_on_off_aggregates;
+INSERT INTO test.player_on_off_aggregates (
+    game_key, league_id, team_id, player_id, is_valid_lineup,
+    player_name, stint_count,
+    seconds_played,
+    points_for,
+    points_against,
+    possessions_for,
+    possessions_against,
+    fg2_made,
+    fg2_attempted,
+    fg3_made,
+    fg3_attempted,
+    ft_made,
+    ft_attempted,
+    oreb,
+    dreb,
+    assists,
+    turnovers,
+    steals,
+    blocks,
+    updated_at
+)
+SELECT
+    game_key, league_id, team_id, player_id,
+    COALESCE(is_valid_lineup, true),
+    max(player_name), count(*),
+    COALESCE(sum(seconds_played), 0),
+    COALESCE(sum(points_for), 0),
+    COALESCE(sum(points_against), 0),
+    COALESCE(sum(possessions_for), 0),
+    COALESCE(sum(possessions_against), 0),
+    COALESCE(sum(fg2_made), 0),
+    COALESCE(sum(fg2_attempted), 0),
+    COALESCE(sum(fg3_made), 0),
+    COALESCE(sum(fg3_attempted), 0),
+    COALESCE(sum(ft_made), 0),
+    COALESCE(sum(ft_attempted), 0),
+    COALESCE(sum(oreb), 0),
+    COALESCE(sum(dreb), 0),
+    COALESCE(sum(assists), 0),
+    COALESCE(sum(turnovers), 0),
+    COALESCE(sum(steals), 0),
+    COALESCE(sum(blocks), 0),
+    now()
+FROM test.player_on_court_stints
+WHERE player_id IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5;
+
+-- ========================================
+-- VIEWS: serve the summaries from the aggregates
+-- (same columns and types as supabase/views.sql)
+-- ========================================
+
+CREATE OR REPLACE VIEW public.lineup_summary AS
+SELECT
+    la.lineup_key,
+    la.team_id,
+    la.league_id,
+    t.name                                          AS team_name,
+    SUM(la.stint_count)::bigint                     AS stints,
+    ROUND(SUM(la.seconds_played)::numeric / 60, 2) AS minutes,
+    SUM(la.points_for)::bigint                      AS points_for,
+    SUM(la.points_against)::bigint                  AS points_against,
+    (SUM(la.points_for) - SUM(la.points_against))::bigint AS plus_minus,
+    SUM(la.fg2_made)::bigint                    AS fg2_made,
+    SUM(la.fg2_attempted)::bigint               AS fg2_attempted,
+    SUM(la.fg3_made)::bigint                    AS fg3_made,
+    SUM(la.fg3_attempted)::bigint               AS fg3_attempted,
+    SUM(la.ft_made)::bigint                     AS ft_made,
+    SUM(la.ft_attempted)::bigint                AS ft_attempted,
+    SUM(la.oreb)::bigint                        AS oreb,
+    SUM(la.dreb)::bigint                        AS dreb,
+    SUM(la.assists)::bigint                     AS assists,
+    SUM(la.turnovers)::bigint                   AS turnovers,
+    SUM(la.fouls)::bigint                       AS fouls,
+    SUM(la.steals)::bigint                      AS steals,
+    SUM(la.blocks)::bigint                      AS blocks,
+    SUM(la.possessions_for)::bigint             AS possessions_for,
+    SUM(la.possessions_against)::bigint         AS possessions_against,
+    CASE WHEN SUM(la.possessions_for) > 0
+        THEN ROUND(
+            (SUM(la.points_for)::numeric / SUM(la.possessions_for)) * 100, 1
+        )
+        ELSE NULL
+    END                                             AS off_rating,
+    CASE WHEN SUM(la.possessions_against) > 0
+        THEN ROUND(
+            (SUM(la.points_against)::numeric / SUM(la.possessions_against)) * 100, 1
+        )
+        ELSE NULL
+    END                                             AS def_rating,
+    CASE WHEN SUM(la.possessions_for) > 0 AND SUM(la.possessions_against) > 0
+        THEN ROUND(
+            (SUM(la.points_for)::numeric / SUM(la.possessions_for)) * 100
+            - (SUM(la.points_against)::numeric / SUM(la.possessions_against)) * 100,
+            1
+        )
+        ELSE NULL
+    END                                             AS net_rating,
+    MIN(la.lineup_names::text)                      AS sample_lineup_names
+FROM public.lineup_aggregates la
+LEFT JOIN public.teams t ON t.team_id = la.team_id
+GROUP BY la.lineup_key, la.team_id, la.league_id, t.name;
+
+CREATE OR REPLACE VIEW public.player_on_off_summary AS
+SELECT
+    pa.player_id,
+    MAX(pa.player_name)                             AS player_name,
+    pa.team_id,
+    pa.league_id,
+    t.name                                          AS team_name,
+    COUNT(DISTINCT pa.game_key)                     AS games_played,
+    SUM(pa.stint_count)::bigint                     AS stints_on,
+    ROUND(SUM(pa.seconds_played)::numeric / 60, 2) AS minutes_on,
+    SUM(pa.points_for)::bigint                      AS points_for_on,
+    SUM(pa.points_against)::bigint                  AS points_against_on,
+    (SUM(pa.points_for) - SUM(pa.points_against))::bigint AS plus_minus_on,
+    SUM(pa.possessions_for)::bigint                 AS possessions_for_on,
+    SUM(pa.possessions_against)::bigint             AS possessions_against_on,
+    CASE WHEN SUM(pa.possessions_for) > 0
+        THEN ROUND(
+            (SUM(pa.points_for)::numeric / SUM(pa.possessions_for)) * 100, 1
+        )
+        ELSE NULL
+    END                                             AS on_off_rating,
+    CASE WHEN SUM(pa.possessions_against) > 0
+        THEN ROUND(
+            (SUM(pa.points_against)::numeric / SUM(pa.possessions_against)) * 100, 1
+        )
+        ELSE NULL
+    END                                             AS on_def_rating,
+    CASE WHEN SUM(pa.possessions_for) > 0 AND SUM(pa.possessions_against) > 0
+        THEN ROUND(
+            (SUM(pa.points_for)::numeric / SUM(pa.possessions_for)) * 100
+            - (SUM(pa.points_against)::numeric / SUM(pa.possessions_against)) * 100,
+            1
+        )
+        ELSE NULL
+    END                                             AS on_net_rating
+FROM public.player_on_off_aggregates pa
+LEFT JOIN public.teams t ON t.team_id = pa.team_id
+GROUP BY pa.player_id, pa.team_id, pa.league_id, t.name
+ORDER BY minutes_on DESC NULLS LAST;
+
+-- Migration complete
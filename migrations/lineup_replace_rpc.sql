@@ -0,0 +1,174 @@
+-- Migration: Atomic lineup replace
+-- Created: 2026-10-17
+-- Description: Adds replace_game_lineups(), which swaps a game's lineup_stints
+--              and player_on_court_stints in one transaction.  The lineup
+--              builder used to delete by ID in batches of 50 and re-insert in
+--              chunks of 200, so readers could see a game with no (or half
+--              its) lineups mid-rebuild.
+--              Apply to both public and test schemas.
+--
+-- p_delete_ids NULL   -> replace every stint for the game (full rebuild)
+-- p_delete_ids array  -> replace only those stints (live incremental build)
+-- Returns the number of lineup_stints rows the game has afterwards.
+
+-- ========================================
+-- replace_game_lineups(game_key, stints, players, delete_ids)
+-- ========================================
+
+CREATE OR REPLACE FUNCTION public.replace_game_lineups(
+    p_game_key   text,
+    p_stints     jsonb,
+    p_players    jsonb,
+    p_delete_ids uuid[] DEFAULT NULL
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_delete_ids IS NULL THEN
+        DELETE FROM public.player_on_court_stints WHERE game_key = p_game_key;
+        DELETE FROM public.lineup_stints WHERE game_key = p_game_key;
+    ELSE
+        DELETE FROM public.player_on_court_stints
+        WHERE game_key = p_game_key AND stint_id = ANY(p_delete_ids);
+        DELETE FROM public.lineup_stints
+        WHERE game_key = p_game_key AND id = ANY(p_delete_ids);
+    END IF;
+
+    INSERT INTO public.lineup_stints (
+        id, game_key, league_id, team_id, lineup_key,
+        lineup_player_ids, lineup_names, period,
+        start_action, end_action, start_clock, end_clock,
+        start_game_secs, end_game_secs, seconds_played,
+        points_for, points_against,
+        fg2_made, fg2_attempted, fg3_made, fg3_attempted,
+        ft_made, ft_attempted, oreb, dreb,
+        assists, turnovers, fouls, steals, blocks,
+        possessions_for, possessions_against, is_valid_lineup
+    )
+    SELECT
+        id, game_key, league_id, team_id, lineup_key,
+        lineup_player_ids, lineup_names, period,
+        start_action, end_action, start_clock, end_clock,
+        start_game_secs, end_game_secs, seconds_played,
+        points_for, points_against,
+        fg2_made, fg2_attempted, fg3_made, fg3_attempted,
+        ft_made, ft_attempted, oreb, dreb,
+        assists, turnovers, fouls, steals, blocks,
+        possessions_for, possessions_against, is_valid_lineup
+    FROM jsonb_to_recordset(COALESCE(p_stints, '[]'::jsonb)) AS s(
+        id uuid, game_key text, league_id uuid, team_id uuid, lineup_key text,
+        lineup_player_ids text[], lineup_names text[], period integer,
+        start_action integer, end_action integer, start_clock text, end_clock text,
+        start_game_secs integer, end_game_secs integer, seconds_played integer,
+        points_for integer, points_against integer,
+        fg2_made integer, fg2_attempted integer, fg3_made integer, fg3_attempted integer,
+        ft_made integer, ft_attempted integer, oreb integer, dreb integer,
+        assists integer, turnovers integer, fouls integer, steals integer, blocks integer,
+        possessions_for integer, possessions_against integer, is_valid_lineup boolean
+    );
+
+    INSERT INTO public.player_on_court_stints (
+        stint_id, game_key, league_id, team_id,
+        player_id, player_name, shirt_number, lineup_key,
+        period, start_game_secs, end_game_secs,
+        seconds_played, points_for, points_against,
+        possessions_for, possessions_against
+    )
+    SELECT
+        stint_id, game_key, league_id, team_id,
+        player_id, player_name, shirt_number, lineup_key,
+        period, start_game_secs, end_game_secs,
+        seconds_played, points_for, points_against,
+        possessions_for, possessions_against
+    FROM jsonb_to_recordset(COALESCE(p_players, '[]'::jsonb)) AS p(
+        stint_id uuid, game_key text, league_id uuid, team_id uuid,
+        player_id uuid, player_name text, shirt_number text, lineup_key text,
+        period integer, start_game_secs integer, end_game_secs integer,
+        seconds_played integer, points_for integer, points_against integer,
+        possessions_for integer, possessions_against integer
+    );
+
+    RETURN (SELECT count(*) FROM public.lineup_stints WHERE game_key = p_game_key);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION test.replace_game_lineups(
+    p_game_key   text,
+    p_stints     jsonb,
+    p_players    jsonb,
+    p_delete_ids uuid[] DEFAULT NULL
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_delete_ids IS NULL THEN
+        DELETE FROM test.player_on_court_stints WHERE game_key = p_game_key;
+        DELETE FROM test.lineup_stints WHERE game_key = p_game_key;
+    ELSE
+        DELETE FROM test.player_on_court_stints
+        WHERE game_key = p_game_key AND stint_id = ANY(p_delete_ids);
+        DELETE FROM test.lineup_stints
+        WHERE game_key = p_game_key AND id = ANY(p_delete_ids);
+    END IF;
+
+    INSERT INTO test.lineup_stints (
+        id, game_key, league_id, team_id, lineup_key,
+        lineup_player_ids, lineup_names, period,
+        start_action, end_action, start_clock, end_clock,
+        start_game_secs, end_game_secs, seconds_played,
+        points_for, points_against,
+        fg2_made, fg2_attempted, fg3_made, fg3_attempted,
+        ft_made, ft_attempted, oreb, dreb,
+        assists, turnovers, fouls, steals, blocks,
+        possessions_for, possessions_against, is_valid_lineup
+    )
+    SELECT
+        id, game_key, league_id, team_id, lineup_key,
+        lineup_player_ids, lineup_names, period,
+        start_action, end_action, start_clock, end_clock,
+        start_game_secs, end_game_secs, seconds_played,
+        points_for, points_against,
+        fg2_made, fg2_attempted, fg3_made, fg3_attempted,
+        ft_made, ft_attempted, oreb, dreb,
+        assists, turnovers, fouls, steals, blocks,
+        possessions_for, possessions_against, is_valid_lineup
+    FROM jsonb_to_recordset(COALESCE(p_stints, '[]'::jsonb)) AS s(
+        id uuid, game_key text, league_id uuid, team_id uuid, lineup_key text,
+        lineup_player_ids text[], lineup_names text[], period integer,
+        start_action integer, end_action integer, start_clock text, end_clock text,
+        start_game_secs integer, end_game_secs integer, seconds_played integer,
+        points_for integer, points_against integer,
+        fg2_made integer, fg2_attempted integer, fg3_made integer, fg3_attempted integer,
+        ft_made integer, ft_attempted integer, oreb integer, dreb integer,
+        assists integer, turnovers integer, fouls integer, steals integer, blocks integer,
+        possessions_for integer, possessions_against integer, is_valid_lineup boolean
+    );
+
+    INSERT INTO test.player_on_court_stints (
+        stint_id, game_key, league_id, team_id,
+        player_id, player_name, shirt_number, lineup_key,
+        period, start_game_secs, end_game_secs,
+        seconds_played, points_for, points_against,
+        possessions_for, possessions_against
+    )
+    SELECT
+        stint_id, game_key, league_id, team_id,
+        player_id, player_name, shirt_number, lineup_key,
+        period, start_game_secs, end_game_secs,
+        seconds_played, points_for, points_against,
+        possessions_for, possessions_against
+    FROM jsonb_to_recordset(COALESCE(p_players, '[]'::jsonb)) AS p(
+        stint_id uuid, game_key text, league_id uuid, team_id uuid,
+        player_id uuid, player_name text, shirt_number text, lineup_key text,
+        period integer, start_game_secs integer, end_game_secs integer,
+        seconds_played integer, points_for integer, points_against integer,
+        possessions_for integer, possessions_against integer
+    );
+
+    RETURN (SELECT count(*) FROM test.lineup_stints WHERE game_key = p_game_key);
+END;
+$$;
+
+-- Migration complete
@@ -0,0 +1,71 @@
+-- Migration: Worker due-game selection
+-- Created: 2026-10-17
+-- Description: Adds get_due_games(), a single-query replacement for the four
+--              PostgREST round trips the LiveStats worker used to make every
+--              poll cycle, plus a partial index covering its filter.
+--              Apply to both public and test schemas.
+--
+-- A game is due when it has a LiveStats URL, its next_poll_at has passed (or
+-- was never set), and either:
+--   - it is scheduled/live/error and its matchtime is inside the poll window, or
+--   - it is final but has not been parsed yet.
+
+-- ========================================
+-- PARTIAL INDEX
+-- ========================================
+
+CREATE INDEX IF NOT EXISTS game_schedule_due_poll_idx
+    ON public.game_schedule (status, next_poll_at, matchtime)
+    WHERE "LiveStats URL" IS NOT NULL
+      AND (status IN ('scheduled', 'live', 'error') OR parsed_at IS NULL);
+
+CREATE INDEX IF NOT EXISTS test_game_schedule_due_poll_idx
+    ON test.game_schedule (status, next_poll_at, matchtime)
+    WHERE "LiveStats URL" IS NOT NULL
+      AND (status IN ('scheduled', 'live', 'error') OR parsed_at IS NULL);
+
+-- ========================================
+-- get_due_games(window_start, window_end)
+-- ========================================
+
+CREATE OR REPLACE FUNCTION public.get_due_games(
+    p_window_start timestamptz,
+    p_window_end   timestamptz
+)
+RETURNS SETOF public.game_schedule
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM public.game_schedule
+    WHERE "LiveStats URL" IS NOT NULL
+      AND (next_poll_at IS NULL OR next_poll_at <= now())
+      AND (
+            (status IN ('scheduled', 'live', 'error')
+             AND matchtime >= p_window_start
+             AND matchtime <= p_window_end)
+         OR (status = 'final' AND parsed_at IS NULL)
+      );
+$$;
+
+CREATE OR REPLACE FUNCTION test.get_due_games(
+    p_window_start timestamptz,
+    p_window_end   timestamptz
+)
+RETURNS SETOF test.game_schedule
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM test.game_schedule
+    WHERE "LiveStats URL" IS NOT NULL
+      AND (next_poll_at IS NULL OR next_poll_at <= now())
+      AND (
+            (status IN ('scheduled', 'live', 'error')
+             AND matchtime >= p_window_start
+             AND matchtime <= p_window_end)
+         OR (status = 'final' AND parsed_at IS NULL)
+      );
+$$;
+
+-- Migration complete
@@ -0,0 +1,24 @@
+-- Migration: Persist LiveStats conditional-request validators
+-- Created: 2026-10-17
+-- Description: Stores the ETag / Last-Modified headers of the last 200
+--              response from LiveStats on the game_schedule row so the
+--              worker can keep sending If-None-Match / If-Modified-Since
+--              across restarts, deploys and multiple worker replicas.
+--              Apply to both public and test schemas.
+--
+-- get_due_games() returns SETOF game_schedule, so the new columns are picked
+-- up by the worker without redefining the function.
+
+-- ========================================
+-- COLUMNS
+-- ========================================
+
+ALTER TABLE public.game_schedule
+    ADD COLUMN IF NOT EXISTS livestats_etag TEXT,
+    ADD COLUMN IF NOT EXISTS livestats_last_modified TEXT;
+
+ALTER TABLE test.game_schedule
+    ADD COLUMN IF NOT EXISTS livestats_etag TEXT,
+    ADD COLUMN IF NOT EXISTS livestats_last_modified TEXT;
+
+-- Migration complete
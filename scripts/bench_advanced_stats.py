@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+bench_advanced_stats.py
+-----------------------
+Benchmark the scalar and vectorised advanced-stats engines on a synthetic
+league, without touching Supabase.
+
+Measures, for the same generated team_stats / player_stats rows:
+  - team metrics: team_advanced_fields per row vs advanced_stats_engine
+  - player metrics: player_advanced_fields per row vs advanced_stats_engine
+and checks that both produce identical rows.
+
+Usage:
+  python scripts/bench_advanced_stats.py [--games 420] [--players 24] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import advanced_stats_engine as engine
+from app.utils.advanced_team_stats import team_advanced_fields
+from app.utils.advanced_player_stats import player_advanced_fields
+
+TEAM_COLUMNS = engine.TEAM_COLUMNS + ("tot_sblockshots", "tot_spersonalfouls")
+
+
+def make_league(rng, n_games, n_players):
+    pairs, entries = [], []
+    for g in range(n_games):
+        teams = []
+        for side in range(2):
+            row = {"id": f"t{g}-{side}", "game_key": f"g{g}", "team_id": f"team{side}"}
+            row.update({col: rng.randint(0, 90) for col in TEAM_COLUMNS})
+            row["possessions"] = rng.uniform(60, 85)
+            teams.append(row)
+        pairs += [(teams[0], teams[1]), (teams[1], teams[0])]
+        for i in range(n_players):
+            player = {"id": f"p{g}-{i}", "sminutes": f"{rng.randint(0, 39)}:{rng.randint(0, 59):02d}"}
+            player.update({col: rng.randint(0, 25) for col in engine.PLAYER_COLUMNS})
+            team, opp = (teams[0], teams[1]) if i % 2 else (teams[1], teams[0])
+            entries.append((player, team, opp))
+    return pairs, entries
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs vectorised advanced stats")
+    parser.add_argument("--games", type=int, default=420)
+    parser.add_argument("--players", type=int, default=24, help="player rows per game")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    pairs, entries = make_league(random.Random(args.seed), args.games, args.players)
+    print(f"League: {args.games} games, {len(pairs)} team rows, {len(entries)} player rows")
+
+    benches = (
+        ("team", len(pairs),
+         lambda: [{"id": t["id"], **team_advanced_fields(t, o)} for t, o in pairs],
+         lambda: engine.team_advanced_rows(pairs)),
+        ("player", len(entries),
+         lambda: [{"id": p["id"], **player_advanced_fields(p, t, o)} for p, t, o in entries],
+         lambda: engine.player_advanced_rows(entries)),
+    )
+    for name, rows, scalar, vectorized in benches:
+        scalar_secs, expected = best_of(args.repeat, scalar)
+        vector_secs, actual = best_of(args.repeat, vectorized)
+        status = "identical" if actual == expected else "MISMATCH"
+        print(f"  {name:6s} scalar    : {scalar_secs:.3f}s ({rows / scalar_secs:,.0f} rows/sec)")
+        print(f"  {name:6s} vectorized: {vector_secs:.3f}s ({rows / vector_secs:,.0f} rows/sec)  "
+              f"{scalar_secs / vector_secs:.1f}x, results {status}")
+
+
+if __name__ == "__main__":
+    main()
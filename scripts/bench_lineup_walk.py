@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+bench_lineup_walk.py
+--------------------
+Benchmark the lineup reconstruction walk over a synthetic season, without
+touching Supabase.
+
+Measures, for the same generated PBP:
+  - peak memory of holding the season's events (live_events-shaped dicts vs
+    the compact records from lineup_builder.compact_events)
+  - walk throughput (games/sec, events/sec) from dict rows, which includes
+    the conversion, and from pre-converted compact records
+
+Usage:
+  python scripts/bench_lineup_walk.py [--games 300] [--events 450] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import lineup_builder as lb
+
+TEAMS = (("aaaaaaaa-0000-0000-0000-000000000001", "1"), ("bbbbbbbb-0000-0000-0000-000000000002", "2"))
+ACTIONS = ("2pt", "2pt", "3pt", "freethrow", "rebound", "rebound", "turnover", "foul", "assist", "steal", "block")
+
+
+def _roster(team_id, team_no):
+    return [
+        {
+            "game_key": None, "team_id": team_id, "team_no": team_no,
+            "player_id": f"{team_id[:8]}-{n:04d}-0000-0000-000000000000",
+            "player_name": f"Player{team_no} Number{n}", "shirt_number": str(n), "pno": n,
+            "starter": n <= 5, "active": True,
+        }
+        for n in range(1, 13)
+    ]
+
+
+def make_game(rng, game_key, n_events):
+    rosters = {team_id: _roster(team_id, team_no) for team_id, team_no in TEAMS}
+    on_court = {team_no: list(range(1, 6)) for _, team_no in TEAMS}
+    events = []
+    action = 0
+    per_period = max(1, n_events // 4)
+    for period in range(1, 5):
+        for i in range(per_period):
+            action += 1
+            secs_left = 600 - int(600 * i / per_period)
+            clock = f"{secs_left // 60:02d}:{secs_left % 60:02d}"
+            team_id, team_no = rng.choice(TEAMS)
+            if rng.random() < 0.06:
+                out_n = rng.choice(on_court[team_no])
+                in_n = rng.choice([n for n in range(1, 13) if n not in on_court[team_no]])
+                on_court[team_no][on_court[team_no].index(out_n)] = in_n
+                for direction, n in (("out", out_n), ("in", in_n)):
+                    events.append(_event(game_key, action, period, clock, team_id, team_no, n, "substitution", direction, True))
+                    action += 1
+                continue
+            action_type = rng.choice(ACTIONS)
+            sub_type = rng.choice(("offensive", "defensive")) if action_type == "rebound" else ""
+            n = rng.choice(on_court[team_no])
+            events.append(_event(game_key, action, period, clock, team_id, team_no, n, action_type, sub_type, rng.random() < 0.5))
+        action += 1
+        events.append(_event(game_key, action, period, "00:00", None, "", None, "endofperiod", "", False))
+    return rosters, events
+
+
+def _event(game_key, action, period, clock, team_id, team_no, n, action_type, sub_type, success):
+    return {
+        "game_key": game_key, "action_number": action, "period": period, "clock": clock,
+        "team_id": team_id, "team_no": team_no,
+        "player_id": f"{team_id[:8]}-{n:04d}-0000-0000-000000000000" if team_id else None,
+        "player_name": f"Player{team_no} Number{n}" if n else None,
+        "shirt_number": str(n) if n else None, "pno": n,
+        "action_type": action_type, "sub_type": sub_type,
+        "success": success, "scoring": True, "score": None,
+        "team_score": None, "opp_score": None, "period_type": "REGULAR",
+    }
+
+
+def peak_kib(build):
+    tracemalloc.start()
+    held = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return peak / 1024
+
+
+def time_walk(season, events_key, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for game in season:
+            lb.compute_stints(game["game_key"], "league", game["rosters"], game[events_key])
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lineup walk on a synthetic season")
+    parser.add_argument("--games", type=int, default=300)
+    parser.add_argument("--events", type=int, default=450, help="approximate events per game")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    season = []
+    for g in range(args.games):
+        rosters, events = make_game(rng, f"bench-{g}", args.events)
+        season.append({"game_key": f"bench-{g}", "rosters": rosters, "events": events})
+    total_events = sum(len(g["events"]) for g in season)
+
+    has_compact = hasattr(lb, "compact_events")
+    print(f"Season: {args.games} games, {total_events} events")
+
+    # Rebuild the rows inside the traced region so their allocations count.
+    dict_kib = peak_kib(lambda: [[dict(e) for e in g["events"]] for g in season])
+    print(f"  dict rows       : peak {dict_kib:,.0f} KiB")
+    if has_compact:
+        compact_kib = peak_kib(lambda: [lb.compact_events(g["events"]) for g in season])
+        print(f"  compact records : peak {compact_kib:,.0f} KiB ({compact_kib / dict_kib:.0%} of dict rows)")
+        for g in season:
+            g["compact"] = lb.compact_events(g["events"])
+
+    logging_level = lb.log.level
+    lb.log.setLevel("ERROR")  # degraded-stint warnings are expected on random data
+    try:
+        walk_dicts = time_walk(season, "events", args.repeat)
+        print(f"  walk from dicts : {walk_dicts:.2f}s  "
+              f"({args.games / walk_dicts:,.0f} games/sec, {total_events / walk_dicts:,.0f} events/sec)")
+        if has_compact:
+            walk_compact = time_walk(season, "compact", args.repeat)
+            print(f"  walk from compact records: {walk_compact:.2f}s  "
+                  f"({args.games / walk_compact:,.0f} games/sec, {total_events / walk_compact:,.0f} events/sec)")
+    finally:
+        lb.log.setLevel(logging_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Tests for the bounded TTL/LRU entity cache.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.entity_cache import TTLCache, MISSING
+
+
+def test_hit_and_miss_counters():
+    cache = TTLCache("t", maxsize=10, ttl=60)
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_none_is_a_cacheable_value():
+    cache = TTLCache("t", maxsize=10, ttl=60)
+    cache.set("a", None)
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("t", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_expired_entries_miss():
+    cache = TTLCache("t", maxsize=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
+
+
+def test_invalidate_one_key_or_all():
+    cache = TTLCache("t", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == 2
+    cache.invalidate()
+    assert len(cache) == 0
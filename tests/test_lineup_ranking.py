@@ -0,0 +1,77 @@
+"""
+Tests for /api/lineups/top paging: the heap-selected page must be the same
+slice a full sort gives, and bad limit/offset/sort_by values are rejected.
+"""
+import sys
+import os
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("flask")
+# importorskip("supabase") would pass on the repo's supabase/ SQL directory
+# (a namespace package); supabase.client only exists in supabase-py.
+pytest.importorskip("supabase.client")
+
+# chat_data builds its client at import; no request reaches it here.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+
+from flask import Flask
+
+from app.routes.lineups import lineups_bp, _rank_lineups, _LINEUP_SORT_KEYS
+
+
+def _lineups(rng, count):
+    lineups = []
+    for n in range(count):
+        lineups.append({
+            "lineup_key": f"lineup-{n}",
+            # small value ranges so ties (and None ratings) are common
+            "net_rating": rng.choice((None, -5.0, 0.0, 3.5, 3.5, 12.0)),
+            "off_rating": rng.choice((None, 98.0, 110.5, 110.5)),
+            "seconds_played": rng.choice((0, 120, 120, 600)),
+            "net_points": rng.randint(-3, 3),
+        })
+    return lineups
+
+
+@pytest.mark.parametrize("sort_by", sorted(_LINEUP_SORT_KEYS))
+def test_heap_page_matches_full_sort(sort_by):
+    lineups = _lineups(random.Random(sort_by), 200)
+    ranked = sorted(lineups, key=_LINEUP_SORT_KEYS[sort_by], reverse=True)
+
+    for offset, limit in ((0, 10), (5, 20), (190, 25), (0, 0), (250, 5)):
+        assert _rank_lineups(lineups, sort_by, offset, limit) == ranked[offset:offset + limit]
+    assert _rank_lineups(lineups, sort_by, 7, None) == ranked[7:]
+
+
+def test_none_ratings_rank_last():
+    lineups = [
+        {"net_rating": None, "off_rating": None, "seconds_played": 900, "net_points": 0},
+        {"net_rating": -20.0, "off_rating": 80.0, "seconds_played": 10, "net_points": 0},
+    ]
+    assert _rank_lineups(lineups, "net_rating", 0, 1) == [lineups[1]]
+    assert _rank_lineups(lineups, "off_rating", 0, 1) == [lineups[1]]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(lineups_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("query", (
+    "limit=abc",
+    "offset=1.5",
+    "limit=-1",
+    "offset=-2",
+    "sort_by=points",
+))
+def test_bad_paging_params_are_rejected(client, query):
+    res = client.get(f"/api/lineups/top?{query}")
+    assert res.status_code == 400
+    assert "message" in res.get_json()
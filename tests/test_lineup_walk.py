@@ -0,0 +1,118 @@
+"""
+Tests for resuming the lineup walk from a checkpoint.
+
+A live game is built incrementally: the walk is checkpointed before finish(),
+later events are fed to a copy of it, and only the stints closed after the
+checkpoint are rewritten.  The stints on disk must end up identical to a
+full rebuild over all events.
+"""
+import sys
+import os
+import copy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import lineup_builder
+from app.utils.lineup_builder import _GameWalk
+
+TEAM_A = "aaaa-aaaa"
+TEAM_B = "bbbb-bbbb"
+GAME = "test-game"
+LEAGUE = "test-league"
+
+
+def _roster(team_id, team_no):
+    return [
+        {
+            "team_id": team_id, "team_no": team_no, "player_id": f"{team_id}-{n}",
+            "player_name": f"Player {team_no}{n}", "shirt_number": str(n),
+            "starter": n <= 5, "active": True,
+        }
+        for n in range(1, 9)
+    ]
+
+
+ROSTERS = {TEAM_A: _roster(TEAM_A, "1"), TEAM_B: _roster(TEAM_B, "2")}
+
+
+def _evt(action, period, clock, team_no, action_type, sub_type="", n=1, success=True):
+    team_id = TEAM_A if team_no == "1" else TEAM_B
+    return {
+        "action_number": action, "period": period, "clock": clock, "team_no": team_no,
+        "player_id": f"{team_id}-{n}", "player_name": f"Player {team_no}{n}",
+        "shirt_number": str(n), "action_type": action_type, "sub_type": sub_type,
+        "success": success, "scoring": True,
+    }
+
+
+EVENTS = [
+    _evt(1, 1, "09:40", "1", "2pt"),
+    _evt(2, 1, "09:10", "2", "3pt", success=False),
+    _evt(3, 1, "09:08", "1", "rebound", "defensive"),
+    _evt(4, 1, "08:30", "1", "substitution", "out", n=1),
+    _evt(5, 1, "08:30", "1", "substitution", "in", n=6),
+    _evt(6, 1, "08:00", "2", "turnover"),
+    _evt(7, 1, "06:45", "1", "3pt"),
+    _evt(8, 2, "09:50", "2", "2pt"),
+    _evt(9, 2, "09:20", "2", "substitution", "out", n=2),
+    _evt(10, 2, "09:20", "2", "substitution", "in", n=7),
+    _evt(11, 2, "08:55", "1", "freethrow"),
+    _evt(12, 2, "08:10", "2", "2pt"),
+]
+
+
+def _full_build(events):
+    walk = _GameWalk(GAME, LEAGUE, ROSTERS)
+    walk.feed(events)
+    walk.finish()
+    return walk.completed_stints()
+
+
+def _incremental_build(batches):
+    """Replay the live path: returns the stints that would be on disk."""
+    written, provisional, checkpoint = [], [], None
+    for batch in batches:
+        walk = copy.deepcopy(checkpoint) if checkpoint else _GameWalk(GAME, LEAGUE, ROSTERS)
+        counts = walk.completed_counts()
+        walk.feed(batch)
+        checkpoint = copy.deepcopy(walk)
+        closed_now = walk.finish()
+        written = [s for s in written if not any(s is p for p in provisional)]
+        written.extend(walk.stints_since(counts))
+        provisional = closed_now
+    return written
+
+
+def _key(stint):
+    return (stint["team_id"], stint["start_action"])
+
+
+def test_resumed_walk_matches_full_build():
+    full = sorted(_full_build(EVENTS), key=_key)
+    for cut in range(1, len(EVENTS)):
+        resumed = sorted(_incremental_build([EVENTS[:cut], EVENTS[cut:]]), key=_key)
+        assert resumed == full, f"mismatch when resuming after action {cut}"
+
+
+def test_many_small_batches_match_full_build():
+    batches = [[e] for e in EVENTS]
+    assert sorted(_incremental_build(batches), key=_key) == sorted(_full_build(EVENTS), key=_key)
+
+
+def test_finish_does_not_touch_checkpoint():
+    walk = _GameWalk(GAME, LEAGUE, ROSTERS)
+    walk.feed(EVENTS[:5])
+    checkpoint = copy.deepcopy(walk)
+    closed = walk.finish()
+    assert closed
+    assert checkpoint.completed_counts() != walk.completed_counts()
+    assert checkpoint.last_action == 5
+
+
+def test_checkpoints_are_capped(monkeypatch):
+    monkeypatch.setattr(lineup_builder, "LINEUP_CHECKPOINT_MAX", 2)
+    monkeypatch.setattr(lineup_builder, "_checkpoints", {})
+    for game_key in ("g1", "g2", "g1", "g3"):
+        lineup_builder._save_checkpoint(game_key, LEAGUE, None, {}, [], 0)
+    # g1 was saved again after g2, so g2 is the oldest and goes first
+    assert list(lineup_builder._checkpoints) == ["g1", "g3"]
@@ -0,0 +1,98 @@
+"""
+PlayerNameIndex must give exactly the answers of the linear scans it
+replaces (find_similar_player and the cleanup script's pairwise pass).
+"""
+import sys
+import os
+import random
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.name_matcher import PlayerNameIndex, match_similar_player, normalize_player_name
+
+
+def brute_force_similar_player(full_name, players, similarity_threshold=0.85):
+    """The original find_similar_player loop, minus the Supabase query."""
+    normalized_search = normalize_player_name(full_name)
+    best_match = None
+    best_score = 0.0
+    search_parts = normalized_search.split()
+    for player in players:
+        existing_name = normalize_player_name(player["full_name"])
+        existing_parts = existing_name.split()
+        if len(search_parts) >= 2 and len(existing_parts) >= 2:
+            search_last = search_parts[-1].lower()
+            existing_last = existing_parts[-1].lower()
+            search_first = search_parts[0].lower()
+            existing_first = existing_parts[0].lower()
+            if search_last == existing_last:
+                if (len(search_first) == 1 and existing_first.startswith(search_first)) or \
+                   (len(existing_first) == 1 and search_first.startswith(existing_first)):
+                    best_match = player
+                    break
+        similarity = SequenceMatcher(None, normalized_search.lower(), existing_name.lower()).ratio()
+        if similarity > best_score and similarity >= similarity_threshold:
+            best_score = similarity
+            best_match = player
+    return best_match
+
+
+FIRST = ["John", "Jon", "J", "Jonathan", "Amy", "A", "Ami", "Marcus", "Markus", "M", "Lee", "Li", "Chris", "Kris"]
+LAST = ["Smith", "Smyth", "Smithe", "Jones", "Jone", "Okafor", "Okafur", "Brown", "Browne", "Lee", "Li", "O'Neil", "ONeil"]
+
+
+def _random_players(rng, n):
+    players = []
+    for i in range(n):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        if rng.random() < 0.1:
+            name = rng.choice(LAST)  # single-token names exist in the data
+        if rng.random() < 0.1:
+            name = "  " + name.replace(" ", "   ") + " "
+        players.append({"id": i, "full_name": name})
+    return players
+
+
+def test_initial_rule():
+    players = [{"id": 1, "full_name": "Marcus Okafor"}, {"id": 2, "full_name": "Amy Jones"}]
+    assert match_similar_player("M Okafor", players)["id"] == 1
+    assert match_similar_player("A. Okafor", players) is None
+
+
+def test_first_initial_match_wins_over_a_better_ratio():
+    players = [{"id": 1, "full_name": "John Smith"}, {"id": 2, "full_name": "J Smith"}]
+    assert match_similar_player("J Smith", players)["id"] == 1
+
+
+def test_threshold_is_respected():
+    players = [{"id": 1, "full_name": "Chris Brown"}]
+    assert match_similar_player("Kris Browne", players) is None
+    assert match_similar_player("Kris Browne", players, similarity_threshold=0.75)["id"] == 1
+
+
+def test_matches_brute_force_on_random_rosters():
+    rng = random.Random(1234)
+    for _ in range(200):
+        players = _random_players(rng, rng.randint(0, 25))
+        index = PlayerNameIndex(players)
+        for threshold in (0.85, 0.75, 0.5):
+            for _ in range(5):
+                query = rng.choice(players)["full_name"] if players and rng.random() < 0.3 else \
+                    f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                expected = brute_force_similar_player(query, players, threshold)
+                got = index.best_match(query, threshold)
+                assert (got or {}).get("id") == (expected or {}).get("id"), (query, threshold)
+
+
+def test_similar_returns_every_pair_above_threshold():
+    rng = random.Random(99)
+    players = _random_players(rng, 60)
+    index = PlayerNameIndex(players)
+    for p in players:
+        name = normalize_player_name(p["full_name"]).lower()
+        expected = [
+            q["id"] for q in players
+            if SequenceMatcher(None, name, normalize_player_name(q["full_name"]).lower()).ratio() >= 0.85
+        ]
+        assert [q["id"] for q, _ in index.similar(p["full_name"])] == expected
@@ -0,0 +1,260 @@
+"""
+Tests for /api/on-off/team: every player's on/off/diff blocks must be the
+ones /api/on-off/player returns for that player, with and without
+valid_only, whether served from player_on_off_aggregates or (before that
+table is migrated) from the raw stints.
+"""
+import sys
+import os
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("flask")
+# importorskip("supabase") would pass on the repo's supabase/ SQL directory
+# (a namespace package); supabase.client only exists in supabase-py.
+pytest.importorskip("supabase.client")
+
+# chat_data builds its client at import; the tests swap in FakeDB.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+
+from flask import Flask
+
+from app.routes import lineups
+
+LEAGUE = "league-1"
+TEAMS = ("team-a", "team-b")
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class MissingTable(Exception):
+    code = "PGRST205"
+
+
+class _Query:
+    """The select / eq / in_ / order / range chain the on/off endpoints use."""
+
+    def __init__(self, rows):
+        # None: the table does not exist
+        self._rows = rows
+        self._columns = None
+        self._order = []
+        self._range = None
+
+    def select(self, columns):
+        self._columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def eq(self, column, value):
+        if self._rows is not None:
+            self._rows = [r for r in self._rows if r.get(column) == value]
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        if self._rows is not None:
+            self._rows = [r for r in self._rows if r.get(column) in values]
+        return self
+
+    def order(self, column):
+        self._order.append(column)
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def execute(self):
+        if self._rows is None:
+            raise MissingTable("Could not find the table")
+        rows = self._rows
+        if self._order:
+            rows = sorted(rows, key=lambda r: tuple(str(r.get(c)) for c in self._order))
+        if self._range:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        # Project like PostgREST, so a missing column shows up as a KeyError
+        return _Result([{c: r[c] for c in self._columns} for r in rows])
+
+
+class FakeDB:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        rows = self.tables.get(name)
+        return _Query(None if rows is None else list(rows))
+
+
+def _season(seed):
+    """lineup_stints, player_on_court_stints and team_stats for a few games."""
+    rng = random.Random(seed)
+    roster = {
+        team: [(f"{team}-p{n}", f"{team} player {n}") for n in range(8)]
+        for team in TEAMS
+    }
+    stints, poc, team_stats = [], [], []
+    for g in range(4):
+        game_key = f"game-{g}"
+        for team in TEAMS:
+            totals = {"pts": 0, "poss": 0, "oreb": 0, "dreb": 0}
+            for s in range(rng.randint(4, 7)):
+                stint = {
+                    "id": f"{game_key}-{team}-s{s}",
+                    "game_key": game_key,
+                    "league_id": LEAGUE,
+                    "team_id": team,
+                    # invalid lineups carry stats too, so valid_only matters
+                    "is_valid_lineup": rng.random() > 0.25,
+                    "seconds_played": rng.randint(30, 400),
+                    "points_for": rng.randint(0, 15),
+                    "points_against": rng.randint(0, 15),
+                    "possessions_for": rng.randint(1, 12),
+                    "possessions_against": rng.randint(1, 12),
+                }
+                for col in ("oreb", "dreb", "assists", "turnovers", "steals", "blocks",
+                            "fg2_made", "fg3_made", "ft_made"):
+                    stint[col] = rng.randint(0, 4)
+                for kind in ("fg2", "fg3", "ft"):
+                    stint[f"{kind}_attempted"] = stint[f"{kind}_made"] + rng.randint(0, 4)
+                stints.append(stint)
+                totals["pts"] += stint["points_for"]
+                totals["poss"] += stint["possessions_for"]
+                totals["oreb"] += stint["oreb"]
+                totals["dreb"] += stint["dreb"]
+
+                on_court = rng.sample(roster[team], 5)
+                if rng.random() < 0.2:
+                    # a player the builder could not resolve
+                    on_court[0] = (None, "Unknown")
+                for pid, name in on_court:
+                    poc.append({
+                        "id": f"{stint['id']}-{pid}",
+                        "stint_id": stint["id"],
+                        "game_key": game_key,
+                        "league_id": LEAGUE,
+                        "team_id": team,
+                        "player_id": pid,
+                        "player_name": name,
+                        "shirt_number": None,
+                        "seconds_played": stint["seconds_played"],
+                        "points_for": stint["points_for"],
+                        "points_against": stint["points_against"],
+                        "possessions_for": stint["possessions_for"],
+                        "possessions_against": stint["possessions_against"],
+                    })
+            team_stats.append({
+                "game_key": game_key,
+                "team_id": team,
+                "tot_spoints": totals["pts"],
+                "opp_points": None,
+                "possessions": totals["poss"],
+                "opp_possessions": None,
+                "tot_sreboundsoffensive": totals["oreb"],
+                "tot_sreboundstotal": totals["oreb"] + totals["dreb"],
+                "tot_sassists": rng.randint(10, 25),
+                "tot_sfieldgoalsmade": rng.randint(20, 35),
+                "tot_sfieldgoalsattempted": rng.randint(50, 75),
+                "tot_sthreepointersattempted": rng.randint(15, 30),
+                "tot_sfreethrowsattempted": rng.randint(10, 25),
+                "tot_sfreethrowsmade": rng.randint(5, 10),
+                "tot_sturnovers": rng.randint(8, 18),
+                "tot_ssteals": rng.randint(3, 12),
+                "tot_sblocks": rng.randint(1, 6),
+            })
+    by_key = {(ts["game_key"], ts["team_id"]): ts for ts in team_stats}
+    for (game_key, team), ts in by_key.items():
+        opp = by_key[(game_key, TEAMS[1 - TEAMS.index(team)])]
+        ts["opp_points"] = opp["tot_spoints"]
+        ts["opp_possessions"] = opp["possessions"]
+    return {"lineup_stints": stints, "player_on_court_stints": poc, "team_stats": team_stats}
+
+
+_TOTALS = ("stint_count", "seconds_played", "points_for", "points_against",
+           "possessions_for", "possessions_against") + lineups._ON_OFF_BOX_COLUMNS
+
+
+def _aggregate(tables):
+    """player_on_off_aggregates as its triggers would leave it."""
+    stints = {s["id"]: s for s in tables["lineup_stints"]}
+    agg = {}
+    for r in tables["player_on_court_stints"]:
+        if not r["player_id"]:
+            continue
+        stint = stints[r["stint_id"]]
+        key = (r["game_key"], r["league_id"], r["team_id"], r["player_id"], stint["is_valid_lineup"])
+        row = agg.setdefault(key, dict(
+            zip(("game_key", "league_id", "team_id", "player_id", "is_valid_lineup"), key),
+            player_name=r["player_name"], **{c: 0 for c in _TOTALS},
+        ))
+        row["stint_count"] += 1
+        for c in _TOTALS[1:]:
+            row[c] += r[c] if c in r else stint[c]
+    return dict(tables, player_on_off_aggregates=list(agg.values()))
+
+
+def _client(monkeypatch, tables):
+    monkeypatch.setattr(lineups, "supabase", FakeDB(tables))
+    app = Flask(__name__)
+    app.register_blueprint(lineups.lineups_bp)
+    return app.test_client()
+
+
+@pytest.fixture(params=("aggregates", "stints"))
+def client(request, monkeypatch):
+    tables = _season(7)
+    if request.param == "aggregates":
+        tables = _aggregate(tables)
+    return _client(monkeypatch, tables)
+
+
+@pytest.mark.parametrize("valid_only", ("true", "false"))
+@pytest.mark.parametrize("team_id", TEAMS)
+def test_team_blocks_match_player_endpoint(client, team_id, valid_only):
+    res = client.get(f"/api/on-off/team/{team_id}?valid_only={valid_only}")
+    assert res.status_code == 200
+    team_rows = res.get_json()
+    assert len(team_rows) == 8
+    assert all(r["team_id"] == team_id for r in team_rows)
+
+    for row in team_rows:
+        player = client.get(f"/api/on-off/player/{row['player_id']}?valid_only={valid_only}")
+        assert player.status_code == 200
+        expected = player.get_json()
+        assert row["player_name"] == expected["player_name"]
+        for block in ("on", "off", "diff"):
+            assert row[block] == expected[block], (row["player_id"], block)
+
+
+def test_valid_only_changes_the_blocks(client):
+    all_rows = {r["player_id"]: r for r in client.get("/api/on-off/team/team-a").get_json()}
+    valid = {r["player_id"]: r for r in client.get("/api/on-off/team/team-a?valid_only=true").get_json()}
+    assert any(valid[pid]["on"] != all_rows[pid]["on"] for pid in valid)
+
+
+def test_unknown_player_has_empty_blocks(client):
+    res = client.get("/api/on-off/player/nobody")
+    assert res.get_json() == {"player_id": "nobody", "on": None, "off": None, "diff": None}
+
+
+@pytest.mark.parametrize("valid_only", ("true", "false"))
+def test_aggregates_match_raw_stints(monkeypatch, valid_only):
+    tables = _season(11)
+    by_source = {}
+    for source, data in (("stints", tables), ("aggregates", _aggregate(tables))):
+        client = _client(monkeypatch, data)
+        by_source[source] = {
+            r["player_id"]: r
+            for team_id in TEAMS
+            for r in client.get(f"/api/on-off/team/{team_id}?valid_only={valid_only}").get_json()
+        }
+    assert by_source["aggregates"].keys() == by_source["stints"].keys()
+    for pid, row in by_source["aggregates"].items():
+        for block in ("on", "off", "diff"):
+            assert row[block] == pytest.approx(by_source["stints"][pid][block]), (pid, block)
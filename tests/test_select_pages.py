@@ -0,0 +1,50 @@
+"""
+Tests for paging PostgREST selects with .range() (helpers.iter_pages).
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import helpers
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """A table of *total* rows behind a server that returns at most max_rows per request."""
+
+    def __init__(self, total, max_rows):
+        self.total = total
+        self.max_rows = max_rows
+        self.requests = 0
+
+    def range(self, start, end):
+        self._start, self._end = start, end
+        return self
+
+    def execute(self):
+        self.requests += 1
+        end = min(self._end, self._start + self.max_rows - 1, self.total - 1)
+        return _Result([{"id": i} for i in range(self._start, end + 1)])
+
+
+def test_pages_until_short_page():
+    query = FakeQuery(total=2500, max_rows=1000)
+    rows = helpers.select_all_pages(lambda: query, page_size=1000)
+    assert [r["id"] for r in rows] == list(range(2500))
+    assert query.requests == 3
+
+
+def test_page_size_above_server_max_rows_is_clamped(monkeypatch):
+    monkeypatch.setattr(helpers, "POSTGREST_MAX_ROWS", 1000)
+    query = FakeQuery(total=2500, max_rows=1000)
+    rows = helpers.select_all_pages(lambda: query, page_size=5000)
+    assert len(rows) == 2500
+
+
+def test_empty_result():
+    assert helpers.select_all_pages(lambda: FakeQuery(total=0, max_rows=1000)) == []
@@ -0,0 +1,110 @@
+"""
+Tests for the chunked advanced-stats writer (bulk_update_stats RPC with
+retry, per-row fallback and the missing-RPC latch).
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import stats_writer
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, run):
+        self._run = run
+        self._id = None
+
+    def eq(self, column, value):
+        self._id = value
+        return self
+
+    def execute(self):
+        return _Result(self._run(self._id))
+
+
+class FakeDB:
+    """
+    Records bulk_update_stats chunks and per-row updates.  rpc_errors are
+    raised by successive RPC calls (None = succeed); existing holds the ids
+    that match a row.
+    """
+
+    def __init__(self, existing, rpc_errors=()):
+        self.existing = set(existing)
+        self.rpc_errors = list(rpc_errors)
+        self.rpc_chunks = []
+        self.row_updates = []
+
+    def rpc(self, name, params):
+        def run(_):
+            error = self.rpc_errors.pop(0) if self.rpc_errors else None
+            if error is not None:
+                raise error
+            self.rpc_chunks.append([r["id"] for r in params["p_rows"]])
+            return sum(1 for r in params["p_rows"] if r["id"] in self.existing)
+        return _Query(run)
+
+    def table(self, name):
+        return self
+
+    def update(self, fields):
+        def run(row_id):
+            self.row_updates.append(row_id)
+            return [{"id": row_id}] if row_id in self.existing else []
+        return _Query(run)
+
+
+class MissingRPC(Exception):
+    code = "PGRST202"
+
+
+def _rows(n):
+    return [{"id": i, "off_rating": 100.0 + i} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(stats_writer, "_bulk_rpc_available", True)
+    monkeypatch.setattr(stats_writer.time, "sleep", lambda s: None)
+
+
+def test_rows_are_sent_in_chunks():
+    db = FakeDB(existing=range(5))
+    assert stats_writer.bulk_update_by_id(db, "team_stats", _rows(5), chunk_size=2) == (5, 0)
+    assert db.rpc_chunks == [[0, 1], [2, 3], [4]]
+    assert db.row_updates == []
+
+
+def test_unmatched_ids_count_as_failed():
+    db = FakeDB(existing={0, 2})
+    assert stats_writer.bulk_update_by_id(db, "team_stats", _rows(3), chunk_size=10) == (2, 1)
+
+
+def test_failed_chunk_is_retried():
+    db = FakeDB(existing=range(3), rpc_errors=[RuntimeError("timeout"), None])
+    assert stats_writer.bulk_update_by_id(db, "team_stats", _rows(3), chunk_size=10, retries=1) == (3, 0)
+    assert db.rpc_chunks == [[0, 1, 2]]
+    assert db.row_updates == []
+
+
+def test_chunk_falls_back_to_per_row_updates_after_retries():
+    db = FakeDB(existing={0, 1}, rpc_errors=[RuntimeError("boom")] * 2)
+    assert stats_writer.bulk_update_by_id(db, "player_stats", _rows(3), chunk_size=10, retries=1) == (2, 1)
+    assert db.row_updates == [0, 1, 2]
+    assert stats_writer._bulk_rpc_available
+
+
+def test_missing_rpc_latches_per_row_path():
+    db = FakeDB(existing=range(4), rpc_errors=[MissingRPC("Could not find the function")])
+    assert stats_writer.bulk_update_by_id(db, "team_stats", _rows(4), chunk_size=2) == (4, 0)
+    assert not stats_writer._bulk_rpc_available
+    assert db.rpc_chunks == []
+    assert db.row_updates == [0, 1, 2, 3]
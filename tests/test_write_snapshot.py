@@ -0,0 +1,48 @@
+"""
+Tests for the per-game write snapshot used by incremental live syncs.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import write_snapshot
+
+GAME = "snapshot-game"
+KEY = lambda r: (r["identifier_duplicate"],)
+
+
+def _rows(**points):
+    return [{"identifier_duplicate": k, "spoints": v} for k, v in points.items()]
+
+
+def setup_function():
+    write_snapshot.forget(GAME)
+
+
+def test_first_sync_writes_everything():
+    rows = _rows(a=2, b=4)
+    changed, skipped = write_snapshot.changed_records(GAME, "player_stats", rows, KEY)
+    assert changed == rows
+    assert skipped == 0
+
+
+def test_only_changed_rows_after_remember():
+    write_snapshot.remember(GAME, "player_stats", _rows(a=2, b=4), KEY)
+    changed, skipped = write_snapshot.changed_records(GAME, "player_stats", _rows(a=2, b=6, c=0), KEY)
+    assert [r["identifier_duplicate"] for r in changed] == ["b", "c"]
+    assert skipped == 1
+
+
+def test_tables_are_tracked_separately():
+    write_snapshot.remember(GAME, "player_stats", _rows(a=2), KEY)
+    changed, _ = write_snapshot.changed_records(GAME, "team_stats", _rows(a=2), KEY)
+    assert len(changed) == 1
+
+
+def test_forget_resets_the_game():
+    write_snapshot.remember(GAME, "player_stats", _rows(a=2), KEY)
+    write_snapshot.forget(GAME)
+    changed, skipped = write_snapshot.changed_records(GAME, "player_stats", _rows(a=2), KEY)
+    assert len(changed) == 1
+    assert skipped == 0